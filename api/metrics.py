@@ -0,0 +1,19 @@
+from http.server import BaseHTTPRequestHandler
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_metrics import get_metrics
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Prometheus scrape of this process's request, inference and serialization metrics
+        body = get_metrics().render().encode()
+        self.send_response(200)
+        self.send_header('Content-type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
\ No newline at end of file
@@ -2,10 +2,57 @@ from http.server import BaseHTTPRequestHandler
 import json
 import os
 import sys
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from forest_inference import UnsupportedModelError
+from model_registry import get_registry
+from prediction_cache import PredictionCache
+from prediction_service import (format_prediction, iter_predictions, material_name, parse_batch, parse_project,
+                                predict_records)
+from service_metrics import get_metrics
+
+# Largest batch accepted in one request, and rows evaluated per vectorized call while streaming
+MAX_BATCH_SIZE = int(os.environ.get('PREDICT_MAX_BATCH_SIZE', 1000))
+BATCH_CHUNK_SIZE = int(os.environ.get('PREDICT_BATCH_CHUNK_SIZE', 256))
+
+# Shared by all requests served by this process
+_prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+    power_step=float(os.environ.get('PREDICTION_CACHE_POWER_STEP', 0)) or None,
+    area_step=float(os.environ.get('PREDICTION_CACHE_AREA_STEP', 0)) or None
+)
+
+def prepare_batch(bodies):
+    """Predict the uncached projects of several single-prediction request bodies in one vectorized call
+
+    Called by api_server.py's micro-batching before the grouped requests are
+    handled one by one: the results go into the prediction cache, so each
+    handler answers from it exactly as it would have on its own. Bodies that
+    cannot be parsed are left for their handler to reject.
+    """
+    model = get_registry().get()
+    projects = {}
+    for body in bodies:
+        try:
+            project = parse_project(json.loads(body))
+        except (ValueError, TypeError):
+            continue
+        key = _prediction_cache.make_key(*project)
+        if key not in projects and not _prediction_cache.contains(key, model.version):
+            projects[key] = project
+    if not projects:
+        return
+    
+    records = [dict(zip(('project_type', 'region', 'power_capacity', 'area'), project))
+               for project in projects.values()]
+    with get_metrics().timer('api_inference_seconds', endpoint='predict', mode='microbatch'):
+        results = predict_records(records, model)
+    for key, result in zip(projects, results):
+        if 'error' not in result:
+            _prediction_cache.put(key, {'master_item': result['master_item'], 'quantity': result['quantity'],
+                                        'confidence': result['confidence']}, model.version)
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
@@ -16,131 +63,128 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
-    def do_POST(self):
+    def send_common_headers(self, status, content_type):
         # Enable CORS
-        self.send_response(200)
+        self.send_response(status)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST')
+        self.send_header('Access-Control-Allow-Methods', 'POST, GET')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-type', content_type)
+
+    def send_json(self, status, payload, model_version=None):
+        with get_metrics().timer('api_serialization_seconds', endpoint='predict'):
+            body = json.dumps(payload).encode()
+        self.send_common_headers(status, 'application/json')
+        if model_version is not None:
+            self.send_header('X-Model-Version', model_version)
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Model version and load timing of this process's warm model
+        try:
+            info = get_registry().info()
+            self.send_json(200, info, info['model_version'])
+        except (FileNotFoundError, UnsupportedModelError) as e:
+            self.send_json(503, {'error': str(e), 'message': 'Model not available'})
+
+    def do_POST(self):
         try:
             # Read request data
             content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            post_data = self.rfile.read(content_length).decode('utf-8')
+            
+            # A JSON array or an NDJSON body is a batch
+            is_ndjson = 'ndjson' in self.headers.get('Content-Type', '')
+            if is_ndjson or post_data.lstrip().startswith('['):
+                return self.handle_batch(post_data, is_ndjson)
             
             # Extract project parameters
-            project_type = data.get('project_type', 'Data Center')
-            region = data.get('region', 'Maharashtra')
-            power_capacity = float(data.get('power_capacity', 25))
-            area = float(data.get('area', 200000))
+            project = parse_project(json.loads(post_data))
+            project_type, region, power_capacity, area = project
             
-            # Simple ML-based prediction logic
-            prediction = self.predict_material(project_type, power_capacity, area)
+            # Trained-model prediction, cached per canonical parameter set
+            model = get_registry().get()
+            cache_key = _prediction_cache.make_key(project_type, region, power_capacity, area)
+            prediction = _prediction_cache.get_or_compute(
+                cache_key, model.version,
+                lambda: self.predict_material(model, project_type, region, power_capacity, area))
             
-            response = {
-                'master_item': prediction['master_item'],
-                'quantity': prediction['quantity'],
-                'material_name': self.get_material_name(prediction['master_item']),
-                'confidence': prediction.get('confidence', 0.85),
-                'project_summary': {
-                    'type': project_type,
-                    'region': region,
-                    'power_mw': power_capacity,
-                    'area_sqft': area
-                }
-            }
+            response = format_prediction(model.version, project, prediction['master_item'],
+                                         prediction['quantity'], prediction['confidence'])
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, response, model.version)
             
+        except (FileNotFoundError, UnsupportedModelError) as e:
+            self.send_json(503, {'error': str(e), 'message': 'Model not available'})
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {'error': str(e), 'message': 'Invalid prediction request'})
         except Exception as e:
             error_response = {
                 'error': str(e),
                 'message': 'Error processing prediction request'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_json(500, error_response)
 
-    def predict_material(self, project_type, power_capacity, area):
-        """Enhanced prediction logic based on project parameters"""
-        
-        # Material weights based on project type
-        material_weights = {
-            'Data Center': {
-                101: 0.15,  # Steel Reinforcement Bars
-                102: 0.25,  # Concrete Mix
-                103: 0.20,  # Electrical Cables
-                104: 0.25,  # HVAC Equipment
-                105: 0.05,  # Flooring Materials
-                106: 0.05,  # Insulation Materials
-                107: 0.05   # Piping Systems
-            },
-            'Office Building': {
-                101: 0.20,  # Steel
-                102: 0.30,  # Concrete
-                103: 0.15,  # Electrical
-                104: 0.15,  # HVAC
-                105: 0.10,  # Flooring
-                106: 0.05,  # Insulation
-                107: 0.05   # Piping
-            },
-            'Industrial Facility': {
-                101: 0.25,  # Steel
-                102: 0.30,  # Concrete
-                103: 0.20,  # Electrical
-                104: 0.10,  # HVAC
-                105: 0.05,  # Flooring
-                106: 0.05,  # Insulation
-                107: 0.05   # Piping
-            }
-        }
-        
-        # Get weights for project type
-        weights = material_weights.get(project_type, material_weights['Data Center'])
-        
-        # Select primary material based on weights (highest probability)
-        primary_material = max(weights.keys(), key=lambda k: weights[k])
+    def handle_batch(self, post_data, is_ndjson):
+        """Predict a batch and stream one NDJSON result line per row as each chunk is evaluated"""
+        records = parse_batch(post_data, is_ndjson)
+        if len(records) > MAX_BATCH_SIZE:
+            return self.send_json(413, {'error': f"Batch of {len(records)} rows exceeds the maximum of {MAX_BATCH_SIZE}",
+                                        'message': 'Batch too large'})
+        model = get_registry().get()
         
-        # Calculate quantity based on area and material type
-        base_qty = area / 1000  # Base quantity per 1000 sq ft
-        
-        if primary_material in [101, 102]:  # Steel, Concrete - high volume
-            quantity = int(base_qty * np.random.uniform(0.8, 1.5))
-        elif primary_material in [103, 104]:  # Electrical, HVAC - medium volume
-            quantity = int(base_qty * np.random.uniform(0.3, 0.8))
-        else:  # Other materials - lower volume
-            quantity = int(base_qty * np.random.uniform(0.1, 0.4))
+        # Length is unknown up front: chunked on HTTP/1.1, otherwise the body ends when the connection closes
+        chunked = self.protocol_version >= 'HTTP/1.1'
+        self.send_common_headers(200, 'application/x-ndjson')
+        self.send_header('X-Model-Version', model.version)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
+        self.end_headers()
         
-        # Ensure minimum quantity
-        quantity = max(1, quantity)
+        def write(data):
+            if chunked:
+                data = b'%x\r\n%s\r\n' % (len(data), data)
+            self.wfile.write(data)
+            self.wfile.flush()
         
-        # Add some variability for Data Centers based on power capacity
-        if project_type == 'Data Center':
-            power_factor = power_capacity / 25.0  # Normalize to 25MW baseline
-            if primary_material == 104:  # HVAC for data centers
-                quantity = int(quantity * power_factor * 1.2)
-            elif primary_material == 103:  # Electrical for data centers
-                quantity = int(quantity * power_factor * 1.1)
+        metrics = get_metrics()
+        chunks = iter_predictions(records, model, BATCH_CHUNK_SIZE)
+        try:
+            while True:
+                start = time.perf_counter()
+                results = next(chunks, None)
+                if results is None:
+                    break
+                metrics.observe('api_inference_seconds', time.perf_counter() - start, endpoint='predict', mode='batch')
+                with metrics.timer('api_serialization_seconds', endpoint='predict'):
+                    data = ''.join(json.dumps(result) + '\n' for result in results).encode()
+                write(data)
+        except Exception as e:
+            # Headers are already sent: report the failure as a final line
+            write((json.dumps({'error': str(e), 'message': 'Batch aborted'}) + '\n').encode())
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def predict_material(self, model, project_type, region, power_capacity, area):
+        """Predict the primary material and quantity with the trained model"""
+        with get_metrics().timer('api_inference_seconds', endpoint='predict', mode='single'):
+            master_items, quantities, confidence = model.predict_with_confidence({
+                'project_type': project_type,
+                'region': region,
+                'power_capacity_mw': power_capacity,
+                'area_sqft': area
+            })
         
         return {
-            'master_item': primary_material,
-            'quantity': quantity,
-            'confidence': weights[primary_material]
+            'master_item': int(master_items[0]),
+            'quantity': int(quantities[0]),
+            'confidence': round(float(confidence[0]), 4)
         }
 
     def get_material_name(self, master_item_no):
         """Get material name from item number"""
-        materials = {
-            101: 'Steel Reinforcement Bars',
-            102: 'Concrete Mix',
-            103: 'Electrical Cables',
-            104: 'HVAC Equipment',
-            105: 'Flooring Materials',
-            106: 'Insulation Materials',
-            107: 'Piping Systems',
-            108: 'Fire Safety Equipment',
-            109: 'Glass Panels',
-            110: 'Roofing Materials'
-        }
-        return materials.get(master_item_no, f'Material {master_item_no}')
\ No newline at end of file
+        return material_name(master_item_no)
\ No newline at end of file
@@ -1,7 +1,150 @@
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
 import json
+import os
+import sys
 from datetime import datetime, timedelta
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prediction_cache import PredictionCache
+from project_scheduler import DEFAULT_START_DATE, ProjectScheduler
+from service_metrics import get_metrics
+
+# Change whenever the generated schedule changes shape, so memoized bodies are dropped
+SCHEDULE_VERSION = 'schedule-v2'
+MAX_SIZE_SCALE = 10.0
+
+MILESTONE_TYPES = {
+    "Project Kickoff": "start",
+    "Design Completion": "major",
+    "Procurement Complete": "major",
+    "Foundation Complete": "construction",
+    "Structure Complete": "construction",
+    "MEP Complete": "major",
+    "Project Completion": "end"
+}
+
+# (material, task it must be on site for, lead time in days)
+PROCUREMENT_ITEMS = [
+    ("Steel Reinforcement Bars", "Concrete Work - Foundation", 14),
+    ("Concrete Mix", "Concrete Work - Foundation", 7),
+    ("HVAC Equipment", "HVAC System Installation", 35),
+    ("Electrical Cables", "Electrical Infrastructure", 21)
+]
+
+# Serialized schedules keyed by normalized parameters; least recently used entries are evicted
+_schedule_cache = PredictionCache(
+    max_entries=int(os.environ.get('SCHEDULE_CACHE_SIZE', 256)),
+    ttl_seconds=float('inf')
+)
+
+
+def parse_schedule_params(query):
+    """Normalized (start_date, size_scale, overrides) cache key from the query string
+
+    start_date is YYYY-MM-DD, size_scale multiplies every task duration and
+    durations is a comma-separated list of task:days pairs, where task is a
+    task id or name. Overrides come back as sorted (task id, days) pairs.
+    """
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    start_date = DEFAULT_START_DATE
+    if params.get('start_date'):
+        start_date = datetime.strptime(params['start_date'], '%Y-%m-%d')
+
+    size_scale = round(float(params.get('size_scale', 1.0)), 3)
+    if not 0 < size_scale <= MAX_SIZE_SCALE:
+        raise ValueError(f"size_scale must be between 0 and {MAX_SIZE_SCALE}")
+
+    durations = {}
+    for item in filter(None, params.get('durations', '').split(',')):
+        task, separator, days = item.rpartition(':')
+        if not separator:
+            raise ValueError(f"Invalid duration override {item!r}, expected task:days")
+        durations[task.strip()] = int(days)
+    overrides = ProjectScheduler().resolve_duration_overrides(durations)
+    return start_date.date().isoformat(), size_scale, tuple(sorted(overrides.items()))
+
+
+def build_schedule(start_date, size_scale, overrides):
+    """Schedule response for one normalized parameter set, computed by ProjectScheduler"""
+    start_date = datetime.fromisoformat(start_date)
+    scheduler = ProjectScheduler("Data Center Construction Project")
+    tasks, milestones = scheduler.create_data_center_schedule(start_date, size_scale, dict(overrides))
+
+    phases = {}
+    for task in tasks:
+        phase = phases.setdefault(task["phase"], {"phase": task["phase"], "start": task["start_date"],
+                                                  "end": task["end_date"], "tasks": []})
+        phase["start"] = min(phase["start"], task["start_date"])
+        phase["end"] = max(phase["end"], task["end_date"])
+        phase["tasks"].append({
+            "id": task["id"],
+            "name": task["name"],
+            "duration": task["duration"],
+            "start_date": task["start_date"].isoformat(),
+            "end_date": task["end_date"].isoformat(),
+            "dependencies": task["dependencies"],
+            "total_float": task["total_float"],
+            "free_float": task["free_float"],
+            "critical": task["critical"]
+        })
+
+    task_starts = {task["name"]: task["start_date"] for task in tasks}
+    procurement_timeline = []
+    for material, required_for, lead_time_days in PROCUREMENT_ITEMS:
+        delivery_date = task_starts[required_for]
+        procurement_timeline.append({
+            "material": material,
+            "order_date": (delivery_date - timedelta(days=lead_time_days)).isoformat(),
+            "delivery_date": delivery_date.isoformat(),
+            "required_for": required_for,
+            "lead_time_days": lead_time_days
+        })
+
+    project_end = max(task["end_date"] for task in tasks)
+    return {
+        "project_info": {
+            "name": scheduler.project_name,
+            "location": "Maharashtra, India",
+            "start_date": start_date.isoformat(),
+            "estimated_duration_days": (project_end - start_date).days,
+            "size_scale": size_scale,
+            "duration_overrides": {str(task_id): days for task_id, days in overrides},
+            "critical_path": [tasks[task_id]["name"] for task_id in scheduler.critical_path]
+        },
+        "phases": [
+            {
+                "phase": phase["phase"],
+                "start_date": phase["start"].isoformat(),
+                "duration_days": (phase["end"] - phase["start"]).days,
+                "tasks": phase["tasks"]
+            }
+            for phase in phases.values()
+        ],
+        "milestones": [
+            {
+                "name": milestone["name"],
+                "date": milestone["date"].isoformat(),
+                "type": MILESTONE_TYPES.get(milestone["name"], "major")
+            }
+            for milestone in milestones
+        ],
+        "procurement_timeline": procurement_timeline
+    }
+
+
+def schedule_body(query):
+    """Serialized schedule for a query string, memoized on its normalized parameters"""
+    key = parse_schedule_params(query)
+
+    def compute():
+        schedule = build_schedule(*key)
+        with get_metrics().timer('api_serialization_seconds', endpoint='schedule'):
+            return json.dumps(schedule).encode()
+
+    return _schedule_cache.get_or_compute(key, SCHEDULE_VERSION, compute)
+
+
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         # Handle CORS preflight
@@ -11,144 +154,29 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
-    def do_GET(self):
-        # Enable CORS
-        self.send_response(200)
+    def send_body(self, status, body):
+        self.send_response(status)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET')
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
+        self.wfile.write(body)
+
+    def do_GET(self):
         try:
-            # Generate project schedule data
-            start_date = datetime(2024, 1, 1)
+            body = schedule_body(urlsplit(self.path).query)
+            self.send_body(200, body)
             
-            schedule_data = {
-                "project_info": {
-                    "name": "Data Center Construction Project",
-                    "location": "Maharashtra, India",
-                    "start_date": start_date.isoformat(),
-                    "estimated_duration_days": 346
-                },
-                "phases": [
-                    {
-                        "phase": "Project Initiation & Planning",
-                        "start_date": start_date.isoformat(),
-                        "duration_days": 45,
-                        "tasks": [
-                            {"name": "Project Charter & Feasibility", "duration": 10},
-                            {"name": "Site Survey & Geotechnical", "duration": 15},
-                            {"name": "Detailed Design & Engineering", "duration": 30},
-                            {"name": "Permits & Approvals", "duration": 20}
-                        ]
-                    },
-                    {
-                        "phase": "Procurement & Contracting",
-                        "start_date": (start_date + timedelta(days=45)).isoformat(),
-                        "duration_days": 35,
-                        "tasks": [
-                            {"name": "Vendor Selection & Contracting", "duration": 15},
-                            {"name": "Material Orders & Delivery Schedule", "duration": 20},
-                            {"name": "Equipment Procurement", "duration": 25}
-                        ]
-                    },
-                    {
-                        "phase": "Construction",
-                        "start_date": (start_date + timedelta(days=80)).isoformat(),
-                        "duration_days": 240,
-                        "tasks": [
-                            {"name": "Site Preparation", "duration": 30},
-                            {"name": "Foundation Work", "duration": 45},
-                            {"name": "Structural Work", "duration": 90},
-                            {"name": "MEP Installation", "duration": 75}
-                        ]
-                    },
-                    {
-                        "phase": "Testing & Commissioning",
-                        "start_date": (start_date + timedelta(days=320)).isoformat(),
-                        "duration_days": 26,
-                        "tasks": [
-                            {"name": "System Integration Testing", "duration": 15},
-                            {"name": "Performance Testing", "duration": 10},
-                            {"name": "Final Inspections", "duration": 8},
-                            {"name": "Documentation & Handover", "duration": 5}
-                        ]
-                    }
-                ],
-                "milestones": [
-                    {
-                        "name": "Project Kickoff",
-                        "date": start_date.isoformat(),
-                        "type": "start"
-                    },
-                    {
-                        "name": "Design Completion",
-                        "date": (start_date + timedelta(days=75)).isoformat(),
-                        "type": "major"
-                    },
-                    {
-                        "name": "Procurement Complete",
-                        "date": (start_date + timedelta(days=120)).isoformat(),
-                        "type": "major"
-                    },
-                    {
-                        "name": "Foundation Complete",
-                        "date": (start_date + timedelta(days=155)).isoformat(),
-                        "type": "construction"
-                    },
-                    {
-                        "name": "Structure Complete",
-                        "date": (start_date + timedelta(days=245)).isoformat(),
-                        "type": "construction"
-                    },
-                    {
-                        "name": "MEP Complete",
-                        "date": (start_date + timedelta(days=320)).isoformat(),
-                        "type": "major"
-                    },
-                    {
-                        "name": "Project Completion",
-                        "date": (start_date + timedelta(days=346)).isoformat(),
-                        "type": "end"
-                    }
-                ],
-                "procurement_timeline": [
-                    {
-                        "material": "Steel Reinforcement Bars",
-                        "order_date": (start_date + timedelta(days=60)).isoformat(),
-                        "delivery_date": (start_date + timedelta(days=74)).isoformat(),
-                        "required_for": "Foundation Work",
-                        "lead_time_days": 14
-                    },
-                    {
-                        "material": "Concrete Mix",
-                        "order_date": (start_date + timedelta(days=103)).isoformat(),
-                        "delivery_date": (start_date + timedelta(days=110)).isoformat(),
-                        "required_for": "Foundation & Structure",
-                        "lead_time_days": 7
-                    },
-                    {
-                        "material": "HVAC Equipment",
-                        "order_date": (start_date + timedelta(days=45)).isoformat(),
-                        "delivery_date": (start_date + timedelta(days=80)).isoformat(),
-                        "required_for": "MEP Installation",
-                        "lead_time_days": 35
-                    },
-                    {
-                        "material": "Electrical Cables",
-                        "order_date": (start_date + timedelta(days=180)).isoformat(),
-                        "delivery_date": (start_date + timedelta(days=201)).isoformat(),
-                        "required_for": "Electrical Infrastructure",
-                        "lead_time_days": 21
-                    }
-                ]
+        except ValueError as e:
+            error_response = {
+                'error': str(e),
+                'message': 'Invalid schedule parameters'
             }
-            
-            self.wfile.write(json.dumps(schedule_data).encode())
-            
+            self.send_body(400, json.dumps(error_response).encode())
         except Exception as e:
             error_response = {
                 'error': str(e),
                 'message': 'Error generating schedule data'
             }
-            self.wfile.write(json.dumps(error_response).encode())
\ No newline at end of file
+            self.send_body(500, json.dumps(error_response).encode())
\ No newline at end of file
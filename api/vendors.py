@@ -1,6 +1,189 @@
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+import gzip
+import hashlib
 import json
 import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip and identity are served
+    brotli = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_metrics import get_metrics
+from vendor_index import DEFAULT_PAGE_SIZE, VendorIndex
+
+# Enhanced vendor database with real-world data structure
+VENDOR_DATA = {
+    "Steel Reinforcement Bars": [
+        {
+            "name": "Mumbai Steel Works Pvt Ltd",
+            "location": "Mumbai, Maharashtra",
+            "contact": "+91-22-2345-6789",
+            "email": "info@mumbaisteel.com",
+            "rating": 4.5,
+            "experience_years": 15,
+            "services": ["Steel Reinforcement Bars", "TMT Bars", "Structural Steel"],
+            "price_range": "₹15,000-20,000/ton",
+            "delivery_time": "7-14 days",
+            "certifications": ["ISO 9001", "BIS Certification"]
+        },
+        {
+            "name": "Pune Iron & Steel Co.",
+            "location": "Pune, Maharashtra",
+            "contact": "+91-20-3456-7890",
+            "email": "sales@puneiron.com",
+            "rating": 4.2,
+            "experience_years": 12,
+            "services": ["Steel Bars", "Iron Products", "Metal Fabrication"],
+            "price_range": "₹14,500-19,500/ton",
+            "delivery_time": "5-10 days",
+            "certifications": ["ISO 9001"]
+        }
+    ],
+    "Concrete Mix": [
+        {
+            "name": "Maharashtra Concrete Solutions",
+            "location": "Mumbai, Maharashtra",
+            "contact": "+91-22-4567-8901",
+            "email": "info@mahaconcrete.com",
+            "rating": 4.6,
+            "experience_years": 20,
+            "services": ["Ready Mix Concrete", "Precast Concrete", "Concrete Pumping"],
+            "price_range": "₹4,500-6,000/m³",
+            "delivery_time": "Same day",
+            "certifications": ["ISO 9001", "NRMCA Certified"]
+        },
+        {
+            "name": "Pune Ready Mix Ltd",
+            "location": "Pune, Maharashtra",
+            "contact": "+91-20-5678-9012",
+            "email": "orders@punereadymix.com",
+            "rating": 4.3,
+            "experience_years": 18,
+            "services": ["Ready Mix Concrete", "Concrete Supply", "Quality Testing"],
+            "price_range": "₹4,200-5,800/m³",
+            "delivery_time": "Same day",
+            "certifications": ["ISO 9001"]
+        }
+    ],
+    "Electrical Cables": [
+        {
+            "name": "Maharashtra Cables & Wires",
+            "location": "Aurangabad, Maharashtra",
+            "contact": "+91-240-234-5678",
+            "email": "sales@mahacables.com",
+            "rating": 4.4,
+            "experience_years": 14,
+            "services": ["Power Cables", "Control Cables", "Fiber Optic Cables"],
+            "price_range": "₹120-180/meter",
+            "delivery_time": "3-7 days",
+            "certifications": ["ISI Mark", "CE Certified"]
+        },
+        {
+            "name": "Western India Electricals",
+            "location": "Mumbai, Maharashtra",
+            "contact": "+91-22-6789-0123",
+            "email": "info@wielectricals.com",
+            "rating": 4.1,
+            "experience_years": 16,
+            "services": ["Electrical Cables", "Switchgear", "Electrical Components"],
+            "price_range": "₹110-170/meter",
+            "delivery_time": "2-5 days",
+            "certifications": ["ISI Mark"]
+        }
+    ],
+    "HVAC Equipment": [
+        {
+            "name": "Cool Air Systems Maharashtra",
+            "location": "Pune, Maharashtra",
+            "contact": "+91-20-7890-1234",
+            "email": "info@coolair.com",
+            "rating": 4.5,
+            "experience_years": 22,
+            "services": ["HVAC Systems", "Air Conditioning", "Ventilation Equipment"],
+            "price_range": "₹1,20,000-2,50,000/unit",
+            "delivery_time": "15-30 days",
+            "certifications": ["ASHRAE Certified", "Energy Star"]
+        },
+        {
+            "name": "Mumbai Climate Control",
+            "location": "Mumbai, Maharashtra",
+            "contact": "+91-22-8901-2345",
+            "email": "sales@mumbaiclimate.com",
+            "rating": 4.2,
+            "experience_years": 19,
+            "services": ["HVAC Installation", "Climate Control", "Maintenance Services"],
+            "price_range": "₹1,10,000-2,40,000/unit",
+            "delivery_time": "12-25 days",
+            "certifications": ["ASHRAE Certified"]
+        }
+    ]
+}
+
+CACHE_CONTROL = f"public, max-age={int(os.environ.get('VENDORS_CACHE_MAX_AGE', 3600))}"
+
+
+# Query parameters answered from the secondary indexes (a bare `material` uses the precomputed bodies)
+INDEXED_QUERY_PARAMS = {'location', 'state', 'certification', 'min_rating', 'max_delivery_days', 'limit', 'cursor'}
+
+
+def encode_body(body, encoding, fast=False):
+    """body in the given content coding; fast trades ratio for speed for per-request bodies"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=5 if fast else 11)
+    return body
+
+
+def available_encodings():
+    return ('identity', 'gzip', 'br') if brotli is not None else ('identity', 'gzip')
+
+
+def build_representations(payload):
+    """Serialize payload once and keep every encoding with its own strong ETag"""
+    body = json.dumps(payload).encode()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {encoding: (encode_body(body, encoding), f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"')
+            for encoding in available_encodings()}
+
+
+# Built once per process: the full catalog and the vendors of each material, keyed like VendorIndex
+PRECOMPUTED_RESPONSES = {None: build_representations(VENDOR_DATA)}
+PRECOMPUTED_RESPONSES.update({material.lower(): build_representations({material: vendors})
+                              for material, vendors in VENDOR_DATA.items()})
+
+# Secondary indexes for filtered, paginated queries
+VENDOR_INDEX = VendorIndex(VENDOR_DATA)
+
+
+def choose_encoding(accept_encoding, available):
+    """Best available content coding the client accepts: br, then gzip, then identity"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison, as If-None-Match requires"""
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
@@ -11,148 +194,78 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
-    def do_GET(self):
+    def send_cors_headers(self, status):
         # Enable CORS
-        self.send_response(200)
+        self.send_response(status)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET')
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_cors_headers(status)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
+        self.wfile.write(body)
+
+    def indexed_query(self, filters):
+        """One page of vendors matching the filters, from the secondary indexes"""
+        min_rating = filters.get('min_rating')
+        max_delivery_days = filters.get('max_delivery_days')
+        return VENDOR_INDEX.query(
+            material=filters.get('material'),
+            location=filters.get('location', filters.get('state')),
+            certification=filters.get('certification'),
+            min_rating=None if min_rating is None else float(min_rating),
+            max_delivery_days=None if max_delivery_days is None else float(max_delivery_days),
+            limit=int(filters.get('limit', DEFAULT_PAGE_SIZE)),
+            cursor=filters.get('cursor'))
+
+    def do_GET(self):
         try:
-            # Enhanced vendor database with real-world data structure
-            vendor_data = {
-                "Steel Reinforcement Bars": [
-                    {
-                        "name": "Mumbai Steel Works Pvt Ltd",
-                        "location": "Mumbai, Maharashtra",
-                        "contact": "+91-22-2345-6789",
-                        "email": "info@mumbaisteel.com",
-                        "rating": 4.5,
-                        "experience_years": 15,
-                        "services": ["Steel Reinforcement Bars", "TMT Bars", "Structural Steel"],
-                        "price_range": "₹15,000-20,000/ton",
-                        "delivery_time": "7-14 days",
-                        "certifications": ["ISO 9001", "BIS Certification"]
-                    },
-                    {
-                        "name": "Pune Iron & Steel Co.",
-                        "location": "Pune, Maharashtra",
-                        "contact": "+91-20-3456-7890",
-                        "email": "sales@puneiron.com",
-                        "rating": 4.2,
-                        "experience_years": 12,
-                        "services": ["Steel Bars", "Iron Products", "Metal Fabrication"],
-                        "price_range": "₹14,500-19,500/ton",
-                        "delivery_time": "5-10 days",
-                        "certifications": ["ISO 9001"]
-                    }
-                ],
-                "Concrete Mix": [
-                    {
-                        "name": "Maharashtra Concrete Solutions",
-                        "location": "Mumbai, Maharashtra",
-                        "contact": "+91-22-4567-8901",
-                        "email": "info@mahaconcrete.com",
-                        "rating": 4.6,
-                        "experience_years": 20,
-                        "services": ["Ready Mix Concrete", "Precast Concrete", "Concrete Pumping"],
-                        "price_range": "₹4,500-6,000/m³",
-                        "delivery_time": "Same day",
-                        "certifications": ["ISO 9001", "NRMCA Certified"]
-                    },
-                    {
-                        "name": "Pune Ready Mix Ltd",
-                        "location": "Pune, Maharashtra",
-                        "contact": "+91-20-5678-9012",
-                        "email": "orders@punereadymix.com",
-                        "rating": 4.3,
-                        "experience_years": 18,
-                        "services": ["Ready Mix Concrete", "Concrete Supply", "Quality Testing"],
-                        "price_range": "₹4,200-5,800/m³",
-                        "delivery_time": "Same day",
-                        "certifications": ["ISO 9001"]
-                    }
-                ],
-                "Electrical Cables": [
-                    {
-                        "name": "Maharashtra Cables & Wires",
-                        "location": "Aurangabad, Maharashtra",
-                        "contact": "+91-240-234-5678",
-                        "email": "sales@mahacables.com",
-                        "rating": 4.4,
-                        "experience_years": 14,
-                        "services": ["Power Cables", "Control Cables", "Fiber Optic Cables"],
-                        "price_range": "₹120-180/meter",
-                        "delivery_time": "3-7 days",
-                        "certifications": ["ISI Mark", "CE Certified"]
-                    },
-                    {
-                        "name": "Western India Electricals",
-                        "location": "Mumbai, Maharashtra",
-                        "contact": "+91-22-6789-0123",
-                        "email": "info@wielectricals.com",
-                        "rating": 4.1,
-                        "experience_years": 16,
-                        "services": ["Electrical Cables", "Switchgear", "Electrical Components"],
-                        "price_range": "₹110-170/meter",
-                        "delivery_time": "2-5 days",
-                        "certifications": ["ISI Mark"]
-                    }
-                ],
-                "HVAC Equipment": [
-                    {
-                        "name": "Cool Air Systems Maharashtra",
-                        "location": "Pune, Maharashtra",
-                        "contact": "+91-20-7890-1234",
-                        "email": "info@coolair.com",
-                        "rating": 4.5,
-                        "experience_years": 22,
-                        "services": ["HVAC Systems", "Air Conditioning", "Ventilation Equipment"],
-                        "price_range": "₹1,20,000-2,50,000/unit",
-                        "delivery_time": "15-30 days",
-                        "certifications": ["ASHRAE Certified", "Energy Star"]
-                    },
-                    {
-                        "name": "Mumbai Climate Control",
-                        "location": "Mumbai, Maharashtra",
-                        "contact": "+91-22-8901-2345",
-                        "email": "sales@mumbaiclimate.com",
-                        "rating": 4.2,
-                        "experience_years": 19,
-                        "services": ["HVAC Installation", "Climate Control", "Maintenance Services"],
-                        "price_range": "₹1,10,000-2,40,000/unit",
-                        "delivery_time": "12-25 days",
-                        "certifications": ["ASHRAE Certified"]
-                    }
-                ]
-            }
-            
             # Parse query parameters for filtering
-            query_string = self.path.split('?')
-            filters = {}
-            if len(query_string) > 1:
-                params = query_string[1].split('&')
-                for param in params:
-                    if '=' in param:
-                        key, value = param.split('=', 1)
-                        filters[key] = value.replace('%20', ' ')
+            filters = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+            encoding = choose_encoding(self.headers.get('Accept-Encoding', ''), available_encodings())
             
-            # Filter vendors if material type is specified
-            if 'material' in filters:
-                material_type = filters['material']
-                if material_type in vendor_data:
-                    response = {material_type: vendor_data[material_type]}
-                else:
-                    response = {"error": f"Material type '{material_type}' not found"}
+            if INDEXED_QUERY_PARAMS & filters.keys():
+                try:
+                    page = self.indexed_query(filters)
+                except ValueError as e:
+                    return self.send_json(400, {'error': str(e), 'message': 'Invalid vendor query'})
+                with get_metrics().timer('api_serialization_seconds', endpoint='vendors'):
+                    body = json.dumps(page).encode()
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                    if encoding != 'identity':
+                        body = encode_body(body, encoding, fast=True)
+                        etag = f'{etag[:-1]}-{encoding}"'
             else:
-                response = vendor_data
+                # Filter vendors if material type is specified (case-insensitive, as in the indexes)
+                material = filters.get('material')
+                representations = PRECOMPUTED_RESPONSES.get(None if material is None else material.strip().lower())
+                if representations is None:
+                    return self.send_json(200, {"error": f"Material type '{filters['material']}' not found"})
+                body, etag = representations[encoding]
+            
+            if_none_match = self.headers.get('If-None-Match')
+            status = 304 if if_none_match and etag_matches(if_none_match, etag) else 200
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_cors_headers(status)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', CACHE_CONTROL)
+            self.send_header('Vary', 'Accept-Encoding')
+            if status == 304:
+                self.end_headers()
+                return
+            self.send_header('Content-type', 'application/json')
+            if encoding != 'identity':
+                self.send_header('Content-Encoding', encoding)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
             
         except Exception as e:
             error_response = {
                 'error': str(e),
                 'message': 'Error loading vendor database'
             }
-            self.wfile.write(json.dumps(error_response).encode())
\ No newline at end of file
+            self.send_json(500, error_response)
\ No newline at end of file
@@ -0,0 +1,675 @@
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import multiprocessing as mp
+import os
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+
+from service_metrics import BATCH_SIZE_BUCKETS, get_metrics, reset_metrics
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(REPO_ROOT, 'api')
+VERCEL_CONFIG = os.path.join(REPO_ROOT, 'vercel.json')
+
+MAX_HEADER_BYTES = 64 * 1024
+# Headers that describe one hop of the connection; the server sets its own
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'expect'}
+# Handlers that are CPU-bound and run in the worker processes; the rest run on threads
+PROCESS_POOL_ROUTES = {'predict'}
+# Handlers whose single-object POSTs may be grouped by micro-batching (see MicroBatcher)
+MICRO_BATCH_ROUTES = {'predict'}
+
+# Handler modules and in-memory adapters of their handler classes, built once per process
+_modules = {}
+_adapters = {}
+# In a worker process: where streamed response chunks go back to the server (see _init_worker)
+_stream_queue = None
+
+
+def load_module(name):
+    """The api/<name>.py module, imported once per process"""
+    if name not in _modules:
+        spec = importlib.util.spec_from_file_location(f'api_{name}', os.path.join(API_DIR, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def load_handler(name):
+    """The `handler` class of api/<name>.py"""
+    return load_module(name).handler
+
+
+def handler_adapter(name):
+    """Subclass of api/<name>.py's handler that reads and writes in-memory buffers instead of a socket"""
+    if name not in _adapters:
+        base = load_handler(name)
+
+        class InMemoryHandler(base):
+            # One request per invocation; the server owns keep-alive and framing. `server` is the send
+            # callback of HandlerOutput (or None)
+            protocol_version = 'HTTP/1.0'
+
+            def setup(self):
+                self.rfile = io.BytesIO(self.request)
+                self.wfile = HandlerOutput(self.server)
+                # Answer in the client's HTTP version, so a streaming handler may use chunked encoding
+                if self.request.split(b'\r\n', 1)[0].rsplit(b' ', 1)[-1] >= b'HTTP/1.1':
+                    self.protocol_version = 'HTTP/1.1'
+
+            def handle(self):
+                self.handle_one_request()
+
+            def finish(self):
+                pass
+
+            def log_message(self, format, *args):
+                pass
+
+        _adapters[name] = InMemoryHandler
+    return _adapters[name]
+
+
+def is_chunked(head):
+    """Whether a raw response head declares Transfer-Encoding: chunked"""
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'transfer-encoding' and b'chunked' in value.lower():
+            return True
+    return False
+
+
+class HandlerOutput:
+    """wfile of an in-memory handler
+
+    The response is buffered, unless a `send` callback is given and the
+    handler streams it (Transfer-Encoding: chunked): from then on whatever
+    it has written is passed to send(bytes) each time it flushes, and
+    send(None) marks the end.
+    """
+
+    def __init__(self, send=None):
+        self.send = send
+        self.buffer = bytearray()
+        self.streaming = False
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        if self.send is None:
+            return
+        if not self.streaming:
+            head_end = self.buffer.find(b'\r\n\r\n')
+            if head_end < 0 or not is_chunked(self.buffer[:head_end]):
+                return
+            self.streaming = True
+        if self.buffer:
+            self.send(bytes(self.buffer))
+            self.buffer.clear()
+
+    def finish(self):
+        """The buffered response, or None if it was streamed"""
+        if not self.streaming:
+            return bytes(self.buffer)
+        self.flush()
+        self.send(None)
+        return None
+
+
+def invoke_handler(name, raw_request, client_address, send=None):
+    """Run api/<name>.py's handler on one raw HTTP request and return its raw response bytes
+
+    With `send`, a streamed (chunked) response is handed to it as it is
+    written instead, and None is returned (see HandlerOutput).
+    """
+    handler = handler_adapter(name)(raw_request, client_address, send)
+    return handler.wfile.finish()
+
+
+def invoke_handler_in_worker(name, raw_request, client_address, stream_id=None):
+    """invoke_handler in a worker process, returning the response and the metrics it recorded
+
+    With a stream_id, a streamed response goes to the server as (stream_id, bytes) on the stream queue.
+    """
+    send = None
+    if stream_id is not None:
+        def send(data):
+            _stream_queue.put((stream_id, data))
+    return invoke_handler(name, raw_request, client_address, send), get_metrics().drain()
+
+
+def invoke_handler_batch(name, raw_requests, client_addresses):
+    """invoke_handler over a group of requests, after the module's prepare_batch hook has seen all their bodies
+
+    prepare_batch (optional) does work shared by the group, such as one
+    vectorized model call; if it fails, each request is still handled alone.
+    """
+    prepare_batch = getattr(load_module(name), 'prepare_batch', None)
+    if prepare_batch is not None:
+        try:
+            prepare_batch([raw_request.partition(b'\r\n\r\n')[2] for raw_request in raw_requests])
+        except Exception:
+            pass
+    return [invoke_handler(name, raw_request, client_address)
+            for raw_request, client_address in zip(raw_requests, client_addresses)]
+
+
+def invoke_handler_batch_in_worker(name, raw_requests, client_addresses):
+    return invoke_handler_batch(name, raw_requests, client_addresses), get_metrics().drain()
+
+
+def is_batchable(method, headers, body):
+    """Whether a request is a single JSON-object POST that micro-batching may group"""
+    content_type = next((v.lower() for n, v in headers if n.lower() == 'content-type'), '')
+    return method == 'POST' and 'ndjson' not in content_type and body.lstrip()[:1] == b'{'
+
+
+def start_model_watcher(interval=None):
+    """Have this process pick up retrained models: check every `interval` seconds (None: MODEL_RELOAD_INTERVAL or 5)"""
+    try:
+        from model_registry import get_registry, reload_interval
+    except ImportError:
+        return
+    get_registry().start_watcher(reload_interval() if interval is None else interval)
+
+
+def _init_worker(names, stream_queue=None, reload_interval=None):
+    global _stream_queue
+    _stream_queue = stream_queue
+    # A forked worker starts with a copy of the server's samples (and maybe a held lock); drain() must only
+    # hand back what the worker records itself
+    reset_metrics()
+    # Import the handlers (and warm the model they load) before the first request arrives
+    for name in names:
+        handler_adapter(name)
+    try:
+        from model_registry import get_registry
+        get_registry().get()
+    except (ImportError, FileNotFoundError, TypeError):
+        # No model yet, or one that cannot be served (UnsupportedModelError): requests report it
+        pass
+    start_model_watcher(reload_interval)
+
+
+def load_routes(path=VERCEL_CONFIG):
+    """(compiled src pattern, dest) pairs from vercel.json, in match order"""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    return [(re.compile(f"^{route['src']}$"), route['dest']) for route in config.get('routes', [])]
+
+
+def build_response(status, reason, headers, body, keep_alive):
+    """Raw HTTP/1.1 response; body=None gives only the head of a chunked response"""
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    lines.append("Transfer-Encoding: chunked" if body is None else f"Content-Length: {len(body)}")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b'')
+
+
+def parse_handler_response(raw):
+    """(status, reason, headers, body) from a handler's raw HTTP/1.0 output, minus hop-by-hop headers"""
+    head, _, body = raw.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ', 2)
+    status, reason = int(parts[1]), parts[2] if len(parts) > 2 else ''
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() not in HOP_BY_HOP_HEADERS:
+            headers.append((name.strip(), value.strip()))
+    return status, reason, headers, body
+
+
+class MicroBatcher:
+    """Groups requests to one handler that arrive within `window` seconds into a single dispatch
+
+    The first request of a group starts the window; the group is sent when
+    the window closes or as soon as it holds `max_batch_size` requests.
+    run_batch(raw_requests, client_addresses) returns the raw responses in
+    order, and each caller gets its own back.
+    """
+
+    def __init__(self, name, window, max_batch_size, run_batch):
+        self.name = name
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.run_batch = run_batch
+        self.pending = []  # (raw request, client address, future, enqueued at)
+        self.timer = None
+        self.tasks = set()
+
+    async def submit(self, raw_request, client_address):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((raw_request, client_address, future, time.perf_counter()))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self.run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run(self, batch):
+        metrics = get_metrics()
+        now = time.perf_counter()
+        metrics.observe('api_microbatch_size', len(batch), BATCH_SIZE_BUCKETS, endpoint=self.name)
+        for _, _, _, enqueued_at in batch:
+            metrics.observe('api_microbatch_queue_seconds', now - enqueued_at, endpoint=self.name)
+        try:
+            responses = await self.run_batch([item[0] for item in batch], [item[1] for item in batch])
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future, _), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+
+class APIServer:
+    """asyncio HTTP/1.1 server for the api/*.py handlers, routed like vercel.json
+
+    Connections are kept alive between requests. Prediction requests run
+    in a process pool, with at most `max_queued` per worker waiting for it.
+    The other handlers run on a thread pool. A handler that answers an
+    HTTP/1.1 request with a chunked response is streamed to the client as
+    it writes it; other responses are buffered and sent with a
+    Content-Length. With a `micro_batch_window`
+    (seconds), single predictions arriving together are grouped, up to
+    `micro_batch_size`, into one worker call. Every process checks for a
+    retrained model each `reload_interval` seconds (None: MODEL_RELOAD_INTERVAL
+    or 5; 0 = off). On SIGINT/SIGTERM the server stops accepting, closes idle
+    connections, lets in-flight requests finish for up to `grace_seconds`,
+    then shuts the pools down.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, workers=None, keep_alive_timeout=15.0,
+                 max_body_bytes=16 * 2**20, grace_seconds=10.0, max_queued=2, access_log=False,
+                 micro_batch_window=0.0, micro_batch_size=64, reload_interval=None):
+        self.host = host
+        self.port = port
+        self.workers = os.cpu_count() if workers is None else workers
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_body_bytes = max_body_bytes
+        self.grace_seconds = grace_seconds
+        self.access_log = access_log
+        self.reload_interval = reload_interval
+        self.routes = load_routes()
+        self.handler_names = sorted(name[:-3] for name in os.listdir(API_DIR) if name.endswith('.py'))
+        self.pool_slots = asyncio.Semaphore(max(1, self.workers * max_queued))
+        self.batchers = {}
+        if micro_batch_window > 0:
+            self.batchers = {name: MicroBatcher(name, micro_batch_window, micro_batch_size,
+                                                lambda *args, name=name: self.dispatch_batch(name, *args))
+                             for name in MICRO_BATCH_ROUTES if name in self.handler_names}
+        self.process_pool = None
+        self.thread_pool = None
+        self.server = None
+        self.closing = False
+        self.stopped = None
+        self.connections = {}  # task -> True while a request is being served
+        self.streams = {}  # stream id -> asyncio.Queue of one handler call's output (see respond)
+        self.stream_ids = count()
+        self.stream_queue = None
+        self.stream_pump = None
+
+    def resolve(self, path):
+        """('handler', name), ('static', file path) or None for a request path"""
+        path = path.split('?', 1)[0]
+        for pattern, dest in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            target = re.sub(r'\$(\d+)', lambda m: match.group(int(m.group(1))) or '', dest)
+            if target.startswith('/api/'):
+                name = target[len('/api/'):]
+                name = name[:-3] if name.endswith('.py') else name
+                return ('handler', name) if name in self.handler_names else None
+            file_path = os.path.realpath(os.path.join(REPO_ROOT, target.lstrip('/')))
+            if file_path.startswith(REPO_ROOT + os.sep) and os.path.isfile(file_path):
+                return 'static', file_path
+            return None
+        return None
+
+    async def read_request(self, reader, writer):
+        """(method, path, version, headers, body) of the next request, or None when the client is done"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keep_alive_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, 'Request Header Fields Too Large')
+
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise HTTPError(400, 'Bad Request')
+        method, path, version = parts
+        headers = []
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers.append((name.strip(), value.strip()))
+        lookup = {name.lower(): value for name, value in headers}
+
+        if lookup.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await writer.drain()
+
+        if 'chunked' in lookup.get('transfer-encoding', '').lower():
+            chunks, size = [], 0
+            while True:
+                chunk_size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if chunk_size == 0:
+                    await reader.readuntil(b'\r\n')
+                    break
+                size += chunk_size
+                if size > self.max_body_bytes:
+                    raise HTTPError(413, 'Payload Too Large')
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        else:
+            length = int(lookup.get('content-length', 0) or 0)
+            if length > self.max_body_bytes:
+                raise HTTPError(413, 'Payload Too Large')
+            body = await reader.readexactly(length) if length else b''
+        return method, path, version, headers, body
+
+    async def dispatch(self, name, raw_request, client_address, stream_id=None):
+        """Raw response of a handler, or None when it was streamed to self.streams[stream_id]"""
+        loop = asyncio.get_running_loop()
+        if name in PROCESS_POOL_ROUTES and self.process_pool is not None:
+            async with self.pool_slots:
+                raw_response, samples = await loop.run_in_executor(
+                    self.process_pool, invoke_handler_in_worker, name, raw_request, client_address, stream_id)
+            get_metrics().merge(samples)
+            return raw_response
+        send = None
+        if stream_id is not None:
+            def send(data):
+                loop.call_soon_threadsafe(self.deliver, stream_id, data)
+        return await loop.run_in_executor(self.thread_pool, invoke_handler, name, raw_request, client_address,
+                                          send)
+
+    def deliver(self, stream_id, data):
+        """Queue a streamed chunk (None: the end) for the request it belongs to, if it is still being served"""
+        stream = self.streams.get(stream_id)
+        if stream is not None:
+            stream.put_nowait(('data', data))
+
+    def pump_streams(self, loop):
+        """Thread moving chunks streamed by the worker processes onto the event loop"""
+        while True:
+            item = self.stream_queue.get()
+            if item is None:
+                return
+            loop.call_soon_threadsafe(self.deliver, *item)
+
+    async def dispatch_batch(self, name, raw_requests, client_addresses):
+        loop = asyncio.get_running_loop()
+        if name in PROCESS_POOL_ROUTES and self.process_pool is not None:
+            async with self.pool_slots:
+                raw_responses, samples = await loop.run_in_executor(
+                    self.process_pool, invoke_handler_batch_in_worker, name, raw_requests, client_addresses)
+            get_metrics().merge(samples)
+            return raw_responses
+        return await loop.run_in_executor(self.thread_pool, invoke_handler_batch, name, raw_requests,
+                                          client_addresses)
+
+    @staticmethod
+    def endpoint_label(route):
+        """Metrics label of a resolved route: the handler name, 'static' or 'not_found'"""
+        if route is None:
+            return 'not_found'
+        return route[1] if route[0] == 'handler' else 'static'
+
+    async def respond(self, route, method, path, version, headers, body, client_address):
+        """(status, reason, headers, body) for one request to a resolved route
+
+        body is bytes, or for a streamed response an async iterator over its
+        chunk-framed bytes.
+        """
+        if route is None:
+            return 404, 'Not Found', [('Content-Type', 'application/json')], b'{"error": "Not found"}'
+        kind, target = route
+        if kind == 'static':
+            with open(target, 'rb') as f:
+                content = f.read()
+            content_type = 'text/html; charset=utf-8' if target.endswith('.html') else 'application/octet-stream'
+            return 200, 'OK', [('Content-Type', content_type)], b'' if method == 'HEAD' else content
+
+        # Hand the handler a self-contained request in the client's HTTP version with the body length rewritten
+        head = [f"{method} {path} {'HTTP/1.1' if version >= 'HTTP/1.1' else 'HTTP/1.0'}"]
+        head += [f"{n}: {v}" for n, v in headers if n.lower() not in HOP_BY_HOP_HEADERS]
+        head.append(f"Content-Length: {len(body)}")
+        raw_request = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+        if target in self.batchers and is_batchable(method, headers, body):
+            raw_response = await self.batchers[target].submit(raw_request, client_address)
+        else:
+            # The handler's output arrives as ('data', bytes or None at the end) items if it streams,
+            # then ('done', dispatch task) once the call returns
+            stream_id = next(self.stream_ids)
+            stream = self.streams[stream_id] = asyncio.Queue()
+            task = asyncio.ensure_future(self.dispatch(target, raw_request, client_address, stream_id))
+            task.add_done_callback(lambda task: stream.put_nowait(('done', task)))
+            try:
+                kind, value = await stream.get()
+                if kind == 'done':
+                    raw_response = value.result()
+                    if raw_response is None:
+                        # Streamed by a worker: the call returned before its chunks got here
+                        kind, value = await stream.get()
+            except BaseException:
+                self.streams.pop(stream_id, None)
+                raise
+            if kind == 'data':
+                status, reason, out_headers, prefix = parse_handler_response(value)
+                return status, reason, out_headers, self.stream_body(stream_id, stream, prefix)
+            self.streams.pop(stream_id, None)
+        if not raw_response:
+            return 502, 'Bad Gateway', [('Content-Type', 'application/json')], b'{"error": "Empty handler response"}'
+        return parse_handler_response(raw_response)
+
+    async def stream_body(self, stream_id, stream, prefix):
+        """Chunk-framed body bytes of a streamed response as the handler writes them
+
+        Raises the handler's error if it fails before finishing the body.
+        """
+        try:
+            if prefix:
+                yield prefix
+            while True:
+                kind, value = await stream.get()
+                if kind == 'data':
+                    if value is None:
+                        return
+                    yield value
+                elif value.exception() is not None:
+                    raise value.exception()
+        finally:
+            self.streams.pop(stream_id, None)
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections[task] = False
+        metrics = get_metrics()
+        client_address = writer.get_extra_info('peername')
+        try:
+            while not self.closing:
+                try:
+                    request = await self.read_request(reader, writer)
+                except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    writer.write(build_response(400, 'Bad Request', [], b'', keep_alive=False))
+                    break
+                except HTTPError as e:
+                    writer.write(build_response(e.status, e.reason, [], b'', keep_alive=False))
+                    break
+                if request is None:
+                    break
+                self.connections[task] = True
+                method, path, version, headers, body = request
+                connection = next((v.lower() for n, v in headers if n.lower() == 'connection'), '')
+                keep_alive = ('close' not in connection) if version >= 'HTTP/1.1' else ('keep-alive' in connection)
+
+                start = time.perf_counter()
+                route = self.resolve(path)
+                endpoint = self.endpoint_label(route)
+                metrics.add_gauge('api_requests_in_flight', 1, endpoint=endpoint)
+                status = 500
+                try:
+                    try:
+                        status, reason, out_headers, out_body = await self.respond(
+                            route, method, path, version, headers, body, client_address)
+                    except Exception as e:
+                        status, reason, out_headers = 500, 'Internal Server Error', [('Content-Type', 'application/json')]
+                        out_body = json.dumps({'error': str(e), 'message': 'Handler failed'}).encode()
+
+                    keep_alive = keep_alive and not self.closing
+                    if isinstance(out_body, bytes):
+                        writer.write(build_response(status, reason, out_headers, out_body, keep_alive))
+                        await writer.drain()
+                        size = len(out_body)
+                    else:
+                        writer.write(build_response(status, reason, out_headers, None, keep_alive))
+                        size = 0
+                        try:
+                            async for data in out_body:
+                                writer.write(data)
+                                size += len(data)
+                                await writer.drain()
+                        except (ConnectionError, asyncio.CancelledError):
+                            raise
+                        except Exception:
+                            # The head is out already: closing without the last chunk tells the client
+                            status, keep_alive = 500, False
+                        finally:
+                            await out_body.aclose()
+                finally:
+                    metrics.add_gauge('api_requests_in_flight', -1, endpoint=endpoint)
+                    metrics.record_request(endpoint, status, time.perf_counter() - start)
+                self.connections[task] = False
+                if self.access_log:
+                    print(f"{client_address[0]} \"{method} {path}\" {status} {size} "
+                          f"{1000 * (time.perf_counter() - start):.1f}ms")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.pop(task, None)
+            writer.close()
+
+    def stop(self):
+        """Begin a graceful shutdown"""
+        if self.stopped is not None:
+            self.stopped.set()
+
+    async def serve(self):
+        self.stopped = asyncio.Event()
+        self.thread_pool = ThreadPoolExecutor(max(4, self.workers))
+        loop = asyncio.get_running_loop()
+        if self.workers > 0:
+            context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+            self.stream_queue = context.Queue()
+            self.process_pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                                    initargs=(sorted(PROCESS_POOL_ROUTES), self.stream_queue,
+                                                              self.reload_interval))
+            self.stream_pump = threading.Thread(target=self.pump_streams, args=(loop,), daemon=True)
+            self.stream_pump.start()
+            # Fork the workers before accepting: forked later, they would hold client sockets open
+            await loop.run_in_executor(self.process_pool, os.getpid)
+        # After the fork, so that no worker starts with a copy of the watcher's locks
+        start_model_watcher(self.reload_interval)
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                 limit=MAX_HEADER_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"Serving {', '.join('/api/' + n for n in self.handler_names)} on http://{self.host}:{self.port} "
+              f"({self.workers} prediction workers)")
+        try:
+            await self.stopped.wait()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        print("Shutting down: draining in-flight requests...")
+        self.closing = True
+        self.server.close()
+        # Idle keep-alive connections are only waiting for a next request
+        for task, busy in list(self.connections.items()):
+            if not busy:
+                task.cancel()
+        busy = [task for task in self.connections]
+        if busy:
+            _, pending = await asyncio.wait(busy, timeout=self.grace_seconds)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        await self.server.wait_closed()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(cancel_futures=True)
+            self.stream_queue.put(None)
+            self.stream_pump.join(self.grace_seconds)
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        print("Server stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the api/*.py handlers from one asyncio HTTP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help="prediction worker processes (0 = threads only)")
+    parser.add_argument('--keep-alive-timeout', type=float, default=15.0, help="seconds an idle connection stays open")
+    parser.add_argument('--grace', type=float, default=10.0, help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument('--access-log', action='store_true')
+    parser.add_argument('--micro-batch-window', type=float, default=0.0,
+                        help="milliseconds to hold single predictions for grouping (0 = off, 2-5 typical)")
+    parser.add_argument('--micro-batch-size', type=int, default=64, help="most predictions grouped into one call")
+    parser.add_argument('--reload-interval', type=float, default=None,
+                        help="seconds between checks for a new model (0 = off, default $MODEL_RELOAD_INTERVAL or 5)")
+    args = parser.parse_args()
+
+    server = APIServer(args.host, args.port, args.workers, args.keep_alive_timeout,
+                       grace_seconds=args.grace, access_log=args.access_log,
+                       micro_batch_window=args.micro_batch_window / 1000, micro_batch_size=args.micro_batch_size,
+                       reload_interval=args.reload_interval)
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
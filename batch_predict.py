@@ -0,0 +1,174 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from material_forecasting import MaterialForecastingModel, iter_dataset_chunks
+from model_artifact import load_artifact
+
+INPUT_COLUMNS = ['id', 'project_type', 'region', 'power_capacity_mw', 'area_sqft']
+OUTPUT_COLUMNS = ['id', 'MasterItemNo', 'QtyShipped']
+
+# Model shared by the worker processes. With the fork start method it is loaded once
+# in the parent and inherited copy-on-write; otherwise each worker loads it on start.
+# An artifact directory is memory-mapped, so workers share its pages either way.
+_model = None
+
+
+def load_shared_model(model_path):
+    """Load a pickled model or artifact directory into this process's shared slot"""
+    global _model
+    if _model is None:
+        if os.path.isdir(model_path):
+            _model = load_artifact(model_path)
+        else:
+            _model = MaterialForecastingModel()
+            _model.load_model(model_path)
+    return _model
+
+
+def predict_chunk(chunk):
+    """Score one chunk and return it as header-less CSV text"""
+    master_items, quantities = _model.predict(chunk)
+    lines = [f"{row_id},{item},{qty}\n" for row_id, item, qty in zip(chunk['id'], master_items, quantities)]
+    return ''.join(lines)
+
+
+def checkpoint_path(output_path):
+    return output_path + '.checkpoint.json'
+
+
+def read_checkpoint(output_path, input_path, chunk_size):
+    """Return the saved progress for this run, or None to start from scratch"""
+    try:
+        with open(checkpoint_path(output_path), 'r') as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get('input') != os.path.abspath(input_path) or checkpoint.get('chunk_size') != chunk_size:
+        raise ValueError("Checkpoint was written for a different input or chunk size; remove it or drop --resume")
+    try:
+        output_size = os.path.getsize(output_path)
+    except FileNotFoundError:
+        output_size = -1
+    if output_size < checkpoint['bytes_written']:
+        print(f"{output_path} is missing or shorter than its checkpoint; starting from scratch")
+        return None
+    return checkpoint
+
+
+def write_checkpoint(output_path, checkpoint):
+    """Atomically replace the checkpoint file"""
+    tmp_path = checkpoint_path(output_path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path(output_path))
+
+
+def run_batch_prediction(input_path, output_path, model_path='material_forecasting_model.pkl',
+                         chunk_size=100000, workers=None, resume=False, report_every=10):
+    """Stream input chunks through a process pool and append predictions to output_path
+
+    Results are written in input order as they complete, and a checkpoint
+    (chunks done, rows and bytes written) is saved after every chunk so an
+    interrupted run can continue with resume=True.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    checkpoint = read_checkpoint(output_path, input_path, chunk_size) if resume else None
+    if checkpoint is None:
+        checkpoint = {'input': os.path.abspath(input_path), 'chunk_size': chunk_size,
+                      'chunks_done': 0, 'rows_written': 0, 'bytes_written': 0}
+        with open(output_path, 'wb') as f:
+            f.write((','.join(OUTPUT_COLUMNS) + '\n').encode())
+        checkpoint['bytes_written'] = os.path.getsize(output_path)
+        write_checkpoint(output_path, checkpoint)
+    else:
+        print(f"Resuming after {checkpoint['chunks_done']} chunks ({checkpoint['rows_written']} rows)")
+
+    load_shared_model(model_path)
+    chunks = iter_dataset_chunks(input_path, chunk_size, columns=INPUT_COLUMNS)
+    for _ in range(checkpoint['chunks_done']):
+        next(chunks, None)
+
+    executor = None
+    if workers > 0:
+        if 'fork' in mp.get_all_start_methods():
+            executor = ProcessPoolExecutor(workers, mp_context=mp.get_context('fork'))
+        else:
+            executor = ProcessPoolExecutor(workers, initializer=load_shared_model, initargs=(model_path,))
+
+    start_time = time.perf_counter()
+    rows_this_run = 0
+    try:
+        # Binary mode: bytes_written is a byte offset, which a text-mode tell() does not promise
+        with open(output_path, 'r+b') as out:
+            # Drop anything written after the last checkpoint
+            out.truncate(checkpoint['bytes_written'])
+            out.seek(checkpoint['bytes_written'])
+
+            pending = deque()
+            chunks_exhausted = False
+            while pending or not chunks_exhausted:
+                # Keep a bounded number of chunks in flight so memory stays flat
+                while not chunks_exhausted and len(pending) < max(1, 2 * workers):
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        chunks_exhausted = True
+                    elif executor is None:
+                        pending.append((len(chunk), predict_chunk(chunk)))
+                    else:
+                        pending.append((len(chunk), executor.submit(predict_chunk, chunk)))
+                if not pending:
+                    break
+
+                n_rows, result = pending.popleft()
+                text = result if isinstance(result, str) else result.result()
+                out.write(text.encode())
+                out.flush()
+                os.fsync(out.fileno())
+
+                rows_this_run += n_rows
+                checkpoint['chunks_done'] += 1
+                checkpoint['rows_written'] += n_rows
+                checkpoint['bytes_written'] = out.tell()
+                write_checkpoint(output_path, checkpoint)
+
+                if checkpoint['chunks_done'] % report_every == 0:
+                    elapsed = time.perf_counter() - start_time
+                    print(f"{checkpoint['rows_written']:,} rows written "
+                          f"({rows_this_run / elapsed:,.0f} rows/s)")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        'rows_written': checkpoint['rows_written'],
+        'rows_this_run': rows_this_run,
+        'chunks': checkpoint['chunks_done'],
+        'seconds': elapsed,
+        'rows_per_second': rows_this_run / elapsed if elapsed > 0 else 0.0
+    }
+    os.remove(checkpoint_path(output_path))
+    print(f"Done: {stats['rows_written']:,} rows in {elapsed:.1f}s ({stats['rows_per_second']:,.0f} rows/s)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of projects with the trained material forecasting model")
+    parser.add_argument('input', help="input .csv or .parquet with id, project_type, region, power_capacity_mw, area_sqft")
+    parser.add_argument('output', help="output CSV with id, MasterItemNo, QtyShipped")
+    parser.add_argument('--model', default='material_forecasting_model.pkl', help="pickled model or artifact directory")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (0 = score in this process)")
+    parser.add_argument('--resume', action='store_true', help="continue from the checkpoint of an interrupted run")
+    args = parser.parse_args()
+
+    return run_batch_prediction(args.input, args.output, args.model, args.chunk_size, args.workers, args.resume)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import sklearn
+
+from material_forecasting import MaterialForecastingModel
+from model_artifact import ModelArtifact
+from procurement_plan import ProcurementPlan
+from critical_path import IncrementalSchedule, TaskGraph
+from resource_leveling import level_resources
+from project_scheduler import ProjectScheduler
+
+RESULTS_FORMAT_VERSION = 1
+
+# (sizes, repeats) per benchmark group for the quick and full profiles
+PROFILES = {
+    'quick': {
+        'dataset': ([1000, 10000], 5),
+        'dataset_vectorized': ([10000, 100000], 5),
+        'train': ([1000], 2),
+        'predict_single': ([1], 200),
+        'predict_batch': ([1000, 10000], 5),
+        'schedule': ([1], 50),
+        'critical_path': ([10000, 100000], 3),
+        'resource_leveling': ([1000, 5000], 3),
+        'risk': ([10000, 100000], 3),
+        'gantt': ([30], 2),
+        'gantt_large': ([10000], 2),
+        'procurement': ([0, 100], 10)
+    },
+    'full': {
+        'dataset': ([1000, 10000, 50000], 5),
+        'dataset_vectorized': ([10000, 100000, 1000000], 5),
+        'train': ([1000, 2000, 5000], 3),
+        'predict_single': ([1], 1000),
+        'predict_batch': ([1000, 10000, 100000], 10),
+        'schedule': ([1], 200),
+        'critical_path': ([10000, 100000, 1000000], 3),
+        'resource_leveling': ([1000, 5000, 20000], 3),
+        'risk': ([10000, 100000, 1000000], 3),
+        'gantt': ([30, 120, 480], 3),
+        'gantt_large': ([50000], 2),
+        'procurement': ([0, 10, 100, 1000], 20)
+    }
+}
+
+# Trained model and data shared by the prediction benchmarks, built on first use
+_fixtures = {}
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def measure(run, setup=None, repeats=10, warmup=1, items=1):
+    """Time `run(*setup())` and return latency percentiles, throughput and peak memory
+
+    setup() runs outside the timed region on every iteration. Peak memory is
+    the tracemalloc high-water mark of one extra, untimed iteration, so
+    tracing does not distort the latencies.
+    """
+    setup = setup or (lambda: ())
+    for _ in range(warmup):
+        run(*setup())
+
+    samples = []
+    for _ in range(repeats):
+        args = setup()
+        start = time.perf_counter()
+        run(*args)
+        samples.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = np.array(samples)
+    return {
+        'repeats': repeats,
+        'items': items,
+        'p50_ms': percentile_ms(samples, 50),
+        'p99_ms': percentile_ms(samples, 99),
+        'mean_ms': float(samples.mean() * 1000),
+        'min_ms': float(samples.min() * 1000),
+        'throughput_per_s': items / float(np.median(samples)),
+        'peak_memory_mb': peak / 2**20
+    }
+
+
+def quiet(fn):
+    """Wrap fn so its prints do not flood the benchmark output"""
+    def run(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn(*args)
+    return run
+
+
+def trained_model():
+    if 'model' not in _fixtures:
+        model = MaterialForecastingModel()
+        train_data = model.create_synthetic_dataset(n_samples=2000)
+        quiet(lambda df: model.train(df, basket=True))(train_data)
+        _fixtures['model'] = model
+        _fixtures['compiled'] = copy.deepcopy(model)
+        _fixtures['compiled'].compile_inference()
+        _fixtures['artifact'] = ModelArtifact.from_model(model)
+        _fixtures['inputs'] = model.create_synthetic_dataset_vectorized(100000, seed=7)
+    return _fixtures['model']
+
+
+def benchmark_inputs(n_rows):
+    """First n_rows of the shared prediction inputs"""
+    trained_model()
+    return _fixtures['inputs'][:n_rows]
+
+
+def synthetic_schedule(n_tasks):
+    """Data center schedule tiled to n_tasks tasks (each copy runs after the previous one)"""
+    base = ProjectScheduler()
+    base.create_data_center_schedule()
+    span = base.tasks[-1]['end_date'] - base.tasks[0]['start_date'] + timedelta(days=1)
+
+    scheduler = ProjectScheduler()
+    for i in range(n_tasks):
+        task = dict(base.tasks[i % len(base.tasks)])
+        offset = span * (i // len(base.tasks))
+        task.update(id=i, start_date=task['start_date'] + offset, end_date=task['end_date'] + offset)
+        scheduler.tasks.append(task)
+    scheduler.milestones = base.milestones
+    return scheduler
+
+
+def synthetic_task_graph(n_tasks, seed=0):
+    """Random DAG of n_tasks with two dependencies per task on recent tasks, ids shuffled"""
+    rng = np.random.default_rng(seed)
+    dst = np.repeat(np.arange(1, n_tasks), 2)
+    src = np.maximum(dst - rng.integers(1, 50, len(dst)), 0)
+    ids = rng.permutation(n_tasks)
+    return TaskGraph(rng.integers(1, 40, n_tasks), ids[src], ids[dst])
+
+
+def incremental_schedule(n_tasks):
+    """(fresh IncrementalSchedule of synthetic_task_graph(n_tasks), task halfway down its order)"""
+    key = ('critical_path', n_tasks)
+    if key not in _fixtures:
+        _fixtures[key] = synthetic_task_graph(n_tasks).solve()
+    solution = _fixtures[key]
+    return IncrementalSchedule(solution), int(solution.order[n_tasks // 2])
+
+
+def synthetic_resource_demand(n_tasks, n_resources=32, seed=0):
+    """(demand, capacity): every task holds 1-2 units of two of n_resources resources with 2-6 units each"""
+    rng = np.random.default_rng(seed)
+    demand = np.zeros((n_tasks, n_resources), dtype=np.int64)
+    tasks = np.repeat(np.arange(n_tasks), 2)
+    demand[tasks, rng.integers(0, n_resources, len(tasks))] = rng.integers(1, 3, len(tasks))
+    return demand, rng.integers(2, 7, n_resources)
+
+
+def basket_for_projects(n_projects):
+    return trained_model().predict_basket(benchmark_inputs(n_projects))
+
+
+def benchmark_cases(profile):
+    """Yield (name, group, size, repeats, run, setup, items) for every benchmark in the profile"""
+    sizes, repeats = profile['dataset']
+    for n in sizes:
+        yield (f'dataset.create_synthetic_dataset[n={n}]', 'dataset', n, repeats,
+               lambda n=n: MaterialForecastingModel().create_synthetic_dataset(n), None, n)
+
+    sizes, repeats = profile['dataset_vectorized']
+    for n in sizes:
+        yield (f'dataset.create_synthetic_dataset_vectorized[n={n}]', 'dataset_vectorized', n, repeats,
+               lambda n=n: MaterialForecastingModel().create_synthetic_dataset_vectorized(n), None, n)
+
+    sizes, repeats = profile['train']
+    for n in sizes:
+        def setup(n=n):
+            model = MaterialForecastingModel()
+            return model, model.create_synthetic_dataset(n)
+        yield (f'train[n={n}]', 'train', n, repeats, quiet(lambda model, df: model.train(df)), setup, n)
+
+    sizes, repeats = profile['predict_single']
+    for n in sizes:
+        row = lambda: (benchmark_inputs(1),)
+        yield ('predict.single[model]', 'predict_single', n, repeats,
+               lambda df: trained_model().predict(df), row, 1)
+        yield ('predict.single[compiled]', 'predict_single', n, repeats,
+               lambda df: _fixtures['compiled'].predict(df), row, 1)
+        yield ('predict.single[artifact]', 'predict_single', n, repeats,
+               lambda df: _fixtures['artifact'].predict(df), row, 1)
+
+    sizes, repeats = profile['predict_batch']
+    for n in sizes:
+        batch = lambda n=n: (benchmark_inputs(n),)
+        yield (f'predict.batch[n={n}]', 'predict_batch', n, repeats,
+               lambda df: trained_model().predict(df), batch, n)
+        yield (f'predict.basket[n={n}]', 'predict_batch', n, repeats,
+               lambda df: trained_model().predict_basket(df), batch, n)
+
+    sizes, repeats = profile['schedule']
+    for n in sizes:
+        yield ('schedule.create_data_center_schedule', 'schedule', n, repeats,
+               lambda scheduler: scheduler.create_data_center_schedule(), lambda: (ProjectScheduler(),), 1)
+
+    sizes, repeats = profile['critical_path']
+    for n in sizes:
+        yield (f'schedule.critical_path[tasks={n}]', 'critical_path', n, repeats,
+               lambda graph: graph.solve().critical_path(), lambda n=n: (synthetic_task_graph(n),), n)
+        yield (f'schedule.incremental_update[tasks={n}]', 'critical_path', n, repeats,
+               lambda schedule, v: schedule.set_duration(v, schedule.durations[v] + 5),
+               lambda n=n: incremental_schedule(n), 1)
+
+    sizes, repeats = profile['resource_leveling']
+    for n in sizes:
+        yield (f'schedule.level_resources[tasks={n}]', 'resource_leveling', n, repeats,
+               lambda graph, demand, capacity: level_resources(graph, demand, capacity),
+               lambda n=n: (synthetic_task_graph(n),) + synthetic_resource_demand(n), n)
+
+    sizes, repeats = profile['risk']
+    for n in sizes:
+        def setup_risk():
+            scheduler = ProjectScheduler()
+            scheduler.create_data_center_schedule()
+            return (scheduler,)
+        yield (f'schedule.run_risk_analysis[samples={n}]', 'risk', n, repeats,
+               lambda scheduler, n=n: scheduler.run_risk_analysis(n), setup_risk, n)
+
+    sizes, repeats = profile['gantt']
+    for n in sizes:
+        gantt_path = os.path.join(tempfile.gettempdir(), 'benchmark_gantt_chart.png')
+        yield (f'schedule.create_gantt_chart[tasks={n}]', 'gantt', n, repeats,
+               quiet(lambda scheduler, path: scheduler.create_gantt_chart(save_path=path, use_cache=False)),
+               lambda n=n: (synthetic_schedule(n), gantt_path), n)
+
+    sizes, repeats = profile['gantt_large']
+    for n in sizes:
+        for variant, filename, options in (('folded', 'benchmark_gantt_chart.svg', {'use_cache': False}),
+                                           ('unfolded', 'benchmark_gantt_chart.png',
+                                            {'fold': False, 'use_cache': False}),
+                                           ('cached', 'benchmark_gantt_chart.html', {})):
+            gantt_path = os.path.join(tempfile.gettempdir(), filename)
+            yield (f'schedule.create_gantt_chart[tasks={n},{variant}]', 'gantt_large', n, repeats,
+                   quiet(lambda scheduler, path, options=options: scheduler.create_gantt_chart(path, **options)),
+                   lambda n=n, path=gantt_path: (synthetic_schedule(n), path), n)
+
+    sizes, repeats = profile['procurement']
+    for n in sizes:
+        if n == 0:
+            yield ('procurement.create_comprehensive_procurement_plan[default]', 'procurement', n, repeats,
+                   quiet(lambda plan: plan.create_comprehensive_procurement_plan()),
+                   lambda: (ProcurementPlan(),), 1)
+        else:
+            yield (f'procurement.create_comprehensive_procurement_plan[projects={n}]', 'procurement', n, repeats,
+                   quiet(lambda plan, basket: plan.create_comprehensive_procurement_plan(basket)),
+                   lambda n=n: (ProcurementPlan(), basket_for_projects(n)), n)
+
+
+def run_benchmarks(profile_name='quick', name_filter=None):
+    """Run every benchmark case of the profile whose name contains name_filter"""
+    results = {}
+    for name, group, size, repeats, run, setup, items in benchmark_cases(PROFILES[profile_name]):
+        if name_filter and name_filter not in name:
+            continue
+        stats = measure(run, setup, repeats=repeats, items=items)
+        stats.update(group=group, size=size)
+        results[name] = stats
+        print(f"{name:<70} p50 {stats['p50_ms']:10.3f} ms  p99 {stats['p99_ms']:10.3f} ms  "
+              f"{stats['throughput_per_s']:12,.1f}/s  peak {stats['peak_memory_mb']:8.1f} MB")
+    return results
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scikit-learn': sklearn.__version__,
+        'matplotlib': matplotlib.__version__
+    }
+
+
+def compare(results, baseline, threshold=0.10):
+    """Print p50 changes against a baseline results file; return the names that regressed by more than threshold"""
+    regressions = []
+    print(f"\n{'benchmark':<70} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, stats in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<70} {'-':>12} {stats['p50_ms']:10.3f}ms {'new':>8}")
+            continue
+        change = stats['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] > 0 else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<70} {base['p50_ms']:10.3f}ms {stats['p50_ms']:10.3f}ms {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting, scheduling and procurement hot paths")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="results file from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="p50 slowdown vs. the baseline reported as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.profile, args.filter)
+    report = {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'profile': args.profile,
+        'environment': environment_info(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
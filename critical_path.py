@@ -0,0 +1,371 @@
+import heapq
+
+import numpy as np
+
+# Days between a predecessor's finish and its successor's start (a task starts the day after)
+DEFAULT_LAG = 1
+
+
+class CycleError(ValueError):
+    """Dependencies contain a cycle; `cycle` lists the task indices around it"""
+
+    def __init__(self, cycle):
+        super().__init__(f"Dependency cycle through tasks {' -> '.join(map(str, cycle))}")
+        self.cycle = cycle
+
+
+class TaskGraph:
+    """Task durations and finish-to-start dependencies stored as CSR arrays
+
+    Tasks are numbered 0..n-1. pred_ptr/pred_idx list each task's
+    predecessors and succ_ptr/succ_idx its successors, so every pass over
+    the graph is O(V + E) with no per-task Python objects.
+    """
+
+    def __init__(self, durations, src, dst):
+        self.durations = np.asarray(durations, dtype=np.int64)
+        n = len(self.durations)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if len(src) and (src.min() < 0 or src.max() >= n or dst.min() < 0 or dst.max() >= n):
+            bad = src[(src < 0) | (src >= n)].tolist() + dst[(dst < 0) | (dst >= n)].tolist()
+            raise ValueError(f"Unknown task in dependencies: {bad[0]}")
+        self.pred_ptr, self.pred_idx = csr(dst, src, n)
+        self.succ_ptr, self.succ_idx = csr(src, dst, n)
+
+    @classmethod
+    def from_dependencies(cls, durations, dependencies):
+        """Build from one list of predecessor indices per task"""
+        counts = [len(deps) for deps in dependencies]
+        src = [dep for deps in dependencies for dep in deps]
+        dst = np.repeat(np.arange(len(dependencies)), counts)
+        return cls(durations, src, dst)
+
+    def __len__(self):
+        return len(self.durations)
+
+    @property
+    def n_edges(self):
+        return len(self.pred_idx)
+
+    def topological_order(self):
+        """Task indices with every predecessor before its successors (Kahn's algorithm)
+
+        Raises CycleError naming one cycle when the dependencies are not a DAG.
+        """
+        n = len(self)
+        indegree = np.diff(self.pred_ptr).tolist()
+        succ_ptr, succ_idx = self.succ_ptr.tolist(), self.succ_idx.tolist()
+        order = [v for v in range(n) if indegree[v] == 0]
+        append = order.append
+        i = 0
+        while i < len(order):
+            v = order[i]
+            i += 1
+            for s in succ_idx[succ_ptr[v]:succ_ptr[v + 1]]:
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    append(s)
+        if len(order) < n:
+            raise CycleError(self.find_cycle(np.flatnonzero(np.array(indegree) > 0)))
+        return np.array(order, dtype=np.int64)
+
+    def find_cycle(self, remaining):
+        """One cycle among `remaining`, the tasks Kahn's algorithm could not order"""
+        remaining = set(remaining.tolist())
+        pred_ptr, pred_idx = self.pred_ptr, self.pred_idx
+        v, seen = next(iter(remaining)), {}
+        path = []
+        # Every unordered task has an unordered predecessor, so walking back must revisit a task
+        while v not in seen:
+            seen[v] = len(path)
+            path.append(v)
+            v = next(p for p in pred_idx[pred_ptr[v]:pred_ptr[v + 1]].tolist() if p in remaining)
+        cycle = path[seen[v]:][::-1]
+        return cycle + [cycle[0]]
+
+    def solve(self, lag=DEFAULT_LAG, order=None, release=None):
+        """Forward and backward CPM passes; returns a CriticalPath
+
+        release optionally gives each task's earliest allowed start day.
+        """
+        if order is None:
+            order = self.topological_order()
+        return CriticalPath(self, order, lag, release)
+
+
+class CriticalPath:
+    """Early/late start and finish, float and the critical path of a TaskGraph
+
+    Times are integer days from the project start: a task without
+    predecessors starts at 0, any other at its latest predecessor finish plus
+    lag, and finishes duration days after it starts. The project ends at the
+    latest early finish. A release day, where given, holds a task back to
+    start no earlier than it. Total float is how far a task can slip without
+    moving the project end; free float is how far it can slip without moving
+    any successor.
+    """
+
+    def __init__(self, graph, order, lag=DEFAULT_LAG, release=None):
+        self.graph = graph
+        self.order = order
+        self.lag = lag
+        n = len(graph)
+        self.release = np.zeros(n, dtype=np.int64) if release is None else np.maximum(release, 0).astype(np.int64)
+        durations = graph.durations.tolist()
+
+        # Every edge, grouped by predecessor in topological order: one flat loop per pass
+        position = np.empty(n, dtype=np.int64)
+        position[order] = np.arange(n)
+        src = np.repeat(np.arange(n), np.diff(graph.succ_ptr))
+        edges = np.argsort(position[src], kind='stable')
+        edge_src, edge_dst = src[edges].tolist(), graph.succ_idx[edges].tolist()
+
+        # Forward pass: push each finished task's finish to its successors
+        early_start = self.release.tolist()
+        for u, s in zip(edge_src, edge_dst):
+            start = early_start[u] + durations[u] + lag
+            if start > early_start[s]:
+                early_start[s] = start
+        early_finish = [start + duration for start, duration in zip(early_start, durations)]
+        self.project_duration = max(early_finish) if n else 0
+
+        # Backward pass: pull each successor's late start back to its predecessors
+        late_finish = [self.project_duration] * n
+        for u, s in zip(reversed(edge_src), reversed(edge_dst)):
+            finish = late_finish[s] - durations[s] - lag
+            if finish < late_finish[u]:
+                late_finish[u] = finish
+        late_start = [finish - duration for finish, duration in zip(late_finish, durations)]
+
+        self.early_start = np.array(early_start, dtype=np.int64)
+        self.early_finish = np.array(early_finish, dtype=np.int64)
+        self.late_start = np.array(late_start, dtype=np.int64)
+        self.late_finish = np.array(late_finish, dtype=np.int64)
+        self.total_float = self.late_start - self.early_start
+
+        # Free float: earliest successor start minus lag, or the project end for sinks
+        next_start = np.full(n, self.project_duration + lag, dtype=np.int64)
+        if graph.n_edges:
+            np.minimum.at(next_start, src, self.early_start[graph.succ_idx])
+        self.free_float = next_start - lag - self.early_finish
+        self.critical = self.total_float == 0
+
+    def critical_path(self):
+        """Task indices of one critical chain from a project start task to the project end
+
+        Walks back from a critical task finishing at the project end through
+        predecessors that are critical and finish exactly lag days before.
+        """
+        pred_ptr, pred_idx = self.graph.pred_ptr.tolist(), self.graph.pred_idx.tolist()
+        return critical_chain(lambda v: pred_idx[pred_ptr[v]:pred_ptr[v + 1]], self.critical.tolist(),
+                              self.early_start.tolist(), self.early_finish.tolist(), self.lag, self.project_duration)
+
+
+def csr(rows, cols, n):
+    """(indptr, indices) of the sparse n-row matrix with an entry at each (rows[i], cols[i])"""
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def critical_chain(preds, critical, early_start, early_finish, lag, project_duration):
+    """Indices of one critical chain ending at the project end, walking back through tight critical predecessors"""
+    ends = [v for v in range(len(critical)) if critical[v] and early_finish[v] == project_duration]
+    if not ends:
+        return []
+    v = ends[0]
+    path = [v]
+    while v is not None:
+        start = early_start[v]
+        v = next((p for p in preds(v) if critical[p] and early_finish[p] + lag == start), None)
+        if v is not None:
+            path.append(v)
+    return path[::-1]
+
+
+class IncrementalSchedule:
+    """Mutable CPM schedule that re-times only what an edit can affect
+
+    Built from a solved CriticalPath. Each edit (duration, dependency, start
+    pin) pushes the edited task through a heap ordered by topological
+    position, so early dates are recomputed for the downstream subgraph
+    only, and late dates for the upstream one. Only if the project end moves
+    are all late dates recomputed. The topological order is repaired locally
+    when a dependency is added (Pearce-Kelly), which also detects cycles.
+    """
+
+    def __init__(self, solution):
+        graph = solution.graph
+        n = len(graph)
+        self.lag = solution.lag
+        self.durations = graph.durations.tolist()
+        pred_ptr, pred_idx = graph.pred_ptr.tolist(), graph.pred_idx.tolist()
+        succ_ptr, succ_idx = graph.succ_ptr.tolist(), graph.succ_idx.tolist()
+        self.preds = [pred_idx[pred_ptr[v]:pred_ptr[v + 1]] for v in range(n)]
+        self.succs = [succ_idx[succ_ptr[v]:succ_ptr[v + 1]] for v in range(n)]
+        self.position = [0] * n
+        for i, v in enumerate(solution.order.tolist()):
+            self.position[v] = i
+        self.early_start = solution.early_start.tolist()
+        self.early_finish = solution.early_finish.tolist()
+        self.late_start = solution.late_start.tolist()
+        self.late_finish = solution.late_finish.tolist()
+        self.project_duration = solution.project_duration
+        # Task index -> earliest allowed start day, for tasks with a release day
+        self.pins = {v: day for v, day in enumerate(solution.release.tolist()) if day > 0}
+
+    def __len__(self):
+        return len(self.durations)
+
+    def total_float(self, v):
+        return self.late_start[v] - self.early_start[v]
+
+    def free_float(self, v):
+        next_start = min((self.early_start[s] for s in self.succs[v]), default=self.project_duration + self.lag)
+        return next_start - self.lag - self.early_finish[v]
+
+    def is_critical(self, v):
+        return self.late_start[v] == self.early_start[v]
+
+    def critical_path(self):
+        critical = [ls == es for ls, es in zip(self.late_start, self.early_start)]
+        return critical_chain(self.preds.__getitem__, critical, self.early_start, self.early_finish,
+                              self.lag, self.project_duration)
+
+    def set_duration(self, v, duration):
+        """Change a task's duration; returns (tasks whose dates moved, tasks whose late dates moved)"""
+        if duration < 0:
+            raise ValueError("Duration must not be negative")
+        self.durations[v] = int(duration)
+        return self._propagate({v}, {v})
+
+    def pin_start(self, v, day=None):
+        """Keep a task from starting before `day` (days from the project start); None removes the pin"""
+        if day is None or day <= 0:
+            self.pins.pop(v, None)
+        else:
+            self.pins[v] = int(day)
+        return self._propagate({v}, set())
+
+    def add_dependency(self, v, pred):
+        """Make task v start after task pred finishes; raises CycleError if pred depends on v"""
+        if pred == v:
+            raise CycleError([v, v])
+        if pred in self.preds[v]:
+            return set(), set()
+        self._reorder(pred, v)
+        self.preds[v].append(pred)
+        self.succs[pred].append(v)
+        return self._propagate({v}, {pred})
+
+    def remove_dependency(self, v, pred):
+        if pred not in self.preds[v]:
+            raise ValueError(f"Task {v} does not depend on task {pred}")
+        self.preds[v].remove(pred)
+        self.succs[pred].remove(v)
+        return self._propagate({v}, {pred})
+
+    def _propagate(self, forward_seeds, backward_seeds):
+        moved = self._forward(forward_seeds)
+        project_duration = max(self.early_finish) if self.early_finish else 0
+        if project_duration != self.project_duration:
+            self.project_duration = project_duration
+            return moved, self._backward_all()
+        return moved, self._backward(backward_seeds)
+
+    def _forward(self, seeds):
+        position, preds, succs = self.position, self.preds, self.succs
+        early_start, early_finish, durations, lag = self.early_start, self.early_finish, self.durations, self.lag
+        heap = [(position[v], v) for v in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        moved = set()
+        while heap:
+            _, v = heapq.heappop(heap)
+            queued.discard(v)
+            start = self.pins.get(v, 0)
+            for p in preds[v]:
+                if early_finish[p] + lag > start:
+                    start = early_finish[p] + lag
+            finish = start + durations[v]
+            if start == early_start[v] and finish == early_finish[v]:
+                continue
+            early_start[v], early_finish[v] = start, finish
+            moved.add(v)
+            for s in succs[v]:
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(heap, (position[s], s))
+        return moved
+
+    def _late_finish(self, v):
+        return min((self.late_start[s] - self.lag for s in self.succs[v]), default=self.project_duration)
+
+    def _backward(self, seeds):
+        position, preds = self.position, self.preds
+        heap = [(-position[v], v) for v in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        moved = set()
+        while heap:
+            _, v = heapq.heappop(heap)
+            queued.discard(v)
+            finish = self._late_finish(v)
+            start = finish - self.durations[v]
+            if finish == self.late_finish[v] and start == self.late_start[v]:
+                continue
+            self.late_finish[v], self.late_start[v] = finish, start
+            moved.add(v)
+            for p in preds[v]:
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, (-position[p], p))
+        return moved
+
+    def _backward_all(self):
+        moved = set()
+        for v in sorted(range(len(self)), key=self.position.__getitem__, reverse=True):
+            finish = self._late_finish(v)
+            start = finish - self.durations[v]
+            if finish != self.late_finish[v] or start != self.late_start[v]:
+                self.late_finish[v], self.late_start[v] = finish, start
+                moved.add(v)
+        return moved
+
+    def _reorder(self, pred, v):
+        """Repair the topological order for a new edge pred -> v (Pearce-Kelly)"""
+        position = self.position
+        lower, upper = position[v], position[pred]
+        if lower > upper:
+            return
+        # Tasks reachable from v that sit at or before pred; reaching pred means a cycle
+        parent = {v: None}
+        stack = [v]
+        while stack:
+            w = stack.pop()
+            for s in self.succs[w]:
+                if s == pred:
+                    cycle = [pred, w]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    cycle = cycle[:1] + cycle[1:][::-1]
+                    raise CycleError(cycle + [pred])
+                if s not in parent and position[s] <= upper:
+                    parent[s] = w
+                    stack.append(s)
+        forward = parent.keys()
+        # Tasks pred depends on that sit at or after v
+        backward = {pred}
+        stack = [pred]
+        while stack:
+            w = stack.pop()
+            for p in self.preds[w]:
+                if p not in backward and position[p] >= lower:
+                    backward.add(p)
+                    stack.append(p)
+        # Reuse the same slots: everything pred depends on first, then everything after v
+        moved = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+        for w, slot in zip(moved, sorted(position[w] for w in moved)):
+            position[w] = slot
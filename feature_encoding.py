@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+ENCODED_SUFFIX = '_encoded'
+
+# Below this many rows categories are looked up one by one in a dict
+SMALL_BATCH_ROWS = 64
+
+
+class FeatureEncoder:
+    """Precompiled encoder from raw project rows to the model's feature matrix
+
+    Categorical columns (feature names ending in `_encoded`) are mapped to
+    their LabelEncoder codes with a hash lookup, numeric columns are read as
+    float64, and every column is written straight into one preallocated
+    matrix. With scaler parameters the scaling is fused in, using the same
+    operations as StandardScaler.transform so results match it bit for bit.
+
+    Categories are matched as strings, like the artifact manifest stores them.
+    Unknown categories raise ValueError with handle_unknown='error', or are
+    mapped to `fallback[column]` (default: the first category) with
+    handle_unknown='fallback'.
+    """
+
+    def __init__(self, feature_columns, categories, scaler_mean=None, scaler_scale=None,
+                 handle_unknown='error', fallback=None):
+        if handle_unknown not in ('error', 'fallback'):
+            raise ValueError("handle_unknown must be 'error' or 'fallback'")
+        self.feature_columns = list(feature_columns)
+        self.categories = {col: [str(v) for v in values] for col, values in categories.items()}
+        self.scaler_mean = None if scaler_mean is None else np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = None if scaler_scale is None else np.asarray(scaler_scale, dtype=np.float64)
+        self.handle_unknown = handle_unknown
+
+        # (source column, is categorical) per feature, in matrix order
+        self._columns = []
+        self._codes = {}
+        self._indexes = {}
+        self._fallback_codes = {}
+        for name in self.feature_columns:
+            if name.endswith(ENCODED_SUFFIX):
+                col = name[:-len(ENCODED_SUFFIX)]
+                values = self.categories[col]
+                self._codes[col] = {value: code for code, value in enumerate(values)}
+                self._indexes[col] = pd.Index(values)
+                fallback_value = str((fallback or {}).get(col, values[0] if values else ''))
+                if fallback_value not in self._codes[col]:
+                    raise ValueError(f"Fallback {fallback_value!r} is not a known {col}")
+                self._fallback_codes[col] = self._codes[col][fallback_value]
+                self._columns.append((col, True))
+            else:
+                self._columns.append((name, False))
+
+    @classmethod
+    def from_label_encoders(cls, feature_columns, label_encoders, scaler=None, **kwargs):
+        """Build from fitted sklearn LabelEncoders and (optionally) a fitted StandardScaler"""
+        categories = {col: list(enc.classes_) for col, enc in label_encoders.items()}
+        if scaler is None or not hasattr(scaler, 'mean_'):
+            return cls(feature_columns, categories, **kwargs)
+        return cls(feature_columns, categories, scaler.mean_, scaler.scale_, **kwargs)
+
+    def _unknown(self, col, value):
+        raise ValueError(f"Unknown {col} {value!r}; expected one of {self.categories[col]}")
+
+    def _encode_scalar(self, col, value):
+        code = self._codes[col].get(str(value))
+        if code is None:
+            if self.handle_unknown == 'error':
+                self._unknown(col, value)
+            code = self._fallback_codes[col]
+        return code
+
+    def _encode_array(self, col, values):
+        if len(values) <= SMALL_BATCH_ROWS:
+            # Hashing a handful of values beats building the vectorized lookup
+            return np.array([self._encode_scalar(col, v) for v in values], dtype=np.intp)
+        values = np.asarray(values)
+        if values.dtype.kind not in 'OU':
+            values = values.astype(str)
+        codes = self._indexes[col].get_indexer(values)
+        unknown = codes < 0
+        if unknown.any():
+            if self.handle_unknown == 'error':
+                self._unknown(col, values[unknown][0])
+            codes[unknown] = self._fallback_codes[col]
+        return codes
+
+    def encode(self, data, scale=True, dtype=np.float32, out=None):
+        """Encode rows into a (n_rows, n_features) matrix
+
+        `data` is a DataFrame, a dict of columns, a list of row dicts, or one
+        row as a dict of scalars (the fast path for single predictions). With
+        scale=True the fitted scaler parameters are applied.
+        """
+        if isinstance(data, list):
+            data = pd.DataFrame(data)
+        single_row = isinstance(data, dict) and not any(np.ndim(v) for v in data.values())
+        n_rows = 1 if single_row else len(data[self._columns[0][0]])
+
+        if out is None:
+            out = np.empty((n_rows, len(self._columns)), dtype=dtype)
+        apply_scaler = scale and self.scaler_mean is not None
+
+        for j, (col, categorical) in enumerate(self._columns):
+            if single_row:
+                value = self._encode_scalar(col, data[col]) if categorical else data[col]
+                column = np.float64(value)
+            elif categorical:
+                column = self._encode_array(col, data[col]).astype(np.float64)
+            else:
+                column = np.asarray(data[col], dtype=np.float64)
+            if apply_scaler:
+                column = (column - self.scaler_mean[j]) / self.scaler_scale[j]
+            out[:, j] = column
+        return out
+
+    def transform(self, data):
+        """Scaled float32 feature matrix, ready for the forests"""
+        return self.encode(data, scale=True, dtype=np.float32)
+
+    def raw(self, data):
+        """Unscaled float64 features (categorical codes and raw numbers), e.g. for fitting the scaler"""
+        return self.encode(data, scale=False, dtype=np.float64)
@@ -0,0 +1,290 @@
+import numpy as np
+
+TREE_LEAF = -1
+
+def float32_thresholds(threshold):
+    """Round float64 split thresholds down to float32 without changing any decision
+
+    sklearn compares float32 inputs against float64 thresholds. For a float32 x,
+    x <= t holds exactly when x <= t rounded down to float32, so the comparison
+    can run in float32 with identical results.
+    """
+    threshold32 = threshold.astype(np.float32)
+    rounded_up = threshold32.astype(np.float64) > threshold
+    threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+    return threshold32
+
+class UnsupportedModelError(TypeError):
+    """The model has no fitted random forests to compile, e.g. SGD models from train_incremental"""
+
+class FlatForest:
+    """Decision trees packed into contiguous node tables for vectorized traversal
+
+    Every node of every tree lives in one set of arrays (feature, threshold,
+    interleaved left/right children) addressed by global node ids, so all trees
+    are walked together with a handful of array gathers per depth level. Leaves
+    point back to themselves.
+    """
+
+    def __init__(self, feature, threshold32, children, is_leaf, roots, max_depth):
+        # Arrays are used as given (no copies) so they can be memory-mapped from disk
+        self.feature = feature
+        self.threshold32 = threshold32
+        self.children = children  # children[2 * node + go_right] gives the next node in one gather
+        self.is_leaf = is_leaf
+        self.roots = roots
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_trees(cls, trees):
+        """Pack fitted sklearn `Tree` objects (estimator.tree_) into one table"""
+        features, thresholds, lefts, rights, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count)
+            leaf = tree.children_left == TREE_LEAF
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, node_ids, tree.children_right) + offset)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        children_left = np.concatenate(lefts).astype(np.intp)
+        children = np.stack([children_left, np.concatenate(rights)], axis=1).astype(np.intp).ravel()
+        is_leaf = children_left == np.arange(len(children_left))
+        return cls(np.concatenate(features).astype(np.intp), float32_thresholds(np.concatenate(thresholds)),
+                   children, is_leaf, np.array(roots, dtype=np.intp), max_depth)
+
+    def to_arrays(self):
+        """Node tables by name, for serialization"""
+        return {'feature': self.feature, 'threshold32': self.threshold32, 'children': self.children,
+                'is_leaf': self.is_leaf, 'roots': self.roots}
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def apply(self, X, trees=slice(None)):
+        """Return the global leaf id reached by every sample in the selected trees, shape (n_trees, n_samples)
+
+        X must be C-contiguous float32, the dtype sklearn casts to before
+        predicting. Paths drop out of the working set as soon as they reach a
+        leaf, so deep branches only cost work for the samples that follow them.
+        """
+        n_samples, n_features = X.shape
+        x_flat = X.ravel()
+        roots = self.roots[trees]
+        nodes = np.repeat(roots, n_samples)
+        row_offset = np.tile(np.arange(n_samples, dtype=np.intp) * n_features, len(roots))
+        position = np.arange(nodes.size)
+        leaves = nodes.copy()
+        while nodes.size:
+            go_right = x_flat.take(row_offset + self.feature.take(nodes)) > self.threshold32.take(nodes)
+            nodes = self.children.take(2 * nodes + go_right)
+            done = self.is_leaf.take(nodes)
+            if done.any():
+                leaves[position[done]] = nodes[done]
+                keep = ~done
+                nodes, row_offset, position = nodes[keep], row_offset[keep], position[keep]
+        return leaves.reshape(len(roots), n_samples)
+
+
+class ForestInferenceEngine:
+    """Array-backed replacement for RandomForestClassifier/Regressor.predict
+
+    The classifier and regressor trees (and, when present, the per-item
+    quantity regressor used for bill-of-materials predictions) are flattened
+    once into a single FlatForest, so one traversal serves both outputs. Leaf
+    values are accumulated tree by tree in the same order and dtype as sklearn,
+    which makes the results bit-identical to the fitted forests.
+    """
+
+    def __init__(self, forest, n_class_trees, class_values, reg_values, classes, n_features,
+                 block_size=8192, item_values=None):
+        self.forest = forest
+        self.n_class_trees = n_class_trees
+        self.class_values = class_values
+        self.reg_values = reg_values
+        self.item_values = item_values
+        self.classes = classes
+        self.n_features = n_features
+        self.block_size = block_size
+
+        # Node id ranges: classifier, regressor, then item regressor
+        self.reg_offset = class_values.shape[0]
+        self.item_offset = self.reg_offset + reg_values.shape[0]
+        n_item_trees = 0 if item_values is None else int(np.count_nonzero(forest.roots >= self.item_offset))
+        self.class_trees = slice(0, n_class_trees)
+        self.reg_trees = slice(n_class_trees, forest.n_trees - n_item_trees)
+        self.item_trees = slice(forest.n_trees - n_item_trees, forest.n_trees)
+
+    @classmethod
+    def from_estimators(cls, classifier, regressor, item_regressor=None, block_size=8192):
+        """Compile a fitted RandomForestClassifier and RandomForestRegressor
+
+        item_regressor, if given, is a RandomForestRegressor fitted on the
+        features plus the MasterItemNo column (see predict_basket).
+        """
+        forests = [classifier, regressor] + ([item_regressor] if item_regressor is not None else [])
+        if not all(hasattr(f, 'estimators_') for f in forests):
+            raise UnsupportedModelError("ForestInferenceEngine needs fitted random forest estimators")
+        if any(f.n_outputs_ != 1 for f in forests):
+            raise ValueError("Only single-output forests are supported")
+
+        class_trees = [est.tree_ for est in classifier.estimators_]
+        reg_trees = [est.tree_ for est in regressor.estimators_]
+        item_trees = [est.tree_ for est in item_regressor.estimators_] if item_regressor is not None else []
+        forest = FlatForest.from_trees(class_trees + reg_trees + item_trees)
+
+        # Per-node class probabilities, normalized exactly like DecisionTreeClassifier.predict_proba
+        class_values = np.concatenate([tree.value[:, 0, :classifier.n_classes_] for tree in class_trees])
+        normalizer = class_values.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        class_values = class_values / normalizer
+
+        reg_values = np.concatenate([tree.value[:, 0, 0] for tree in reg_trees])
+        item_values = np.concatenate([tree.value[:, 0, 0] for tree in item_trees]) if item_trees else None
+
+        return cls(forest, len(class_trees), np.ascontiguousarray(class_values), reg_values,
+                   np.asarray(classifier.classes_), classifier.n_features_in_, block_size, item_values)
+
+    def to_arrays(self):
+        """All arrays needed to rebuild the engine, by name"""
+        arrays = self.forest.to_arrays()
+        arrays.update({'class_values': self.class_values, 'reg_values': self.reg_values, 'classes': self.classes})
+        if self.item_values is not None:
+            arrays['item_values'] = self.item_values
+        return arrays
+
+    def metadata(self):
+        """Scalar settings needed next to to_arrays() to rebuild the engine"""
+        return {'n_class_trees': self.n_class_trees, 'n_features': self.n_features,
+                'max_depth': self.forest.max_depth, 'block_size': self.block_size}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Rebuild an engine from to_arrays()/metadata() output without copying the arrays"""
+        forest = FlatForest(arrays['feature'], arrays['threshold32'], arrays['children'],
+                            arrays['is_leaf'], arrays['roots'], metadata['max_depth'])
+        return cls(forest, metadata['n_class_trees'], arrays['class_values'], arrays['reg_values'],
+                   arrays['classes'], metadata['n_features'], metadata.get('block_size', 8192),
+                   arrays.get('item_values'))
+
+    @classmethod
+    def from_model(cls, model, block_size=8192):
+        """Compile from a MaterialForecastingModel or its pickled model_data dict"""
+        if (model if isinstance(model, dict) else vars(model)).get('sgd_classifier') is not None:
+            raise UnsupportedModelError("Model was trained with train_incremental: its SGD models only run in "
+                                        "MaterialForecastingModel.predict and cannot be served; retrain with train()")
+        if isinstance(model, dict):
+            classifier, regressor, item_regressor = model['classifier'], model['regressor'], model.get('item_regressor')
+        else:
+            classifier, regressor, item_regressor = model.classifier, model.regressor, getattr(model, 'item_regressor', None)
+        if item_regressor is not None and not hasattr(item_regressor, 'estimators_'):
+            item_regressor = None
+        return cls.from_estimators(classifier, regressor, item_regressor, block_size)
+
+    @property
+    def supports_basket(self):
+        return self.item_values is not None
+
+    def _prepare(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def _accumulate(self, values, leaves, offset, out):
+        # Tree by tree (not np.sum) to keep sklearn's summation order
+        for t in range(len(leaves)):
+            out += values[leaves[t] - offset]
+        out /= len(leaves)
+        return out
+
+    def _evaluate_block(self, X, want_proba=True, want_qty=True):
+        if want_proba and want_qty:
+            leaves = self.forest.apply(X, slice(self.class_trees.start, self.reg_trees.stop))
+            class_leaves, reg_leaves = leaves[:self.n_class_trees], leaves[self.n_class_trees:]
+        elif want_proba:
+            class_leaves = self.forest.apply(X, self.class_trees)
+        else:
+            reg_leaves = self.forest.apply(X, self.reg_trees)
+
+        proba = qty = None
+        if want_proba:
+            proba = self._accumulate(self.class_values, class_leaves, 0,
+                                     np.zeros((X.shape[0], self.class_values.shape[1]), dtype=np.float64))
+        if want_qty:
+            qty = self._accumulate(self.reg_values, reg_leaves, self.reg_offset,
+                                   np.zeros(X.shape[0], dtype=np.float64))
+        return proba, qty
+
+    def _basket_block(self, X):
+        n_samples, n_items = X.shape[0], len(self.classes)
+        proba = self._accumulate(self.class_values, self.forest.apply(X, self.class_trees), 0,
+                                 np.zeros((n_samples, n_items), dtype=np.float64))
+
+        # Every project paired with every item: rows (p0, item0), (p0, item1), ...
+        X_items = np.empty((n_samples * n_items, X.shape[1] + 1), dtype=np.float32)
+        X_items[:, :-1] = np.repeat(X, n_items, axis=0)
+        X_items[:, -1] = np.tile(self.classes, n_samples)
+        qty = self._accumulate(self.item_values, self.forest.apply(X_items, self.item_trees), self.item_offset,
+                               np.zeros(n_samples * n_items, dtype=np.float64))
+        return proba, qty.reshape(n_samples, n_items)
+
+    def _evaluate(self, X, want_proba=True, want_qty=True):
+        X = self._prepare(X)
+        if X.shape[0] <= self.block_size:
+            return self._evaluate_block(X, want_proba, want_qty)
+
+        probas, qtys = [], []
+        for start in range(0, X.shape[0], self.block_size):
+            proba, qty = self._evaluate_block(X[start:start + self.block_size], want_proba, want_qty)
+            probas.append(proba)
+            qtys.append(qty)
+        return (np.concatenate(probas) if want_proba else None,
+                np.concatenate(qtys) if want_qty else None)
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to classifier.predict_proba"""
+        return self._evaluate(X, want_qty=False)[0]
+
+    def predict_class(self, X):
+        """MasterItemNo predictions, identical to classifier.predict"""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def predict_quantity(self, X):
+        """Raw QtyShipped predictions, identical to regressor.predict"""
+        return self._evaluate(X, want_proba=False)[1]
+
+    def predict(self, X):
+        """Both outputs from a single traversal: (MasterItemNo, raw QtyShipped)"""
+        proba, qty = self._evaluate(X)
+        return self.classes.take(np.argmax(proba, axis=1), axis=0), qty
+
+    def predict_with_proba(self, X):
+        """predict() plus the class probabilities it was derived from: (MasterItemNo, raw QtyShipped, proba)"""
+        proba, qty = self._evaluate(X)
+        return self.classes.take(np.argmax(proba, axis=1), axis=0), qty, proba
+
+    def predict_basket(self, X):
+        """Per-item probability and raw quantity for every project, each of shape (n_samples, n_items)
+
+        Column j corresponds to self.classes[j]. Identical to
+        classifier.predict_proba and item_regressor.predict on the expanded rows.
+        """
+        if not self.supports_basket:
+            raise ValueError("This engine was compiled without an item quantity regressor")
+        X = self._prepare(X)
+        block = max(1, self.block_size // len(self.classes))
+        results = [self._basket_block(X[start:start + block]) for start in range(0, max(X.shape[0], 1), block)]
+        return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
@@ -0,0 +1,241 @@
+import hashlib
+import html
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediction_cache import PredictionCache
+
+# Change whenever the drawing changes, so cached charts are dropped
+RENDERER_VERSION = 'gantt-v1'
+FORMATS = ('png', 'svg', 'html')
+
+PHASE_COLORS = {
+    'Project Initiation & Planning': '#FF6B6B',
+    'Procurement & Contracting': '#4ECDC4',
+    'Site Preparation': '#45B7D1',
+    'Foundation & Structure': '#96CEB4',
+    'Building Envelope': '#FECA57',
+    'MEP Installation': '#FF9FF3',
+    'Interior & Finishes': '#54A0FF',
+    'Testing & Commissioning': '#5F27CD'
+}
+DEFAULT_COLOR = '#95A5A6'
+
+# fold='auto' shows one row per phase once a chart would have more task rows than this
+FOLD_ABOVE = 200
+# Bar labels drawn at most, longest bars first
+MAX_LABELS = 300
+# Bar collections with more rows than this are embedded as an image in SVG/HTML output
+RASTERIZE_ABOVE = 5000
+DEFAULT_TIME_BUDGET = 10.0
+LABEL_FONT_SIZE = 8
+MAX_FIGURE_PIXELS = 6000
+
+_render_cache = PredictionCache(
+    max_entries=int(os.environ.get('GANTT_CACHE_SIZE', 32)),
+    ttl_seconds=float('inf')
+)
+
+
+def schedule_digest(tasks, milestones, options):
+    """SHA-256 of everything a chart is drawn from: task names, phases and dates, milestones and options"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([RENDERER_VERSION, options,
+                              [(m['name'], pd.Timestamp(m['date']).isoformat()) for m in milestones]],
+                             sort_keys=True, default=str).encode())
+    digest.update('\x1f'.join(task['name'] for task in tasks).encode())
+    digest.update('\x1f'.join(task['phase'] for task in tasks).encode())
+    for field in ('start_date', 'end_date'):
+        digest.update(np.array([task[field] for task in tasks], dtype='datetime64[s]').tobytes())
+    return digest.hexdigest()
+
+
+def gantt_rows(tasks, fold=False, expand=()):
+    """Rows of the chart as a DataFrame (label, phase, start, end, kind, tasks)
+
+    With fold, each phase becomes one summary row spanning its tasks; phases
+    listed in expand are drilled into, their tasks following the summary row.
+    Without it every task is a row, labelled by its phase.
+    """
+    frame = pd.DataFrame({
+        'label': [task['name'] for task in tasks],
+        'phase': [task['phase'] for task in tasks],
+        'start': pd.to_datetime([task['start_date'] for task in tasks]),
+        'end': pd.to_datetime([task['end_date'] for task in tasks])
+    })
+    frame['kind'] = 'task'
+    frame['tasks'] = 1
+    if not fold:
+        return frame
+
+    phases = frame.groupby('phase', sort=False).agg(start=('start', 'min'), end=('end', 'max'),
+                                                    tasks=('label', 'size')).reset_index()
+    phases['label'] = phases['phase'] + ' (' + phases['tasks'].astype(str) + ' tasks)'
+    phases['kind'] = 'phase'
+    parts = []
+    for phase in phases.itertuples(index=False):
+        parts.append(pd.DataFrame([phase._asdict()]))
+        if phase.phase in expand:
+            parts.append(frame[frame['phase'] == phase.phase])
+    return pd.concat(parts, ignore_index=True)[frame.columns]
+
+
+def draw_gantt(rows, milestones, title, deadline, max_labels=MAX_LABELS, rasterize=False):
+    """Matplotlib figure of the rows: one PolyCollection for every bar, labels only where they fit"""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    from matplotlib.collections import PolyCollection
+
+    n = len(rows)
+    fig, ax = plt.subplots(1, 1, figsize=(16, min(max(0.3 * n + 3, 12), 60)))
+
+    # One quadrilateral per row in axis units (x in matplotlib date numbers)
+    x0 = mdates.date2num(rows['start'].to_numpy())
+    x1 = mdates.date2num(rows['end'].to_numpy())
+    y = np.arange(n, dtype=np.float64)
+    verts = np.empty((n, 4, 2))
+    verts[:, :, 0] = np.stack([x0, x0, x1, x1], axis=1)
+    verts[:, :, 1] = np.stack([y - 0.4, y + 0.4, y + 0.4, y - 0.4], axis=1)
+    colors = matplotlib.colors.to_rgba_array([PHASE_COLORS.get(phase, DEFAULT_COLOR) for phase in rows['phase']])
+    colors[:, 3] = np.where(rows['kind'].to_numpy() == 'phase', 0.55, 0.8)
+    bars = PolyCollection(verts, facecolors=colors, edgecolors='black', linewidths=0.5 if n <= 500 else 0)
+    bars.set_rasterized(rasterize)
+    ax.add_collection(bars)
+    pad = max((x1.max() - x0.min()) * 0.01, 1) if n else 1
+    ax.set_xlim((x0.min() - pad, x1.max() + pad) if n else (0, 1))
+    ax.set_ylim(n - 0.5, -0.5)
+
+    # Pixel sizes decide which labels can be read at all
+    fig.canvas.draw_idle()
+    bbox = ax.get_window_extent()
+    row_px = bbox.height / max(n, 1)
+    px_per_day = bbox.width / (ax.get_xlim()[1] - ax.get_xlim()[0])
+    font_px = LABEL_FONT_SIZE * fig.dpi / 72
+    labels = rows['label'].tolist()
+    labelled = 0
+    if n and row_px >= font_px:
+        ax.set_yticks(y)
+        ax.set_yticklabels([label if kind == 'phase' else (f"{phase[:15]}..." if len(phase) > 15 else phase)
+                            for label, phase, kind in zip(labels, rows['phase'], rows['kind'])])
+        # Each row holds one bar, so a label only has to fit its row; it goes beside a bar too short for it
+        fits = (x1 - x0) * px_per_day >= np.array([len(label) for label in labels]) * font_px * 0.6
+        for i in np.argsort(x0 - x1, kind='stable')[:max_labels]:
+            if labelled % 64 == 0 and time.perf_counter() > deadline:
+                break
+            if fits[i]:
+                ax.text((x0[i] + x1[i]) / 2, i, labels[i], ha='center', va='center', fontsize=LABEL_FONT_SIZE,
+                        fontweight='bold')
+            else:
+                ax.text(x1[i] + 2 / px_per_day, i, labels[i], ha='left', va='center', fontsize=LABEL_FONT_SIZE,
+                        fontweight='bold')
+            labelled += 1
+    else:
+        ax.set_yticks([])
+
+    # Milestone labels closer than a line of text to the previous one are left off
+    last_x = -np.inf
+    for milestone in sorted(milestones, key=lambda m: m['date']):
+        x = mdates.date2num(milestone['date'])
+        ax.axvline(x=x, color='red', linestyle='--', alpha=0.7)
+        if (x - last_x) * px_per_day >= 1.5 * font_px:
+            ax.text(x, n - 0.5, milestone['name'], rotation=45, ha='right', va='bottom', fontsize=9,
+                    color='red', fontweight='bold')
+            last_x = x
+
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=24))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    ax.grid(True, alpha=0.3)
+    ax.set_xlabel('Timeline', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Project Tasks' if (rows['kind'] == 'task').all() else 'Phases / Tasks',
+                  fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+
+    phases = list(dict.fromkeys(rows['phase']))
+    legend_elements = [plt.Rectangle((0, 0), 1, 1, facecolor=PHASE_COLORS.get(phase, DEFAULT_COLOR), alpha=0.8)
+                       for phase in phases]
+    ax.legend(legend_elements, phases, loc='upper left', bbox_to_anchor=(1.05, 1))
+    fig.tight_layout()
+    return fig, labelled
+
+
+def html_page(title, svg, tasks):
+    """Standalone HTML page: the chart as inline SVG, then a collapsible task table per phase"""
+    phases = {}
+    for task in tasks:
+        phases.setdefault(task['phase'], []).append(task)
+    sections = []
+    for phase, phase_tasks in phases.items():
+        start = min(task['start_date'] for task in phase_tasks)
+        end = max(task['end_date'] for task in phase_tasks)
+        rows = ''.join(f"<tr><td>{html.escape(str(task['name']))}</td><td>{task['start_date']:%Y-%m-%d}</td>"
+                       f"<td>{task['end_date']:%Y-%m-%d}</td></tr>" for task in phase_tasks)
+        sections.append(f"<details><summary>{html.escape(phase)}: {len(phase_tasks)} tasks, "
+                        f"{start:%Y-%m-%d} to {end:%Y-%m-%d}</summary><table><tr><th>Task</th><th>Start</th>"
+                        f"<th>End</th></tr>{rows}</table></details>")
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>body{{font-family:sans-serif}} svg{{max-width:100%;height:auto}} "
+            f"td,th{{padding:2px 8px;text-align:left}}</style></head>\n<body><h1>{html.escape(title)}</h1>\n"
+            f"{svg}\n{''.join(sections)}\n</body></html>\n")
+
+
+def render_gantt(tasks, milestones, save_path, title, fold='auto', expand=(), time_budget=DEFAULT_TIME_BUDGET,
+                 max_labels=MAX_LABELS, use_cache=True):
+    """Render a Gantt chart of tasks to save_path (.png, .svg or .html)
+
+    fold='auto' folds tasks into phase rows past FOLD_ABOVE tasks; expand
+    names phases to drill into. Within time_budget seconds labels are culled
+    as the deadline nears and big bar sets are rasterized in vector output.
+    Charts are cached by schedule_digest, so rendering an unchanged schedule
+    again only writes the cached bytes. Returns a summary of the render.
+    """
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fmt = os.path.splitext(save_path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported Gantt chart format: {fmt or save_path}; expected one of {', '.join(FORMATS)}")
+    if fold == 'auto':
+        fold = len(tasks) > FOLD_ABOVE
+    expand = sorted(expand)
+    options = {'title': title, 'format': fmt, 'fold': bool(fold), 'expand': expand, 'max_labels': max_labels}
+    digest = schedule_digest(tasks, milestones, options)
+
+    data = _render_cache.get(digest, RENDERER_VERSION) if use_cache else None
+    cached = data is not None
+    rows, labelled = None, None
+    if not cached:
+        rows = gantt_rows(tasks, fold, expand)
+        rasterize = fmt != 'png' and len(rows) > RASTERIZE_ABOVE
+        fig, labelled = draw_gantt(rows, milestones, title, start + time_budget / 2, max_labels, rasterize)
+        height_px = fig.get_figheight() * 300
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png' if fmt == 'png' else 'svg', bbox_inches='tight',
+                    dpi=300 if height_px <= MAX_FIGURE_PIXELS else 300 * MAX_FIGURE_PIXELS / height_px)
+        plt.close(fig)
+        data = buffer.getvalue()
+        if fmt == 'html':
+            svg = data.decode('utf-8')
+            data = html_page(title, svg[svg.index('<svg'):], tasks).encode('utf-8')
+        if use_cache:
+            _render_cache.put(digest, data, RENDERER_VERSION)
+
+    with open(save_path, 'wb') as f:
+        f.write(data)
+    seconds = time.perf_counter() - start
+    return {
+        'path': save_path,
+        'format': fmt,
+        'digest': digest,
+        'cached': cached,
+        'rows': None if rows is None else len(rows),
+        'labels': labelled,
+        'seconds': seconds,
+        'over_budget': seconds > time_budget
+    }
@@ -0,0 +1,388 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class RecordedRequest:
+    """One request to replay: method, path (with query string), body bytes and extra headers"""
+
+    def __init__(self, method, path, body=b'', headers=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def endpoint(self):
+        return self.path.split('?', 1)[0]
+
+    @classmethod
+    def from_record(cls, record):
+        """Build from a log record: {"endpoint", "body"?, "method"?, "headers"?}
+
+        A body that is not a string is sent as JSON; the method defaults to
+        POST when there is a body and GET otherwise.
+        """
+        body = record.get('body')
+        headers = dict(record.get('headers', {}))
+        if body is None:
+            data = b''
+        elif isinstance(body, str):
+            data = body.encode()
+        else:
+            data = json.dumps(body).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        method = record.get('method', 'POST' if body is not None else 'GET').upper()
+        path = record['endpoint']
+        if not path.startswith('/'):
+            path = '/' + path
+        return cls(method, path, data, headers)
+
+
+def load_requests(path):
+    """Requests from a JSONL log; lines without an endpoint are skipped"""
+    requests, skipped = [], 0
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or 'endpoint' not in record:
+                skipped += 1
+                continue
+            requests.append(RecordedRequest.from_record(record))
+    if skipped:
+        print(f"Skipped {skipped} line(s) of {path} without an endpoint")
+    return requests
+
+
+def synthesize_requests(n_requests, seed=42, batch_fraction=0.0, batch_size=100):
+    """Predict requests whose projects follow the training data distributions
+
+    A batch_fraction of the requests are JSON-array batches of batch_size
+    projects; the rest are single projects.
+    """
+    from material_forecasting import MaterialForecastingModel
+
+    n_batches = int(round(n_requests * batch_fraction))
+    n_projects = n_requests - n_batches + n_batches * batch_size
+    projects = MaterialForecastingModel().create_synthetic_dataset_vectorized(n_projects, seed=seed)
+    payloads = [{
+        'project_type': project_type,
+        'region': region,
+        'power_capacity': round(float(power), 2),
+        'area': round(float(area))
+    } for project_type, region, power, area in zip(projects['project_type'], projects['region'],
+                                                    projects['power_capacity_mw'], projects['area_sqft'])]
+
+    requests = [RecordedRequest.from_record({'endpoint': '/api/predict', 'body': payload})
+                for payload in payloads[:n_requests - n_batches]]
+    offset = n_requests - n_batches
+    for i in range(n_batches):
+        batch = payloads[offset + i * batch_size:offset + (i + 1) * batch_size]
+        requests.append(RecordedRequest.from_record({'endpoint': '/api/predict', 'body': batch}))
+    random.Random(seed).shuffle(requests)
+    return requests
+
+
+async def read_response(reader):
+    """(status, body) of one HTTP/1.1 response, and whether the connection can be reused"""
+    status_line = await reader.readuntil(b'\r\n')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if size == 0:
+                await reader.readuntil(b'\r\n')
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()
+        headers['connection'] = 'close'
+    reusable = headers.get('connection', '').lower() != 'close'
+    return status, body, reusable
+
+
+class LoadTest:
+    """Replays requests against an HTTP server over keep-alive connections
+
+    Closed loop: `concurrency` clients each send their next request as soon
+    as the previous one is answered. Open loop: requests start at `rate` per
+    second (Poisson arrivals) however slowly the server answers, on up to
+    `concurrency` connections; latency is measured from the scheduled start,
+    so time spent waiting for a free connection counts against the server.
+    """
+
+    def __init__(self, url, requests, concurrency=10, rate=None, duration=None, total=None,
+                 timeout=30.0, seed=42, warmup=0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.total = total if total is not None else (None if duration else len(requests))
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.warmup = warmup
+        self.samples = []  # (endpoint, status or None, latency seconds, error text)
+        self.sent = 0
+        self.started_at = None
+        self.measured_from = None
+
+    def next_request(self):
+        """The next request to send, cycling through the log, or None when the run is over"""
+        if self.total is not None and self.sent >= self.total:
+            return None
+        if self.duration is not None and time.perf_counter() - self.started_at >= self.duration:
+            return None
+        request = self.requests[self.sent % len(self.requests)]
+        self.sent += 1
+        return request
+
+    def encode(self, request):
+        lines = [f"{request.method} {request.path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(request.body)}"]
+        lines += [f"{name}: {value}" for name, value in request.headers.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + request.body
+
+    async def connect(self):
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def send(self, connection, request, scheduled):
+        """Send one request on connection (opening one if None); return the connection to reuse or None"""
+        status, error = None, None
+        try:
+            if connection is None:
+                connection = await self.connect()
+            reader, writer = connection
+            writer.write(self.encode(request))
+            await writer.drain()
+            status, _, reusable = await asyncio.wait_for(read_response(reader), self.timeout)
+            if not reusable:
+                writer.close()
+                connection = None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            error = type(e).__name__ if not str(e) else f"{type(e).__name__}: {e}"
+            if connection is not None:
+                connection[1].close()
+            connection = None
+        self.samples.append((request.endpoint, status, time.perf_counter() - scheduled, error))
+        if len(self.samples) == self.warmup:
+            self.measured_from = time.perf_counter()
+        return connection
+
+    async def closed_loop_client(self):
+        connection = None
+        while True:
+            request = self.next_request()
+            if request is None:
+                break
+            connection = await self.send(connection, request, time.perf_counter())
+        if connection is not None:
+            connection[1].close()
+
+    async def open_loop(self):
+        idle = asyncio.Queue()
+        for _ in range(self.concurrency):
+            idle.put_nowait(None)
+
+        async def fire(request, scheduled):
+            connection = await idle.get()
+            idle.put_nowait(await self.send(connection, request, scheduled))
+
+        tasks = []
+        next_start = time.perf_counter()
+        while True:
+            request = self.next_request()
+            if request is None:
+                break
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(fire(request, next_start)))
+            next_start += self.rng.expovariate(self.rate)
+        if tasks:
+            await asyncio.wait(tasks)
+        while not idle.empty():
+            connection = idle.get_nowait()
+            if connection is not None:
+                connection[1].close()
+
+    async def run(self):
+        self.started_at = self.measured_from = time.perf_counter()
+        if self.rate:
+            await self.open_loop()
+        else:
+            await asyncio.gather(*(self.closed_loop_client() for _ in range(self.concurrency)))
+        # The first `warmup` responses (cold caches, worker start-up) are left out of the report
+        return summarize(self.samples[self.warmup:], time.perf_counter() - self.measured_from)
+
+
+def latency_stats(latencies):
+    latencies = np.array(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'mean_ms': float(latencies.mean())
+    }
+
+
+def summarize(samples, elapsed):
+    """Throughput, latency percentiles and error rates, overall and per endpoint"""
+    def section(rows):
+        errors = sum(1 for _, status, _, error in rows if error or status >= 400)
+        stats = {
+            'requests': len(rows),
+            'throughput_per_s': len(rows) / elapsed if elapsed > 0 else 0.0,
+            'errors': errors,
+            'error_rate': errors / len(rows) if rows else 0.0,
+            'status_counts': {},
+            'failures': {}
+        }
+        for _, status, _, error in rows:
+            if error:
+                stats['failures'][error] = stats['failures'].get(error, 0) + 1
+            else:
+                stats['status_counts'][str(status)] = stats['status_counts'].get(str(status), 0) + 1
+        if rows:
+            stats.update(latency_stats([latency for _, _, latency, _ in rows]))
+        return stats
+
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+    return {
+        'elapsed_s': elapsed,
+        'overall': section(samples),
+        'endpoints': {endpoint: section(rows) for endpoint, rows in sorted(by_endpoint.items())}
+    }
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<24} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'errors':>8}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['overall'])]
+    for endpoint, stats in rows:
+        if not stats['requests']:
+            continue
+        print(f"{endpoint:<24} {stats['requests']:>9} {stats['throughput_per_s']:>9.1f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f} {stats['error_rate']:>8.1%}")
+    overall = report['overall']
+    print(f"\nStatus codes: {overall['status_counts']}")
+    if overall['failures']:
+        print(f"Connection failures: {overall['failures']}")
+
+
+def start_server(port, workers=None):
+    """Launch api_server.py on port and wait until it accepts connections"""
+    command = [sys.executable, os.path.join(REPO_ROOT, 'api_server.py'), '--port', str(port)]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+
+    async def wait_ready():
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"api_server.py exited with status {process.returncode}")
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.2)
+        raise RuntimeError("api_server.py did not start within 30 seconds")
+
+    try:
+        asyncio.run(wait_ready())
+    except BaseException:
+        process.kill()
+        raise
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded requests against the API and report latency")
+    parser.add_argument('--log', help="JSONL of {\"endpoint\", \"body\"} records to replay")
+    parser.add_argument('--synthesize', type=int, default=1000,
+                        help="number of predict requests to generate when no --log is given")
+    parser.add_argument('--batch-fraction', type=float, default=0.0,
+                        help="share of synthesized requests sent as batches")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=10, help="clients (closed loop) or connections (open loop)")
+    parser.add_argument('--rate', type=float, help="open-loop arrival rate in requests per second")
+    parser.add_argument('--duration', type=float, help="seconds to run, cycling through the requests")
+    parser.add_argument('--requests', type=int, dest='total', help="requests to send, cycling through the log")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--warmup', type=int, default=0, help="responses to leave out of the report")
+    parser.add_argument('--spawn', action='store_true', help="start api_server.py on the --url port for the run")
+    parser.add_argument('--workers', type=int, help="prediction workers of the spawned server")
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.log:
+        requests = load_requests(args.log)
+    else:
+        requests = synthesize_requests(args.synthesize, args.seed, args.batch_fraction, args.batch_size)
+    if not requests:
+        parser.error("no requests to replay")
+
+    server = start_server(urlsplit(args.url).port or 80, args.workers) if args.spawn else None
+    try:
+        test = LoadTest(args.url, requests, args.concurrency, args.rate, args.duration, args.total,
+                        args.timeout, args.seed, args.warmup)
+        mode = f"open loop at {args.rate:g} req/s" if args.rate else f"closed loop with {args.concurrency} clients"
+        print(f"Replaying {len(requests)} distinct requests against {args.url}, {mode}")
+        report = asyncio.run(test.run())
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    report['config'] = {
+        'url': args.url,
+        'log': args.log,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'duration': args.duration
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nLoad test report saved to: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,88 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import SGDClassifier, SGDRegressor
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pickle
 import warnings
+from feature_encoding import FeatureEncoder
+from forest_inference import ForestInferenceEngine
+from materials import MATERIAL_NAMES
+from model_artifact import DEFAULT_ARTIFACT_DIR, basket_frame, save_artifact
 warnings.filterwarnings('ignore')
 
+PROJECT_TYPES = ['Data Center', 'Office Building', 'Residential Complex', 'Industrial Facility', 'Healthcare']
+REGIONS = ['Maharashtra', 'Karnataka', 'Delhi', 'Gujarat', 'Tamil Nadu']
+MATERIAL_ITEM_NOS = np.array(sorted(MATERIAL_NAMES))
+
+# Per project type: (power_low, power_high, area_low, area_high, material weights)
+SYNTHETIC_PROFILES = {
+    'Data Center': (10, 50, 50000, 300000, [0.15, 0.25, 0.20, 0.15, 0.05, 0.05, 0.05, 0.05, 0.03, 0.02]),
+    'Office Building': (2, 15, 20000, 150000, [0.20, 0.30, 0.15, 0.10, 0.10, 0.05, 0.05, 0.03, 0.02, 0.00]),
+    'default': (1, 20, 10000, 200000, [0.18, 0.28, 0.12, 0.08, 0.12, 0.08, 0.06, 0.04, 0.02, 0.02])
+}
+
+# Quantity multiplier range per item (per 1000 sq ft), same bands as create_synthetic_dataset
+QTY_MULTIPLIER_LOW = np.array([0.8, 0.8, 0.3, 0.1, 0.1, 0.1, 0.3, 0.1, 0.1, 0.1])
+QTY_MULTIPLIER_HIGH = np.array([1.5, 1.5, 0.8, 0.4, 0.4, 0.4, 0.8, 0.4, 0.4, 0.4])
+
+# Above this many rows sklearn's compiled forest predict is faster than the NumPy engine
+INFERENCE_ENGINE_MAX_ROWS = 256
+
+def composite_score(accuracy, f1, mae, y_reg_range):
+    """Competition score: 0.25 * accuracy + 0.25 * F1 + 0.5 * (1 - range-normalized MAE)"""
+    norm_mae = mae / y_reg_range if y_reg_range > 0 else 0
+    reg_score = max(0, 1 - norm_mae)
+    final_score = 0.25 * accuracy + 0.25 * f1 + 0.5 * reg_score
+    return {
+        'accuracy': accuracy,
+        'f1_score': f1,
+        'mae': mae,
+        'reg_score': reg_score,
+        'final_score': final_score
+    }
+
+def iter_dataset_chunks(filepath, chunk_size=100000, columns=None):
+    """Read a .csv or .parquet dataset as a stream of DataFrames of at most chunk_size rows
+    
+    Of `columns`, only those present in the file are read.
+    """
+    if filepath.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(filepath)
+        if columns is not None:
+            columns = [col for col in columns if col in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        usecols = None if columns is None else (lambda col: col in columns)
+        yield from pd.read_csv(filepath, chunksize=chunk_size, usecols=usecols)
+
+def holdout_mask(ids, test_size=0.2):
+    """Deterministic held-out split by hashing row ids, so it is stable across chunkings"""
+    hashed = (np.asarray(ids, dtype=np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(int(test_size * 2 ** 32))
+
 class MaterialForecastingModel:
     def __init__(self):
         self.classifier = RandomForestClassifier(n_estimators=100, random_state=42)
         self.regressor = RandomForestRegressor(n_estimators=100, random_state=42)
+        # Quantity given the item (features + MasterItemNo), for full bill-of-materials predictions;
+        # only fitted by train(df, basket=True)
+        self.item_regressor = RandomForestRegressor(n_estimators=100, random_state=42)
+        # Batch-updatable models fitted by train_incremental; while set, predict() uses them instead of the forests
+        self.sgd_classifier = None
+        self.sgd_regressor = None
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.feature_columns = []
+        self.inference_engine = None
+        self.feature_encoder = None
         
     def create_synthetic_dataset(self, n_samples=1000):
         """Create synthetic training dataset based on construction project parameters"""
@@ -26,20 +92,6 @@ class MaterialForecastingModel:
         project_types = ['Data Center', 'Office Building', 'Residential Complex', 'Industrial Facility', 'Healthcare']
         regions = ['Maharashtra', 'Karnataka', 'Delhi', 'Gujarat', 'Tamil Nadu']
         
-        # Material categories with item numbers
-        materials = {
-            101: 'Steel Reinforcement Bars',
-            102: 'Concrete Mix',
-            103: 'Electrical Cables',
-            104: 'HVAC Equipment',
-            105: 'Flooring Materials',
-            106: 'Insulation Materials',
-            107: 'Piping Systems',
-            108: 'Fire Safety Equipment',
-            109: 'Glass Panels',
-            110: 'Roofing Materials'
-        }
-        
         data = []
         for i in range(n_samples):
             project_type = np.random.choice(project_types)
@@ -60,7 +112,7 @@ class MaterialForecastingModel:
                 material_weights = [0.18, 0.28, 0.12, 0.08, 0.12, 0.08, 0.06, 0.04, 0.02, 0.02]
             
             # Select material based on project type
-            master_item_no = np.random.choice(list(materials.keys()), p=material_weights)
+            master_item_no = np.random.choice(list(MATERIAL_NAMES.keys()), p=material_weights)
             
             # Calculate quantity based on project size and material type
             base_qty = area / 1000  # Base quantity per 1000 sq ft
@@ -86,32 +138,127 @@ class MaterialForecastingModel:
         
         return pd.DataFrame(data)
     
+    def generate_synthetic_block(self, n_samples, rng, start_id=1):
+        """Draw one block of synthetic rows as NumPy arrays in a single vectorized pass"""
+        profiles = [SYNTHETIC_PROFILES.get(t, SYNTHETIC_PROFILES['default']) for t in PROJECT_TYPES]
+        power_low, power_high, area_low, area_high = (np.array(col, dtype=float) for col in list(zip(*profiles))[:4])
+        cum_weights = np.cumsum([p[4] for p in profiles], axis=1)
+        
+        type_codes = rng.integers(0, len(PROJECT_TYPES), n_samples)
+        region_codes = rng.integers(0, len(REGIONS), n_samples)
+        power_capacity = power_low[type_codes] + (power_high - power_low)[type_codes] * rng.random(n_samples)
+        area = area_low[type_codes] + (area_high - area_low)[type_codes] * rng.random(n_samples)
+        
+        # Inverse-CDF sampling of the material, using the weights of each row's project type
+        u = rng.random(n_samples) * cum_weights[type_codes, -1]
+        item_idx = np.empty(n_samples, dtype=np.int64)
+        for code in range(len(PROJECT_TYPES)):
+            mask = type_codes == code
+            item_idx[mask] = np.searchsorted(cum_weights[code], u[mask], side='right')
+        np.minimum(item_idx, len(MATERIAL_ITEM_NOS) - 1, out=item_idx)
+        
+        # Quantity scales with area and the material's volume band
+        multiplier = QTY_MULTIPLIER_LOW[item_idx] + (QTY_MULTIPLIER_HIGH - QTY_MULTIPLIER_LOW)[item_idx] * rng.random(n_samples)
+        qty_shipped = np.maximum(1, (area / 1000 * multiplier).astype(np.int64))
+        
+        return pd.DataFrame({
+            'id': np.arange(start_id, start_id + n_samples, dtype=np.int64),
+            'project_type': pd.Categorical.from_codes(type_codes, categories=PROJECT_TYPES),
+            'region': pd.Categorical.from_codes(region_codes, categories=REGIONS),
+            'power_capacity_mw': power_capacity,
+            'area_sqft': area,
+            'MasterItemNo': MATERIAL_ITEM_NOS[item_idx],
+            'QtyShipped': qty_shipped
+        })
+    
+    def iter_synthetic_chunks(self, n_samples, chunk_size=500000, seed=42):
+        """Yield the synthetic dataset as DataFrames of at most chunk_size rows"""
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_samples, chunk_size):
+            yield self.generate_synthetic_block(min(chunk_size, n_samples - start), rng, start_id=start + 1)
+    
+    def create_synthetic_dataset_vectorized(self, n_samples=1000, seed=42, chunk_size=None):
+        """Vectorized equivalent of create_synthetic_dataset for large n_samples
+        
+        Rows follow the same distributions as create_synthetic_dataset but are drawn
+        from a numpy Generator, so the exact values differ. Categorical columns are
+        returned as pandas categoricals to keep memory low.
+        """
+        chunks = list(self.iter_synthetic_chunks(n_samples, chunk_size or max(n_samples, 1), seed))
+        if not chunks:
+            return self.generate_synthetic_block(0, np.random.default_rng(seed))
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
+    
+    def write_synthetic_dataset(self, filepath, n_samples, chunk_size=500000, seed=42):
+        """Stream the synthetic dataset to a .csv or .parquet file chunk by chunk
+        
+        Only one chunk is held in memory at a time. For the same seed and chunk_size
+        the file matches create_synthetic_dataset_vectorized(..., chunk_size=chunk_size).
+        """
+        writer = None
+        rows_written = 0
+        try:
+            for i, chunk in enumerate(self.iter_synthetic_chunks(n_samples, chunk_size, seed)):
+                if filepath.endswith('.parquet'):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(filepath, table.schema)
+                    writer.write_table(table)
+                else:
+                    chunk.to_csv(filepath, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+                rows_written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows_written
+    
     def prepare_features(self, df):
         """Prepare features for training"""
-        feature_df = df.copy()
-        
-        # Encode categorical variables
+        # Fit encoders for categorical variables seen for the first time
         for col in ['project_type', 'region']:
             if col not in self.label_encoders:
-                self.label_encoders[col] = LabelEncoder()
-                feature_df[col + '_encoded'] = self.label_encoders[col].fit_transform(feature_df[col])
-            else:
-                feature_df[col + '_encoded'] = self.label_encoders[col].transform(feature_df[col])
+                self.label_encoders[col] = LabelEncoder().fit(df[col])
+                self.feature_encoder = None
         
         # Select feature columns
         self.feature_columns = ['project_type_encoded', 'region_encoded', 'power_capacity_mw', 'area_sqft']
-        X = feature_df[self.feature_columns]
+        X = self.get_feature_encoder().raw(df)
+        
+        return pd.DataFrame(X, columns=self.feature_columns, index=df.index)
+    
+    def get_feature_encoder(self):
+        """Compiled FeatureEncoder for the current label encoders and scaler (rebuilt after training/loading)"""
+        if self.feature_encoder is None:
+            self.feature_encoder = FeatureEncoder.from_label_encoders(
+                self.feature_columns, self.label_encoders, self.scaler)
+        return self.feature_encoder
+    
+    def transform_features(self, df):
+        """Encoded and scaled feature matrix for prediction
         
-        return X
+        float32 for the random forests, which compare in float32 anyway; float64
+        for the SGD models from train_incremental, which compute in float64.
+        """
+        dtype = np.float32 if self.sgd_classifier is None else np.float64
+        return self.get_feature_encoder().encode(df, scale=True, dtype=dtype)
     
-    def train(self, df):
-        """Train both classification and regression models"""
+    def train(self, df, basket=False):
+        """Train both classification and regression models
+        
+        With basket=True the item quantity regressor used by predict_basket is
+        trained as well (a third forest, so off by default).
+        """
         X = self.prepare_features(df)
         y_class = df['MasterItemNo']
         y_reg = df['QtyShipped']
         
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
+        self.feature_encoder = None
         
         # Split data
         X_train, X_test, y_class_train, y_class_test, y_reg_train, y_reg_test = train_test_split(
@@ -119,8 +266,15 @@ class MaterialForecastingModel:
         )
         
         # Train models
+        self.inference_engine = None
+        self.sgd_classifier = self.sgd_regressor = None
         self.classifier.fit(X_train, y_class_train)
         self.regressor.fit(X_train, y_reg_train)
+        if basket:
+            self.item_regressor.fit(np.column_stack([X_train, y_class_train]), y_reg_train)
+        else:
+            # Unfitted, with the same parameters: a fit from earlier data would not match the new scaler
+            self.item_regressor = clone(self.item_regressor)
         
         # Evaluate models
         class_pred = self.classifier.predict(X_test)
@@ -131,42 +285,162 @@ class MaterialForecastingModel:
         mae = mean_absolute_error(y_reg_test, reg_pred)
         
         # Calculate composite score
-        y_reg_range = y_reg_test.max() - y_reg_test.min()
-        norm_mae = mae / y_reg_range if y_reg_range > 0 else 0
-        reg_score = max(0, 1 - norm_mae)
-        final_score = 0.25 * accuracy + 0.25 * f1 + 0.5 * reg_score
+        performance = composite_score(accuracy, f1, mae, y_reg_test.max() - y_reg_test.min())
+        self.print_performance(performance)
         
+        return performance
+    
+    def print_performance(self, performance):
+        """Print the composite-score report"""
         print(f"Model Performance:")
-        print(f"Classification Accuracy: {accuracy:.4f}")
-        print(f"Classification F1-Score: {f1:.4f}")
-        print(f"Regression MAE: {mae:.4f}")
-        print(f"Regression Score: {reg_score:.4f}")
-        print(f"Final Composite Score: {final_score:.4f}")
-        
-        return {
-            'accuracy': accuracy,
-            'f1_score': f1,
-            'mae': mae,
-            'reg_score': reg_score,
-            'final_score': final_score
-        }
+        print(f"Classification Accuracy: {performance['accuracy']:.4f}")
+        print(f"Classification F1-Score: {performance['f1_score']:.4f}")
+        print(f"Regression MAE: {performance['mae']:.4f}")
+        print(f"Regression Score: {performance['reg_score']:.4f}")
+        print(f"Final Composite Score: {performance['final_score']:.4f}")
+    
+    def train_incremental(self, source, chunk_size=100000, test_size=0.2, n_epochs=1):
+        """Train out-of-core on a dataset streamed in chunks
+        
+        `source` is a .csv/.parquet path or a zero-argument callable returning a fresh
+        iterator of DataFrames (the data is read more than once). Rows are assigned to
+        the held-out stream by hashing `id`, the encoders and scaler are fitted in
+        streaming passes and the models are batch-updatable SGD estimators trained
+        with partial_fit. They are kept as sgd_classifier and sgd_regressor and used
+        by predict() until train() is run again; the random forests are left as they
+        were. SGD models cannot be compiled into a ForestInferenceEngine, so they
+        cannot be saved as a serving artifact.
+        """
+        if callable(source):
+            open_stream = lambda columns=None: source()
+        else:
+            open_stream = lambda columns=None: iter_dataset_chunks(source, chunk_size, columns)
+        
+        def split_chunks(columns=None):
+            row_offset = 0
+            for chunk in open_stream(columns):
+                ids = chunk['id'].to_numpy() if 'id' in chunk else np.arange(row_offset, row_offset + len(chunk))
+                row_offset += len(chunk)
+                is_test = holdout_mask(ids, test_size)
+                yield chunk[~is_test], chunk[is_test]
+        
+        # Pass 1: category vocabularies and target classes (encoders need the full set up front)
+        categories = {'project_type': set(), 'region': set()}
+        classes = set()
+        for train_chunk, test_chunk in split_chunks(['id', 'project_type', 'region', 'MasterItemNo']):
+            for col in categories:
+                categories[col].update(train_chunk[col].unique())
+                categories[col].update(test_chunk[col].unique())
+            classes.update(train_chunk['MasterItemNo'].unique())
+        self.label_encoders = {col: LabelEncoder().fit(sorted(values)) for col, values in categories.items()}
+        self.feature_encoder = None
+        classes = np.array(sorted(classes))
+        
+        # Pass 2: incremental scaler statistics over the training stream
+        self.scaler = StandardScaler()
+        for train_chunk, _ in split_chunks():
+            if len(train_chunk):
+                self.scaler.partial_fit(self.prepare_features(train_chunk))
+        
+        # Pass 3: batch-updatable estimators
+        self.feature_encoder = None
+        self.inference_engine = None
+        self.sgd_classifier = SGDClassifier(loss='log_loss', random_state=42)
+        self.sgd_regressor = SGDRegressor(random_state=42)
+        for epoch in range(n_epochs):
+            for train_chunk, _ in split_chunks():
+                if len(train_chunk) == 0:
+                    continue
+                X_scaled = self.get_feature_encoder().encode(train_chunk, dtype=np.float64)
+                self.sgd_classifier.partial_fit(X_scaled, train_chunk['MasterItemNo'], classes=classes)
+                self.sgd_regressor.partial_fit(X_scaled, train_chunk['QtyShipped'])
+        
+        # Pass 4: evaluate on the held-out stream with running confusion counts and errors
+        class_index = {c: i for i, c in enumerate(classes)}
+        confusion = np.zeros((len(classes) + 1, len(classes) + 1), dtype=np.int64)
+        abs_error_sum, n_test = 0.0, 0
+        y_min, y_max = np.inf, -np.inf
+        for _, test_chunk in split_chunks():
+            if len(test_chunk) == 0:
+                continue
+            X_scaled = self.get_feature_encoder().encode(test_chunk, dtype=np.float64)
+            true_idx = np.array([class_index.get(c, len(classes)) for c in test_chunk['MasterItemNo']])
+            pred_idx = np.searchsorted(classes, self.sgd_classifier.predict(X_scaled))
+            np.add.at(confusion, (true_idx, pred_idx), 1)
+            
+            y_true = test_chunk['QtyShipped'].to_numpy(dtype=float)
+            abs_error_sum += np.abs(y_true - self.sgd_regressor.predict(X_scaled)).sum()
+            n_test += len(y_true)
+            y_min, y_max = min(y_min, y_true.min()), max(y_max, y_true.max())
+        
+        if n_test == 0:
+            raise ValueError("Held-out stream is empty; increase test_size or the dataset size")
+        
+        # Accuracy and support-weighted F1 from the confusion matrix
+        true_pos = np.diag(confusion).astype(float)
+        support = confusion.sum(axis=1)
+        predicted = confusion.sum(axis=0)
+        denom = support + predicted
+        f1_per_class = np.divide(2 * true_pos, denom, out=np.zeros_like(true_pos), where=denom > 0)
+        accuracy = true_pos.sum() / n_test
+        f1 = (f1_per_class * support).sum() / n_test
+        
+        performance = composite_score(accuracy, f1, abs_error_sum / n_test, y_max - y_min)
+        self.print_performance(performance)
+        
+        return performance
     
     def predict(self, df):
         """Make predictions on new data"""
-        X = self.prepare_features(df)
-        X_scaled = self.scaler.transform(X)
+        X_scaled = self.transform_features(df)
         
-        master_item_pred = self.classifier.predict(X_scaled)
-        qty_pred = self.regressor.predict(X_scaled)
+        if self.sgd_classifier is not None:
+            master_item_pred = self.sgd_classifier.predict(X_scaled)
+            qty_pred = self.sgd_regressor.predict(X_scaled)
+        elif self.inference_engine is not None and len(X_scaled) <= INFERENCE_ENGINE_MAX_ROWS:
+            master_item_pred, qty_pred = self.inference_engine.predict(X_scaled)
+        else:
+            master_item_pred = self.classifier.predict(X_scaled)
+            qty_pred = self.regressor.predict(X_scaled)
         qty_pred = np.maximum(1, np.round(qty_pred).astype(int))  # Ensure positive integers
         
         return master_item_pred, qty_pred
     
+    def predict_basket(self, df):
+        """Predict the whole material basket: per-item probability and quantity for every project
+        
+        Returns one row per (project id, MasterItemNo). The classifier and the item
+        quantity regressor are each evaluated once for the whole batch.
+        """
+        if self.sgd_classifier is not None or not hasattr(self.item_regressor, 'estimators_'):
+            raise ValueError("Basket prediction needs the item quantity regressor; train with train(df, basket=True)")
+        X_scaled = self.transform_features(df)
+        ids = df['id'] if 'id' in df else np.arange(1, len(df) + 1)
+        
+        engine = self.inference_engine
+        if engine is not None and engine.supports_basket and len(X_scaled) <= INFERENCE_ENGINE_MAX_ROWS:
+            proba, qty = engine.predict_basket(X_scaled)
+            return basket_frame(ids, engine.classes, proba, qty)
+        
+        classes = self.classifier.classes_
+        proba = self.classifier.predict_proba(X_scaled)
+        X_items = np.column_stack([np.repeat(X_scaled, len(classes), axis=0), np.tile(classes, len(X_scaled))])
+        qty = self.item_regressor.predict(X_items).reshape(len(X_scaled), len(classes))
+        return basket_frame(ids, classes, proba, qty)
+    
+    def compile_inference(self):
+        """Flatten the trained forests into a ForestInferenceEngine used by predict() for small batches"""
+        self.inference_engine = ForestInferenceEngine.from_model(self)
+        return self.inference_engine
+    
     def save_model(self, filepath):
         """Save trained model"""
         model_data = {
             'classifier': self.classifier,
             'regressor': self.regressor,
+            'item_regressor': self.item_regressor,
+            'sgd_classifier': self.sgd_classifier,
+            'sgd_regressor': self.sgd_regressor,
             'label_encoders': self.label_encoders,
             'scaler': self.scaler,
             'feature_columns': self.feature_columns
@@ -174,6 +448,10 @@ class MaterialForecastingModel:
         with open(filepath, 'wb') as f:
             pickle.dump(model_data, f)
     
+    def save_artifact(self, dirpath=DEFAULT_ARTIFACT_DIR):
+        """Save the memory-mappable serving artifact (see model_artifact.load_artifact)"""
+        return save_artifact(self, dirpath)
+    
     def load_model(self, filepath):
         """Load trained model"""
         with open(filepath, 'rb') as f:
@@ -181,9 +459,14 @@ class MaterialForecastingModel:
         
         self.classifier = model_data['classifier']
         self.regressor = model_data['regressor']
+        self.item_regressor = model_data.get('item_regressor')
+        self.sgd_classifier = model_data.get('sgd_classifier')
+        self.sgd_regressor = model_data.get('sgd_regressor')
         self.label_encoders = model_data['label_encoders']
         self.scaler = model_data['scaler']
         self.feature_columns = model_data['feature_columns']
+        self.inference_engine = None
+        self.feature_encoder = None
 
 def main():
     # Initialize model
@@ -207,6 +490,8 @@ def main():
     # Save model
     model.save_model('material_forecasting_model.pkl')
     print("\nModel saved as 'material_forecasting_model.pkl'")
+    model_version = model.save_artifact(DEFAULT_ARTIFACT_DIR)
+    print(f"Serving artifact saved to '{DEFAULT_ARTIFACT_DIR}/' (version {model_version})")
     
     # Create test case for Data Center project
     test_data = pd.DataFrame({
@@ -0,0 +1,19 @@
+# Forecast item numbers (MasterItemNo) and the materials they stand for, shared by the model,
+# the prediction API, the procurement plan and the dashboard
+MATERIAL_NAMES = {
+    101: 'Steel Reinforcement Bars',
+    102: 'Concrete Mix',
+    103: 'Electrical Cables',
+    104: 'HVAC Equipment',
+    105: 'Flooring Materials',
+    106: 'Insulation Materials',
+    107: 'Piping Systems',
+    108: 'Fire Safety Equipment',
+    109: 'Glass Panels',
+    110: 'Roofing Materials'
+}
+
+
+def material_name(master_item_no):
+    """Get material name from item number"""
+    return MATERIAL_NAMES.get(master_item_no, f'Material {master_item_no}')
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_encoding import FeatureEncoder
+from forest_inference import ForestInferenceEngine
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_ARTIFACT_DIR = 'material_forecasting_model'
+
+
+def basket_frame(ids, classes, proba, qty):
+    """Long-format bill of materials: one row per (project, item) with probability and quantity"""
+    n_projects, n_items = proba.shape
+    return pd.DataFrame({
+        'id': np.repeat(np.asarray(ids), n_items),
+        'MasterItemNo': np.tile(classes, n_projects),
+        'probability': proba.ravel(),
+        'QtyShipped': np.maximum(1, np.round(qty.ravel()).astype(int))
+    })
+
+
+def _model_parts(model):
+    """(engine, feature_columns, label_encoders, scaler) from a model object or pickled model_data dict"""
+    if isinstance(model, dict):
+        return (ForestInferenceEngine.from_model(model), model['feature_columns'],
+                model['label_encoders'], model['scaler'])
+    engine = model.inference_engine or ForestInferenceEngine.from_model(model)
+    return engine, model.feature_columns, model.label_encoders, model.scaler
+
+
+def build_manifest(model):
+    """Return (manifest, arrays) for a trained model; the version is derived from the content"""
+    engine, feature_columns, label_encoders, scaler = _model_parts(model)
+    arrays = {name: np.ascontiguousarray(array) for name, array in engine.to_arrays().items()}
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'feature_columns': list(feature_columns),
+        'label_encoders': {col: [str(c) for c in enc.classes_] for col, enc in label_encoders.items()},
+        'scaler': {'mean': scaler.mean_.tolist(), 'scale': scaler.scale_.tolist()},
+        'engine': engine.metadata(),
+        'arrays': {name: {'file': f"{name}.npy", 'dtype': array.dtype.str, 'shape': list(array.shape)}
+                   for name, array in arrays.items()}
+    }
+
+    digest = hashlib.sha256()
+    for name, array in arrays.items():
+        digest.update(name.encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps({k: manifest[k] for k in ('feature_columns', 'label_encoders', 'scaler', 'engine')},
+                             sort_keys=True).encode())
+    manifest['model_version'] = digest.hexdigest()[:16]
+    return manifest, arrays
+
+
+def save_artifact(model, dirpath=DEFAULT_ARTIFACT_DIR):
+    """Write a trained model as raw .npy node tables plus a JSON manifest
+
+    The forests are flattened with ForestInferenceEngine; encoders, scaler and
+    feature columns go into manifest.json. The node tables go into a
+    subdirectory named after the model version, and the manifest pointing at
+    them is replaced in one rename, so readers see either the old or the new
+    artifact, never a half-written or missing one. Returns the content-derived
+    model version.
+    """
+    manifest, arrays = build_manifest(model)
+    version = manifest['model_version']
+    for name, entry in manifest['arrays'].items():
+        entry['file'] = f"{version}/{entry['file']}"
+    os.makedirs(dirpath, exist_ok=True)
+    manifest_path = os.path.join(dirpath, MANIFEST_NAME)
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f).get('model_version')
+
+    # Same content gives the same version, so an existing version directory is already complete
+    version_dir = os.path.join(dirpath, version)
+    if not os.path.isdir(version_dir):
+        tmp_dir = os.path.join(dirpath, f".tmp-{os.getpid()}-{version}")
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array, allow_pickle=False)
+        try:
+            os.rename(tmp_dir, version_dir)
+        except OSError:
+            # Another writer published the same version first
+            shutil.rmtree(tmp_dir)
+
+    tmp_manifest = os.path.join(dirpath, f".{MANIFEST_NAME}.tmp-{os.getpid()}")
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+
+    # Keep the version just replaced for readers that opened its manifest a moment ago; processes
+    # that mapped older files keep them after they are unlinked
+    for name in os.listdir(dirpath):
+        path = os.path.join(dirpath, name)
+        if name.startswith('.') or name in (MANIFEST_NAME, version, previous):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif name.endswith('.npy'):
+            os.remove(path)
+
+    return version
+
+
+def load_artifact(dirpath=DEFAULT_ARTIFACT_DIR, mmap=True, handle_unknown='error', fallback=None):
+    """Open an artifact written by save_artifact
+
+    With mmap=True the node tables are memory-mapped read-only: loading only
+    parses the manifest, pages are read lazily on first use, and every process
+    mapping the same files shares the same physical pages. handle_unknown and
+    fallback configure the FeatureEncoder (see feature_encoding).
+    """
+    with open(os.path.join(dirpath, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    arrays = {}
+    for name, entry in manifest['arrays'].items():
+        array = np.load(os.path.join(dirpath, entry['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+            raise ValueError(f"Artifact array '{name}' does not match the manifest")
+        arrays[name] = array
+
+    return ModelArtifact(manifest, ForestInferenceEngine.from_arrays(arrays, manifest['engine']),
+                         handle_unknown, fallback)
+
+
+class ModelArtifact:
+    """Loaded serving model: flattened forests plus encoder and scaler parameters
+
+    Mirrors MaterialForecastingModel.prepare_features/predict without needing
+    sklearn or pickle at serving time.
+    """
+
+    def __init__(self, manifest, engine, handle_unknown='error', fallback=None):
+        self.manifest = manifest
+        self.engine = engine
+        self.version = manifest['model_version']
+        self.feature_columns = manifest['feature_columns']
+        self.categories = manifest['label_encoders']
+        self.scaler_mean = np.array(manifest['scaler']['mean'])
+        self.scaler_scale = np.array(manifest['scaler']['scale'])
+        self.encoder = FeatureEncoder(self.feature_columns, self.categories, self.scaler_mean,
+                                      self.scaler_scale, handle_unknown, fallback)
+
+    @classmethod
+    def from_model(cls, model, handle_unknown='error', fallback=None):
+        """In-memory artifact for a trained model or pickled model_data dict (nothing written to disk)"""
+        manifest, arrays = build_manifest(model)
+        return cls(manifest, ForestInferenceEngine.from_arrays(arrays, manifest['engine']),
+                   handle_unknown, fallback)
+
+    def transform(self, data):
+        """Encode and scale project rows (DataFrame, row dicts or one row dict) into the float32 feature matrix"""
+        return self.encoder.transform(data)
+
+    def predict(self, df):
+        """Same outputs as MaterialForecastingModel.predict"""
+        master_item_pred, qty_pred = self.engine.predict(self.transform(df))
+        qty_pred = np.maximum(1, np.round(qty_pred).astype(int))
+        return master_item_pred, qty_pred
+
+    def predict_with_confidence(self, data):
+        """predict() plus the probability of each predicted MasterItemNo"""
+        master_item_pred, qty_pred, proba = self.engine.predict_with_proba(self.transform(data))
+        qty_pred = np.maximum(1, np.round(qty_pred).astype(int))
+        return master_item_pred, qty_pred, proba.max(axis=1)
+
+    def predict_basket(self, df):
+        """Same output as MaterialForecastingModel.predict_basket"""
+        proba, qty = self.engine.predict_basket(self.transform(df))
+        ids = df['id'] if 'id' in df else np.arange(1, len(proba) + 1)
+        return basket_frame(ids, self.engine.classes, proba, qty)
@@ -0,0 +1,236 @@
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from model_artifact import DEFAULT_ARTIFACT_DIR, MANIFEST_NAME, ModelArtifact, load_artifact
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_PATH = 'material_forecasting_model.pkl'
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+
+def validate_model(model, feature_columns=None):
+    """Raise ValueError unless model is fit to serve in place of one with these feature columns
+
+    Checks the feature columns, that the forests take one input per column,
+    and that a smoke prediction on a known project gives finite, in-range
+    outputs.
+    """
+    if feature_columns is not None and list(model.feature_columns) != list(feature_columns):
+        raise ValueError(f"Feature columns changed from {list(feature_columns)} to {list(model.feature_columns)}")
+    if model.engine.n_features != len(model.feature_columns):
+        raise ValueError(f"Model expects {model.engine.n_features} features but has "
+                         f"{len(model.feature_columns)} feature columns")
+
+    row = {'project_type': model.categories['project_type'][0], 'region': model.categories['region'][0],
+           'power_capacity_mw': 25.0, 'area_sqft': 200000.0}
+    master_items, quantities, confidence = model.predict_with_confidence(row)
+    if not (len(master_items) == len(quantities) == len(confidence) == 1):
+        raise ValueError("Smoke prediction returned the wrong number of rows")
+    if master_items[0] not in model.engine.classes:
+        raise ValueError(f"Smoke prediction returned unknown MasterItemNo {master_items[0]}")
+    if quantities[0] < 1 or not np.isfinite(confidence[0]) or not 0.0 <= confidence[0] <= 1.0:
+        raise ValueError("Smoke prediction returned an invalid quantity or confidence")
+
+
+class ModelRegistry:
+    """Process-wide holder of the serving model
+
+    The model is loaded on first use and then kept warm for every later
+    request served by the process, so requests never deserialize it. The
+    memory-mapped artifact directory is preferred; the pickled model is the
+    fallback. Relative paths are resolved against the repository root.
+
+    reload() loads and validates a new model next to the current one and
+    then swaps the reference in one assignment: requests that already hold
+    the old model finish on it, later get() calls see the new one. Once
+    start_watcher() is called, a ModelWatcher calls reload() whenever the
+    model files change.
+    """
+
+    def __init__(self, artifact_dir=DEFAULT_ARTIFACT_DIR, model_path=DEFAULT_MODEL_PATH,
+                 handle_unknown='error', fallback=None):
+        self.artifact_dir = os.path.join(REPO_ROOT, artifact_dir)
+        self.model_path = os.path.join(REPO_ROOT, model_path)
+        self.handle_unknown = handle_unknown
+        self.fallback = fallback
+        self._model = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.source = None
+        self.signature = None
+        self.load_seconds = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.last_reload_error = None
+        self.watcher = None
+
+    def source_signature(self):
+        """(path, mtime, size) of the file that identifies the model a load would pick now, or None"""
+        for path in (os.path.join(self.artifact_dir, MANIFEST_NAME), self.model_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            return path, stat.st_mtime_ns, stat.st_size
+        return None
+
+    def _read(self):
+        """(model, source path, signature, seconds taken) from the current model files"""
+        start = time.perf_counter()
+        signature = self.source_signature()
+        if os.path.exists(os.path.join(self.artifact_dir, MANIFEST_NAME)):
+            model = load_artifact(self.artifact_dir, handle_unknown=self.handle_unknown, fallback=self.fallback)
+            source = self.artifact_dir
+        elif os.path.exists(self.model_path):
+            with open(self.model_path, 'rb') as f:
+                model_data = pickle.load(f)
+            model = ModelArtifact.from_model(model_data, self.handle_unknown, self.fallback)
+            source = self.model_path
+        else:
+            raise FileNotFoundError(f"No trained model at {self.artifact_dir} or {self.model_path}; "
+                                    f"run material_forecasting.py first")
+        return model, source, signature, time.perf_counter() - start
+
+    def _install(self, model, source, signature, load_seconds):
+        # Caller holds self._lock
+        self.source = source
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.loaded_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self._model = model
+
+    def get(self):
+        """The serving model (a ModelArtifact), loading it on first call"""
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    loaded = self._read()
+                    validate_model(loaded[0])
+                    self._install(*loaded)
+                model = self._model
+        return model
+
+    def reload(self):
+        """Load, validate and swap in the model currently on disk
+
+        Returns True if a different model version was installed. A model
+        that fails to load or validate raises and leaves the serving model
+        untouched (the error is kept in last_reload_error).
+        """
+        with self._reload_lock:
+            current = self._model
+            try:
+                model, source, signature, load_seconds = self._read()
+                if current is not None:
+                    validate_model(model, current.feature_columns)
+                else:
+                    validate_model(model)
+            except Exception as e:
+                self.last_reload_error = f"{type(e).__name__}: {e}"
+                raise
+            self.last_reload_error = None
+            with self._lock:
+                if current is not None and model.version == current.version:
+                    self.signature = signature
+                    return False
+                self._install(model, source, signature, load_seconds)
+                self.reloads += 1
+            return True
+
+    def start_watcher(self, interval=DEFAULT_RELOAD_INTERVAL):
+        """Poll the model files every `interval` seconds and reload when they change (idempotent; 0 = off)"""
+        if interval <= 0:
+            return None
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self.watcher is None or not self.watcher.is_alive():
+                self.watcher = ModelWatcher(self, interval)
+                self.watcher.start()
+        return self.watcher
+
+    @property
+    def version(self):
+        return self.get().version
+
+    def info(self):
+        """Version, source and load timing of the current model"""
+        model = self.get()
+        return {
+            'model_version': model.version,
+            'source': self.source,
+            'load_seconds': self.load_seconds,
+            'loaded_at': self.loaded_at,
+            'feature_columns': model.feature_columns,
+            'reloads': self.reloads,
+            'last_reload_error': self.last_reload_error
+        }
+
+
+class ModelWatcher(threading.Thread):
+    """Daemon thread that reloads a registry's model when its files change
+
+    A change is acted on once the signature has been the same for two polls
+    in a row, so a pickle that is still being written is not read. A model
+    that fails validation is not retried until the files change again.
+    """
+
+    def __init__(self, registry, interval=DEFAULT_RELOAD_INTERVAL):
+        super().__init__(name='model-watcher', daemon=True)
+        self.registry = registry
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.rejected = None
+
+    def check(self, seen):
+        """Reload if the files changed and settled since the last poll; return the signature seen now"""
+        signature = self.registry.source_signature()
+        if signature is None or signature != seen:
+            return signature
+        if signature == self.registry.signature or signature == self.rejected:
+            return signature
+        try:
+            if self.registry.reload():
+                print(f"Model reloaded: version {self.registry.version} from {self.registry.source}")
+        except Exception as e:
+            self.rejected = signature
+            print(f"Model reload rejected, keeping version {self.registry.version}: {e}")
+        return signature
+
+    def run(self):
+        seen = self.registry.source_signature()
+        while not self.stopped.wait(self.interval):
+            if self.registry._model is not None:
+                seen = self.check(seen)
+
+    def stop(self):
+        self.stopped.set()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def reload_interval(default=DEFAULT_RELOAD_INTERVAL):
+    """Seconds between checks for a new model in a process that hot-reloads: MODEL_RELOAD_INTERVAL, else default"""
+    return float(os.environ.get('MODEL_RELOAD_INTERVAL', default))
+
+
+def get_registry():
+    """The registry shared by everything in this process
+
+    MODEL_ARTIFACT_DIR and MODEL_PATH override the default model locations.
+    The registry does not watch them by itself: a long-running server opts
+    in with get_registry().start_watcher(reload_interval()).
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(os.environ.get('MODEL_ARTIFACT_DIR', DEFAULT_ARTIFACT_DIR),
+                                          os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH))
+    return _registry
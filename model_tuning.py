@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error
+from sklearn.model_selection import KFold, ParameterGrid
+from sklearn.preprocessing import StandardScaler
+
+from material_forecasting import MaterialForecastingModel, composite_score
+
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 12, 20],
+    'min_samples_leaf': [1, 5]
+}
+
+# Encoded and scaled fold matrices, built once and shared by every candidate.
+# Set in the parent before the pool starts and in each worker by _init_worker.
+_cv_folds = None
+
+
+def build_cv_folds(df, n_folds=5, seed=42):
+    """Encode features once and cache the scaled train/test matrices of every fold"""
+    model = MaterialForecastingModel()
+    X = model.prepare_features(df).to_numpy(dtype=np.float64)
+    y_class = df['MasterItemNo'].to_numpy()
+    y_reg = df['QtyShipped'].to_numpy()
+
+    folds = []
+    for train_idx, test_idx in KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append({
+            'X_train': scaler.transform(X[train_idx]),
+            'X_test': scaler.transform(X[test_idx]),
+            'y_class_train': y_class[train_idx],
+            'y_class_test': y_class[test_idx],
+            'y_reg_train': y_reg[train_idx],
+            'y_reg_test': y_reg[test_idx]
+        })
+    return folds
+
+
+def _init_worker(folds):
+    global _cv_folds
+    _cv_folds = folds
+
+
+def evaluate_fold(params, fold_index):
+    """Fit both forests with `params` on one cached fold and score it"""
+    fold = _cv_folds[fold_index]
+    classifier = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+    regressor = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+
+    start = time.perf_counter()
+    classifier.fit(fold['X_train'], fold['y_class_train'])
+    regressor.fit(fold['X_train'], fold['y_reg_train'])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    class_pred = classifier.predict(fold['X_test'])
+    reg_pred = regressor.predict(fold['X_test'])
+    predict_time = time.perf_counter() - start
+
+    y_reg_test = fold['y_reg_test']
+    scores = composite_score(
+        accuracy_score(fold['y_class_test'], class_pred),
+        f1_score(fold['y_class_test'], class_pred, average='weighted'),
+        mean_absolute_error(y_reg_test, reg_pred),
+        y_reg_test.max() - y_reg_test.min()
+    )
+    scores.update({'fit_time': fit_time, 'predict_time': predict_time, 'n_test': len(y_reg_test)})
+    return scores
+
+
+def summarize(params, fold_scores):
+    """Aggregate the per-fold scores of one candidate"""
+    final_scores = np.array([s['final_score'] for s in fold_scores], dtype=float)
+    n_test = sum(s['n_test'] for s in fold_scores)
+    predict_time = sum(s['predict_time'] for s in fold_scores)
+    return {
+        'params': params,
+        'mean_final_score': float(final_scores.mean()),
+        'std_final_score': float(final_scores.std()),
+        'mean_accuracy': float(np.mean([s['accuracy'] for s in fold_scores])),
+        'mean_f1_score': float(np.mean([s['f1_score'] for s in fold_scores])),
+        'mean_reg_score': float(np.mean([s['reg_score'] for s in fold_scores])),
+        'mean_fit_time': float(np.mean([s['fit_time'] for s in fold_scores])),
+        'mean_predict_time': predict_time / len(fold_scores),
+        'predict_us_per_row': 1e6 * predict_time / n_test
+    }
+
+
+def tune(df, param_grid=None, n_folds=5, workers=None, seed=42):
+    """k-fold CV of every parameter combination across a process pool
+
+    Returns one summary per candidate, best composite score first (faster
+    prediction breaks ties).
+    """
+    global _cv_folds
+    candidates = list(ParameterGrid(param_grid or DEFAULT_PARAM_GRID))
+    _cv_folds = build_cv_folds(df, n_folds, seed)
+    tasks = [(params, fold) for params in candidates for fold in range(n_folds)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 0:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(_cv_folds,)) as executor:
+            futures = [executor.submit(evaluate_fold, params, fold) for params, fold in tasks]
+            fold_scores = [future.result() for future in futures]
+    else:
+        fold_scores = [evaluate_fold(params, fold) for params, fold in tasks]
+
+    results = [summarize(params, fold_scores[i * n_folds:(i + 1) * n_folds])
+               for i, params in enumerate(candidates)]
+    results.sort(key=lambda r: (-r['mean_final_score'], r['mean_predict_time']))
+    return results
+
+
+def print_results(results, top=10):
+    """Print the ranking table"""
+    print(f"{'rank':>4}  {'score':>7}  {'±':>6}  {'fit s':>7}  {'pred us/row':>11}  params")
+    for rank, r in enumerate(results[:top], 1):
+        print(f"{rank:>4}  {r['mean_final_score']:7.4f}  {r['std_final_score']:6.4f}  "
+              f"{r['mean_fit_time']:7.2f}  {r['predict_us_per_row']:11.1f}  {r['params']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search ranked by the composite score")
+    parser.add_argument('--n-samples', type=int, default=2000, help="synthetic dataset size (ignored with --data)")
+    parser.add_argument('--data', help="training .csv or .parquet instead of synthetic data")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--grid', help="JSON parameter grid, e.g. '{\"n_estimators\": [50, 100]}'")
+    parser.add_argument('--output', default='tuning_results.json')
+    args = parser.parse_args()
+
+    model = MaterialForecastingModel()
+    if args.data:
+        import pandas as pd
+        df = pd.read_parquet(args.data) if args.data.endswith('.parquet') else pd.read_csv(args.data)
+    else:
+        df = model.create_synthetic_dataset(n_samples=args.n_samples)
+
+    results = tune(df, json.loads(args.grid) if args.grid else None, args.folds, args.workers)
+    print_results(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nTuning results saved to: {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions keyed by canonical project parameters
+
+    Keys are (project_type, region, power_capacity, area) with whitespace
+    normalized and the numbers optionally quantized, so near-identical
+    requests share an entry. Entries are stored per model version, so
+    lookups for the old and new model while a reload rolls out do not evict
+    each other; entries of a retired version simply age out of the LRU.
+    Entries expire after ttl_seconds.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0, power_step=None, area_step=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.power_step = power_step
+        self.area_step = area_step
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _quantize(value, step):
+        value = float(value)
+        if step:
+            value = round(value / step) * step
+        return value + 0.0  # folds -0.0 into 0.0
+
+    def make_key(self, project_type, region, power_capacity, area):
+        """Canonical cache key for one set of project parameters"""
+        return (' '.join(str(project_type).split()),
+                ' '.join(str(region).split()),
+                self._quantize(power_capacity, self.power_step),
+                self._quantize(area, self.area_step))
+
+    def get(self, key, model_version):
+        """Cached value for key under model_version, or None"""
+        key = (model_version, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, key, model_version):
+        """Whether a live entry exists for key, without counting a hit or miss"""
+        with self._lock:
+            entry = self._entries.get((model_version, key))
+            return entry is not None and time.monotonic() < entry[1]
+
+    def put(self, key, value, model_version):
+        """Store value for key, evicting the least recently used entries past max_entries"""
+        key = (model_version, key)
+        with self._lock:
+            # The version most recently cached for, reported by stats()
+            self.model_version = model_version
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, model_version, compute):
+        """Return the cached value, or call compute() and cache its result"""
+        value = self.get(key, model_version)
+        if value is None:
+            value = compute()
+            self.put(key, value, model_version)
+        return value
+
+    def invalidate(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'model_version': self.model_version
+            }
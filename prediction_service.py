@@ -0,0 +1,121 @@
+import json
+import math
+
+from materials import material_name
+
+# Request fields and their defaults, as accepted by /api/predict
+DEFAULT_PROJECT = {
+    'project_type': 'Data Center',
+    'region': 'Maharashtra',
+    'power_capacity': 25,
+    'area': 200000
+}
+
+
+def parse_number(record, field):
+    """A finite float from record[field], or its default"""
+    value = float(record.get(field, DEFAULT_PROJECT[field]))
+    if not math.isfinite(value):
+        raise ValueError(f"{field} must be a finite number, got {value}")
+    return value
+
+
+def parse_project(record):
+    """(project_type, region, power_capacity, area) from one request object, with defaults"""
+    if not isinstance(record, dict):
+        raise TypeError("Each project must be a JSON object")
+    return (record.get('project_type', DEFAULT_PROJECT['project_type']),
+            record.get('region', DEFAULT_PROJECT['region']),
+            parse_number(record, 'power_capacity'),
+            parse_number(record, 'area'))
+
+
+def parse_batch(text, ndjson=False):
+    """Split a batch body into records
+
+    A JSON array gives one record per element. NDJSON gives one record per
+    non-empty line; a line that is not valid JSON becomes a ValueError in its
+    slot, so it is reported for that row alone.
+    """
+    if not ndjson:
+        records = json.loads(text)
+        if not isinstance(records, list):
+            raise ValueError("Batch body must be a JSON array")
+        return records
+
+    records = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            records.append(ValueError(f"Invalid JSON: {e}"))
+    return records
+
+
+def format_prediction(model_version, project, master_item, quantity, confidence):
+    """Response object for one predicted project"""
+    project_type, region, power_capacity, area = project
+    return {
+        'master_item': master_item,
+        'quantity': quantity,
+        'material_name': material_name(master_item),
+        'confidence': confidence,
+        'model_version': model_version,
+        'project_summary': {
+            'type': project_type,
+            'region': region,
+            'power_mw': power_capacity,
+            'area_sqft': area
+        }
+    }
+
+
+def predict_records(records, model):
+    """Predict every record with one vectorized model call
+
+    Returns one result per record, in order, each tagged with its `index`.
+    Rows that cannot be parsed or have unknown categories get an `error`
+    entry instead of failing the batch. A record may also be an exception
+    (see parse_batch), reported as that row's error.
+    """
+    known = {col: set(values) for col, values in model.categories.items()}
+    results = [None] * len(records)
+    valid_rows, projects = [], []
+    for i, record in enumerate(records):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            project = parse_project(record)
+            for col, value in (('project_type', project[0]), ('region', project[1])):
+                if col in known and str(value) not in known[col]:
+                    raise ValueError(f"Unknown {col} {value!r}")
+        except (ValueError, TypeError) as e:
+            results[i] = {'index': i, 'error': str(e)}
+            continue
+        valid_rows.append(i)
+        projects.append(project)
+
+    if projects:
+        master_items, quantities, confidence = model.predict_with_confidence({
+            'project_type': [p[0] for p in projects],
+            'region': [p[1] for p in projects],
+            'power_capacity_mw': [p[2] for p in projects],
+            'area_sqft': [p[3] for p in projects]
+        })
+        for j, i in enumerate(valid_rows):
+            result = {'index': i}
+            result.update(format_prediction(model.version, projects[j], int(master_items[j]),
+                                            int(quantities[j]), round(float(confidence[j]), 4)))
+            results[i] = result
+    return results
+
+
+def iter_predictions(records, model, chunk_size=256):
+    """predict_records over consecutive chunks, yielding each chunk's results as soon as it is done"""
+    for start in range(0, len(records), chunk_size):
+        chunk = predict_records(records[start:start + chunk_size], model)
+        for result in chunk:
+            result['index'] += start
+        yield chunk
@@ -2,6 +2,23 @@ import pandas as pd
 import json
 from datetime import datetime, timedelta
 import numpy as np
+from materials import material_name
+
+# Forecast quantities (QtyShipped) are counted in shipped units, whatever unit the
+# reference plan uses for the material
+FORECAST_UNIT = "units"
+
+# Defaults (cost per shipped unit) for forecast materials (by MasterItemNo) that are
+# not part of the reference plan in default_material_requirements
+MATERIAL_DEFAULTS = {
+    105: {"estimated_cost_per_unit": 2500, "required_for_tasks": ["Flooring & Ceiling"]},
+    106: {"estimated_cost_per_unit": 1800,
+          "required_for_tasks": ["Roofing & Waterproofing", "Exterior Walls & Cladding"]},
+    107: {"estimated_cost_per_unit": 6000, "required_for_tasks": ["Plumbing & Fire Protection"]},
+    108: {"estimated_cost_per_unit": 25000, "required_for_tasks": ["Plumbing & Fire Protection"]},
+    109: {"estimated_cost_per_unit": 12000, "required_for_tasks": ["Windows & Doors Installation"]},
+    110: {"estimated_cost_per_unit": 3500, "required_for_tasks": ["Roofing & Waterproofing"]}
+}
 
 class ProcurementPlan:
     def __init__(self):
@@ -90,12 +107,9 @@ class ProcurementPlan:
             ]
         }
     
-    def create_comprehensive_procurement_plan(self):
-        """Create a comprehensive procurement management plan"""
-        self.load_forecast_data()
-        
-        # Material requirements based on Data Center project (25MW, 200k sq ft)
-        material_requirements = {
+    def default_material_requirements(self):
+        """Material requirements based on Data Center project (25MW, 200k sq ft)"""
+        return {
             "Steel Reinforcement Bars": {
                 "quantity": 160,
                 "unit": "tons",
@@ -133,6 +147,69 @@ class ProcurementPlan:
                 "storage_requirements": "Climate-controlled warehouse"
             }
         }
+    
+    def material_requirements_from_basket(self, material_basket, min_probability=0.05):
+        """Build material requirements from a predicted bill of materials
+        
+        material_basket is the output of MaterialForecastingModel.predict_basket (a
+        DataFrame or list of dicts with MasterItemNo, probability and QtyShipped).
+        Each item's quantity is its expected quantity, probability x QtyShipped,
+        summed over the projects and rounded up; items whose highest probability
+        is below min_probability are left out.
+        
+        Quantities are in shipped units (FORECAST_UNIT). For a material the
+        reference plan measures in another unit (tons, cubic meters, ...) the
+        reference price does not apply: it is kept as reference_unit and
+        reference_cost_per_unit, and estimated_cost_per_unit is 0.
+        """
+        records = material_basket.to_dict('records') if hasattr(material_basket, 'to_dict') else list(material_basket)
+        
+        basket = {}
+        for record in records:
+            item_no = int(record['MasterItemNo'])
+            probability = float(record['probability'])
+            entry = basket.setdefault(item_no, {"quantity": 0.0, "probability": 0.0})
+            entry["quantity"] += probability * int(record['QtyShipped'])
+            entry["probability"] = max(entry["probability"], probability)
+        
+        defaults = self.default_material_requirements()
+        material_requirements = {}
+        for item_no, forecast in sorted(basket.items()):
+            if forecast["probability"] < min_probability:
+                continue
+            name = material_name(item_no)
+            requirements = defaults.get(name)
+            if requirements is None:
+                catalog = MATERIAL_DEFAULTS.get(item_no, {})
+                requirements = {
+                    "unit": FORECAST_UNIT,
+                    "estimated_cost_per_unit": catalog.get("estimated_cost_per_unit", 0),
+                    "critical_path": False,
+                    "required_for_tasks": catalog.get("required_for_tasks", []),
+                    "quality_standards": "As per project specification",
+                    "storage_requirements": "Covered storage"
+                }
+            elif requirements["unit"] != FORECAST_UNIT:
+                requirements = dict(requirements, unit=FORECAST_UNIT, estimated_cost_per_unit=0,
+                                    reference_unit=requirements["unit"],
+                                    reference_cost_per_unit=requirements["estimated_cost_per_unit"])
+            material_requirements[name] = dict(requirements, quantity=int(np.ceil(forecast["quantity"])),
+                                               forecast_probability=round(forecast["probability"], 4))
+        
+        return material_requirements
+    
+    def create_comprehensive_procurement_plan(self, material_basket=None):
+        """Create a comprehensive procurement management plan
+        
+        If material_basket (see material_requirements_from_basket) is given, the
+        requirements come from the forecast instead of the reference project.
+        """
+        self.load_forecast_data()
+        
+        if material_basket is not None:
+            material_requirements = self.material_requirements_from_basket(material_basket)
+        else:
+            material_requirements = self.default_material_requirements()
         
         # Create procurement strategy for each material
         procurement_strategies = {}
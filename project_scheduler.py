@@ -1,212 +1,486 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 import numpy as np
 import json
+from critical_path import IncrementalSchedule, TaskGraph
+import resource_leveling
+from gantt_renderer import DEFAULT_TIME_BUDGET, render_gantt
+from schedule_risk import CRITICAL_TOLERANCE, PERCENTILES, simulate_schedule
+
+DEFAULT_START_DATE = datetime(2024, 1, 1)
+
+# Phases and tasks of the reference data center project; dependencies are task ids
+DATA_CENTER_PHASES = [
+    {
+        "phase": "Project Initiation & Planning",
+        "tasks": [
+            {"name": "Project Charter & Feasibility", "duration": 10, "dependencies": []},
+            {"name": "Site Survey & Geotechnical", "duration": 15, "dependencies": [0]},
+            {"name": "Detailed Design & Engineering", "duration": 30, "dependencies": [1]},
+            {"name": "Permits & Approvals", "duration": 20, "dependencies": [2]},
+            {"name": "Material Procurement Planning", "duration": 10, "dependencies": [2]}
+        ]
+    },
+    {
+        "phase": "Procurement & Contracting",
+        "tasks": [
+            {"name": "Vendor Selection & Contracting", "duration": 15, "dependencies": [4]},
+            {"name": "Material Orders & Delivery Schedule", "duration": 20, "dependencies": [5]},
+            {"name": "Equipment Procurement", "duration": 25, "dependencies": [5]},
+            {"name": "Long Lead Items Ordering", "duration": 35, "dependencies": [5]}
+        ]
+    },
+    {
+        "phase": "Site Preparation",
+        "tasks": [
+            {"name": "Site Clearing & Preparation", "duration": 12, "dependencies": [3]},
+            {"name": "Temporary Facilities Setup", "duration": 8, "dependencies": [9]},
+            {"name": "Access Roads & Utilities", "duration": 15, "dependencies": [9]}
+        ]
+    },
+    {
+        "phase": "Foundation & Structure",
+        "tasks": [
+            {"name": "Excavation & Foundation", "duration": 25, "dependencies": [11, 6]},
+            {"name": "Concrete Work - Foundation", "duration": 20, "dependencies": [12]},
+            {"name": "Steel Structure Assembly", "duration": 30, "dependencies": [13, 6]},
+            {"name": "Concrete Work - Superstructure", "duration": 35, "dependencies": [14]}
+        ]
+    },
+    {
+        "phase": "Building Envelope",
+        "tasks": [
+            {"name": "Roofing & Waterproofing", "duration": 20, "dependencies": [15]},
+            {"name": "Exterior Walls & Cladding", "duration": 25, "dependencies": [15]},
+            {"name": "Windows & Doors Installation", "duration": 15, "dependencies": [17]}
+        ]
+    },
+    {
+        "phase": "MEP Installation",
+        "tasks": [
+            {"name": "Electrical Infrastructure", "duration": 40, "dependencies": [15, 7]},
+            {"name": "HVAC System Installation", "duration": 45, "dependencies": [15, 8]},
+            {"name": "Plumbing & Fire Protection", "duration": 30, "dependencies": [15]},
+            {"name": "Power Distribution & UPS", "duration": 35, "dependencies": [19]}
+        ]
+    },
+    {
+        "phase": "Interior & Finishes",
+        "tasks": [
+            {"name": "Interior Partitions", "duration": 20, "dependencies": [18]},
+            {"name": "Flooring & Ceiling", "duration": 25, "dependencies": [23]},
+            {"name": "Interior Finishes", "duration": 20, "dependencies": [24]}
+        ]
+    },
+    {
+        "phase": "Testing & Commissioning",
+        "tasks": [
+            {"name": "System Integration Testing", "duration": 15, "dependencies": [20, 21, 22]},
+            {"name": "Performance Testing", "duration": 10, "dependencies": [26]},
+            {"name": "Final Inspections", "duration": 8, "dependencies": [25, 27]},
+            {"name": "Documentation & Handover", "duration": 5, "dependencies": [28]}
+        ]
+    }
+]
+
+# Milestones of the reference project and the task whose end marks each (None: the project start)
+DATA_CENTER_MILESTONES = [
+    ("Project Kickoff", None),
+    ("Design Completion", 2),
+    ("Procurement Complete", 8),
+    ("Foundation Complete", 13),
+    ("Structure Complete", 15),
+    ("MEP Complete", 22),
+    ("Project Completion", 29)
+]
+
+# Three-point estimates: (optimistic, pessimistic) durations as multiples of the likely one
+DEFAULT_DURATION_RANGE = (0.8, 1.5)
+DATA_CENTER_DURATION_RANGES = {
+    3: (0.75, 2.0),   # Permits & Approvals
+    6: (0.9, 1.6),    # Material Orders & Delivery Schedule
+    7: (0.9, 1.8),    # Equipment Procurement
+    8: (0.9, 2.0),    # Long Lead Items Ordering
+    12: (0.85, 1.8),  # Excavation & Foundation: ground conditions
+    20: (0.85, 1.6),  # HVAC System Installation
+    26: (0.8, 1.8)    # System Integration Testing
+}
+
+# Crews and equipment of the reference project: units available on any day
+DATA_CENTER_RESOURCES = {
+    "Tower Crane": 1,
+    "Earthmoving Equipment": 1,
+    "Civil Crew": 2,
+    "Steel Crew": 1,
+    "Envelope Crew": 1,
+    "MEP Crew": 2,
+    "Finishing Crew": 1,
+    "Commissioning Team": 1
+}
+
+# Units of each resource a reference task holds while it runs, by task id (tasks not listed need none)
+DATA_CENTER_TASK_RESOURCES = {
+    1: {"Civil Crew": 1},
+    9: {"Civil Crew": 1, "Earthmoving Equipment": 1},
+    10: {"Civil Crew": 1},
+    11: {"Civil Crew": 1, "Earthmoving Equipment": 1},
+    12: {"Civil Crew": 1, "Earthmoving Equipment": 1},
+    13: {"Civil Crew": 2},
+    14: {"Tower Crane": 1, "Steel Crew": 1},
+    15: {"Tower Crane": 1, "Civil Crew": 2},
+    16: {"Tower Crane": 1, "Envelope Crew": 1},
+    17: {"Envelope Crew": 1},
+    18: {"Envelope Crew": 1},
+    19: {"MEP Crew": 1},
+    20: {"MEP Crew": 1, "Tower Crane": 1},
+    21: {"MEP Crew": 1},
+    22: {"MEP Crew": 1},
+    23: {"Finishing Crew": 1},
+    24: {"Finishing Crew": 1},
+    25: {"Finishing Crew": 1},
+    26: {"Commissioning Team": 1},
+    27: {"Commissioning Team": 1}
+}
 
 class ProjectScheduler:
     def __init__(self, project_name="Data Center Construction"):
         self.project_name = project_name
         self.tasks = []
         self.milestones = []
+        self.critical_path = []
+        self.cpm = None
+        self.start_date = None
+        self.pinned_starts = {}
+        self.milestone_tasks = []
+        self.incremental = None
+        self.leveling = None
+        self.resource_schedule = None
+        self.risk = None
+        self.risk_analysis = None
         
-    def create_data_center_schedule(self):
-        """Create a comprehensive project schedule for Data Center construction"""
-        start_date = datetime(2024, 1, 1)
-        
-        # Define project phases and tasks
-        project_phases = [
-            {
-                "phase": "Project Initiation & Planning",
-                "tasks": [
-                    {"name": "Project Charter & Feasibility", "duration": 10, "dependencies": []},
-                    {"name": "Site Survey & Geotechnical", "duration": 15, "dependencies": [0]},
-                    {"name": "Detailed Design & Engineering", "duration": 30, "dependencies": [1]},
-                    {"name": "Permits & Approvals", "duration": 20, "dependencies": [2]},
-                    {"name": "Material Procurement Planning", "duration": 10, "dependencies": [2]}
-                ]
-            },
-            {
-                "phase": "Procurement & Contracting",
-                "tasks": [
-                    {"name": "Vendor Selection & Contracting", "duration": 15, "dependencies": [4]},
-                    {"name": "Material Orders & Delivery Schedule", "duration": 20, "dependencies": [5]},
-                    {"name": "Equipment Procurement", "duration": 25, "dependencies": [5]},
-                    {"name": "Long Lead Items Ordering", "duration": 35, "dependencies": [5]}
-                ]
-            },
-            {
-                "phase": "Site Preparation",
-                "tasks": [
-                    {"name": "Site Clearing & Preparation", "duration": 12, "dependencies": [3]},
-                    {"name": "Temporary Facilities Setup", "duration": 8, "dependencies": [9]},
-                    {"name": "Access Roads & Utilities", "duration": 15, "dependencies": [9]}
-                ]
-            },
-            {
-                "phase": "Foundation & Structure",
-                "tasks": [
-                    {"name": "Excavation & Foundation", "duration": 25, "dependencies": [11, 6]},
-                    {"name": "Concrete Work - Foundation", "duration": 20, "dependencies": [12]},
-                    {"name": "Steel Structure Assembly", "duration": 30, "dependencies": [13, 6]},
-                    {"name": "Concrete Work - Superstructure", "duration": 35, "dependencies": [14]}
-                ]
-            },
-            {
-                "phase": "Building Envelope",
-                "tasks": [
-                    {"name": "Roofing & Waterproofing", "duration": 20, "dependencies": [15]},
-                    {"name": "Exterior Walls & Cladding", "duration": 25, "dependencies": [15]},
-                    {"name": "Windows & Doors Installation", "duration": 15, "dependencies": [17]}
-                ]
-            },
-            {
-                "phase": "MEP Installation",
-                "tasks": [
-                    {"name": "Electrical Infrastructure", "duration": 40, "dependencies": [15, 7]},
-                    {"name": "HVAC System Installation", "duration": 45, "dependencies": [15, 8]},
-                    {"name": "Plumbing & Fire Protection", "duration": 30, "dependencies": [15]},
-                    {"name": "Power Distribution & UPS", "duration": 35, "dependencies": [19]}
-                ]
-            },
-            {
-                "phase": "Interior & Finishes",
-                "tasks": [
-                    {"name": "Interior Partitions", "duration": 20, "dependencies": [18]},
-                    {"name": "Flooring & Ceiling", "duration": 25, "dependencies": [23]},
-                    {"name": "Interior Finishes", "duration": 20, "dependencies": [24]}
-                ]
-            },
-            {
-                "phase": "Testing & Commissioning",
-                "tasks": [
-                    {"name": "System Integration Testing", "duration": 15, "dependencies": [20, 21, 22]},
-                    {"name": "Performance Testing", "duration": 10, "dependencies": [26]},
-                    {"name": "Final Inspections", "duration": 8, "dependencies": [25, 27]},
-                    {"name": "Documentation & Handover", "duration": 5, "dependencies": [28]}
-                ]
-            }
-        ]
+    def create_data_center_schedule(self, start_date=None, size_scale=1.0, duration_overrides=None):
+        """Create a comprehensive project schedule for Data Center construction
         
-        # Calculate task dates
-        task_id = 0
-        current_date = start_date
+        size_scale multiplies every task duration (project size relative to the
+        reference 25 MW facility, at least one day per task); duration_overrides
+        maps task ids or names to durations in days and is applied last.
+        Each task also gets optimistic and pessimistic durations around it
+        for run_risk_analysis().
+        """
+        start_date = start_date or DEFAULT_START_DATE
+        if size_scale <= 0:
+            raise ValueError("size_scale must be positive")
+        overrides = self.resolve_duration_overrides(duration_overrides or {})
+        self.tasks = []
+        self.pinned_starts = {}
+        self.leveling = None
         
-        for phase in project_phases:
+        task_id = 0
+        for phase in DATA_CENTER_PHASES:
             for task in phase["tasks"]:
-                # Calculate start date based on dependencies
-                task_start = start_date
-                if task["dependencies"]:
-                    max_dependency_end = start_date
-                    for dep_id in task["dependencies"]:
-                        if dep_id < len(self.tasks):
-                            dep_end = self.tasks[dep_id]["end_date"]
-                            if dep_end > max_dependency_end:
-                                max_dependency_end = dep_end
-                    task_start = max_dependency_end + timedelta(days=1)
-                
-                task_end = task_start + timedelta(days=task["duration"])
-                
+                duration = overrides.get(task_id, max(1, int(round(task["duration"] * size_scale))))
+                low, high = DATA_CENTER_DURATION_RANGES.get(task_id, DEFAULT_DURATION_RANGE)
                 self.tasks.append({
                     "id": task_id,
                     "name": task["name"],
                     "phase": phase["phase"],
-                    "start_date": task_start,
-                    "end_date": task_end,
-                    "duration": task["duration"],
-                    "dependencies": task["dependencies"]
+                    "duration": duration,
+                    "optimistic_duration": min(duration, max(1, int(round(duration * low)))),
+                    "pessimistic_duration": max(duration, int(round(duration * high))),
+                    "dependencies": task["dependencies"],
+                    "resources": dict(DATA_CENTER_TASK_RESOURCES.get(task_id, {}))
                 })
-                
                 task_id += 1
         
+        # Calculate task dates from the dependency network
+        self.compute_critical_path(start_date)
+        
         # Add milestones
+        self.milestone_tasks = DATA_CENTER_MILESTONES
         self.milestones = [
-            {"name": "Project Kickoff", "date": start_date},
-            {"name": "Design Completion", "date": self.tasks[2]["end_date"]},
-            {"name": "Procurement Complete", "date": self.tasks[8]["end_date"]},
-            {"name": "Foundation Complete", "date": self.tasks[13]["end_date"]},
-            {"name": "Structure Complete", "date": self.tasks[15]["end_date"]},
-            {"name": "MEP Complete", "date": self.tasks[22]["end_date"]},
-            {"name": "Project Completion", "date": self.tasks[-1]["end_date"]}
+            {"name": name, "date": start_date if task_id is None else self.tasks[task_id]["end_date"]}
+            for name, task_id in self.milestone_tasks
         ]
         
         return self.tasks, self.milestones
     
-    def create_gantt_chart(self, save_path="project_gantt_chart.png"):
-        """Create a comprehensive Gantt chart"""
+    def compute_critical_path(self, start_date=None):
+        """Schedule self.tasks with the critical path method
+        
+        Each task starts the day after its latest dependency ends (tasks
+        without dependencies start on start_date) and gets start/end dates,
+        total and free float in days and a critical flag. Dependencies may
+        refer to any task id; unknown ids and cycles raise ValueError.
+        Tasks in pinned_starts start no earlier than their pinned date.
+        Returns the ids of one critical path, first task to last.
+        """
+        if start_date is None:
+            start_date = self.start_date or (min(task["start_date"] for task in self.tasks) if self.tasks
+                                             else DEFAULT_START_DATE)
+        self.start_date = start_date
+        graph, release = self.build_task_graph()
+        self.cpm = graph.solve(release=release)
+        self.incremental = None
+        self.resource_schedule = None
+        
+        # Day offsets to datetimes in one vectorized conversion
+        base = np.datetime64(start_date, "us")
+        starts = (base + self.cpm.early_start.astype("timedelta64[D]")).tolist()
+        ends = (base + self.cpm.early_finish.astype("timedelta64[D]")).tolist()
+        total_float = self.cpm.total_float.tolist()
+        free_float = self.cpm.free_float.tolist()
+        critical = self.cpm.critical.tolist()
+        for i, task in enumerate(self.tasks):
+            task["start_date"] = starts[i]
+            task["end_date"] = ends[i]
+            task["total_float"] = total_float[i]
+            task["free_float"] = free_float[i]
+            task["critical"] = critical[i]
+        
+        self.critical_path = [self.tasks[i]["id"] for i in self.cpm.critical_path()]
+        return self.critical_path
+    
+    def build_task_graph(self):
+        """(TaskGraph of self.tasks, release day of each task from pinned_starts)"""
+        self.task_index = index = {task["id"]: i for i, task in enumerate(self.tasks)}
+        try:
+            dependencies = [[index[dep_id] for dep_id in task["dependencies"]] for task in self.tasks]
+        except KeyError as e:
+            raise ValueError(f"Unknown task in dependencies: {e.args[0]}")
+        release = np.zeros(len(self.tasks), dtype=np.int64)
+        for task_id, date in self.pinned_starts.items():
+            release[self.task_position(task_id)] = (date - self.start_date).days
+        return TaskGraph.from_dependencies([task["duration"] for task in self.tasks], dependencies), release
+    
+    def task_position(self, task_id):
+        """Index in self.tasks of the task with this id"""
+        try:
+            return self.task_index[task_id]
+        except KeyError:
+            raise ValueError(f"Unknown task: {task_id}")
+    
+    def update_task_duration(self, task_id, days):
+        """Change a task's duration and re-date only the tasks downstream of it
+        
+        Like the other incremental updates below, this returns the set of task
+        ids whose start or end date changed. Milestones, float and the
+        critical path are refreshed from the same propagation.
+        """
+        if int(days) < 1:
+            raise ValueError(f"Duration of task {task_id} must be at least 1 day")
+        i = self.task_position(task_id)
+        self.tasks[i]["duration"] = int(days)
+        return self.apply_update(*self.incremental_schedule().set_duration(i, int(days)))
+    
+    def add_dependency(self, task_id, depends_on):
+        """Make a task start after another finishes; a dependency that would close a cycle raises ValueError"""
+        i, dep = self.task_position(task_id), self.task_position(depends_on)
+        update = self.incremental_schedule().add_dependency(i, dep)
+        if depends_on not in self.tasks[i]["dependencies"]:
+            # A fresh list: the reference project's dependency lists are shared
+            self.tasks[i]["dependencies"] = self.tasks[i]["dependencies"] + [depends_on]
+        return self.apply_update(*update, edited=dep)
+    
+    def remove_dependency(self, task_id, depends_on):
+        """Drop a dependency; the task and everything after it may move earlier"""
+        i = self.task_position(task_id)
+        if depends_on not in self.tasks[i]["dependencies"]:
+            raise ValueError(f"Task {task_id} does not depend on task {depends_on}")
+        dep = self.task_position(depends_on)
+        update = self.incremental_schedule().remove_dependency(i, dep)
+        dependencies = list(self.tasks[i]["dependencies"])
+        dependencies.remove(depends_on)
+        self.tasks[i]["dependencies"] = dependencies
+        return self.apply_update(*update, edited=dep)
+    
+    def pin_task_start(self, task_id, date=None):
+        """Keep a task from starting before date (a datetime); date=None removes the pin"""
+        i = self.task_position(task_id)
+        if date is None:
+            self.pinned_starts.pop(task_id, None)
+            day = None
+        else:
+            self.pinned_starts[task_id] = date
+            day = (date - self.start_date).days
+        return self.apply_update(*self.incremental_schedule().pin_start(i, day))
+    
+    def incremental_schedule(self):
+        """The mutable CPM state behind the incremental updates, built from the last full solve"""
+        if self.cpm is None:
+            raise ValueError("No schedule to update; create or compute one first")
+        if self.incremental is None:
+            self.incremental = IncrementalSchedule(self.cpm)
+        return self.incremental
+    
+    def apply_update(self, moved, late_moved, edited=None):
+        """Write the dates and float changed by an incremental update back to self.tasks
+        
+        edited is the predecessor of an added or removed dependency, whose
+        free float changes with its successors even when no date moved.
+        """
+        if self.leveling is not None:
+            # Freed or taken capacity can move tasks anywhere, so a leveled schedule is leveled again
+            before = {task["id"]: (task["start_date"], task["end_date"]) for task in self.tasks}
+            self.compute_critical_path()
+            self.level_resources(*self.leveling)
+            return {task["id"] for task in self.tasks if before[task["id"]] != (task["start_date"], task["end_date"])}
+        
+        schedule = self.incremental
+        base = self.start_date
+        for i in moved:
+            task = self.tasks[i]
+            task["start_date"] = base + timedelta(days=schedule.early_start[i])
+            task["end_date"] = base + timedelta(days=schedule.early_finish[i])
+        
+        # Free float also depends on when the successors start, so predecessors of moved tasks count too
+        touched = set(moved) | late_moved
+        touched.update(p for i in moved for p in schedule.preds[i])
+        if edited is not None:
+            touched.add(edited)
+        for i in touched:
+            task = self.tasks[i]
+            task["total_float"] = schedule.total_float(i)
+            task["free_float"] = schedule.free_float(i)
+            task["critical"] = schedule.is_critical(i)
+        if touched:
+            self.critical_path = [self.tasks[i]["id"] for i in schedule.critical_path()]
+        
+        changed = {self.tasks[i]["id"] for i in moved}
+        self.update_milestones(changed)
+        return changed
+    
+    def update_milestones(self, changed=None):
+        """Re-date the milestones marked by tasks in `changed` (every milestone if None)"""
+        for milestone, (name, task_id) in zip(self.milestones, self.milestone_tasks):
+            if task_id is not None and (changed is None or task_id in changed):
+                milestone["date"] = self.tasks[self.task_position(task_id)]["end_date"]
+    
+    def level_resources(self, capacities=None, priority="least_float"):
+        """Delay tasks until no day needs more crews or equipment than are available
+        
+        Each task's "resources" maps resource names to the units it holds
+        while it runs; capacities maps every resource name to the units that
+        exist (default DATA_CENTER_RESOURCES). Ready tasks are placed one at a
+        time in priority order ("least_float", "longest_path" or
+        "earliest_start"), each at the first day with enough capacity. Task
+        dates and milestones become the leveled ones, leveling_delay_days
+        records how far each task moved, and the schedule stays leveled
+        through later incremental updates. Returns the ResourceSchedule.
+        """
+        if self.cpm is None:
+            self.compute_critical_path()
+        capacities = dict(DATA_CENTER_RESOURCES if capacities is None else capacities)
+        names = list(capacities)
+        column = {name: r for r, name in enumerate(names)}
+        demand = np.zeros((len(self.tasks), len(names)), dtype=np.int64)
+        for i, task in enumerate(self.tasks):
+            for name, units in task.get("resources", {}).items():
+                if name not in column:
+                    raise ValueError(f"Task {task['id']} uses undeclared resource: {name}")
+                demand[i, column[name]] = units
+        
+        schedule = resource_leveling.level_resources(self.cpm.graph, demand, [capacities[name] for name in names],
+                                                     priority, solution=self.cpm, resources=names)
+        base = np.datetime64(self.start_date, "us")
+        starts = (base + schedule.start.astype("timedelta64[D]")).tolist()
+        ends = (base + schedule.finish.astype("timedelta64[D]")).tolist()
+        delay = schedule.delay.tolist()
+        for i, task in enumerate(self.tasks):
+            task["start_date"] = starts[i]
+            task["end_date"] = ends[i]
+            task["leveling_delay_days"] = delay[i]
+        self.update_milestones()
+        self.resource_schedule = schedule
+        self.leveling = (capacities, priority)
+        return schedule
+    
+    def run_risk_analysis(self, n_samples=10000, distribution="pert", chunk_size=None, workers=0, seed=42):
+        """Monte Carlo completion and milestone dates from three-point task durations
+        
+        Every task's duration is drawn between its optimistic_duration and
+        pessimistic_duration around its (likely) duration, from a "pert" or
+        "triangular" distribution, and the network is rescheduled for each of
+        n_samples draws at once (see schedule_risk.simulate_schedule for
+        chunk_size and workers). Resource limits are not simulated. Returns
+        P50/P80/P95 completion and milestone dates, the chance of finishing
+        by the current plan's end date and each task's criticality index
+        (share of samples in which it had no float).
+        """
         if not self.tasks:
             self.create_data_center_schedule()
+        graph, release = self.build_task_graph()
+        likely = [task["duration"] for task in self.tasks]
+        optimistic = [min(task.get("optimistic_duration", days), days) for task, days in zip(self.tasks, likely)]
+        pessimistic = [max(task.get("pessimistic_duration", days), days) for task, days in zip(self.tasks, likely)]
+        milestones = [(name, self.task_position(task_id)) for name, task_id in self.milestone_tasks
+                      if task_id is not None]
+        self.risk = risk = simulate_schedule(graph, optimistic, likely, pessimistic, n_samples, distribution,
+                                             release=release, tracked=[i for _, i in milestones],
+                                             chunk_size=chunk_size, workers=workers, seed=seed)
+        
+        def to_dates(percentiles):
+            # A finish part-way through a day is reported on the day after
+            return {f"P{q}": self.start_date + timedelta(days=int(np.ceil(day - CRITICAL_TOLERANCE)))
+                    for q, day in percentiles.items()}
         
-        # Create figure and axis
-        fig, ax = plt.subplots(1, 1, figsize=(16, 12))
-        
-        # Define colors for different phases
-        phase_colors = {
-            "Project Initiation & Planning": "#FF6B6B",
-            "Procurement & Contracting": "#4ECDC4", 
-            "Site Preparation": "#45B7D1",
-            "Foundation & Structure": "#96CEB4",
-            "Building Envelope": "#FECA57",
-            "MEP Installation": "#FF9FF3",
-            "Interior & Finishes": "#54A0FF",
-            "Testing & Commissioning": "#5F27CD"
+        planned_end = max(task["end_date"] for task in self.tasks)
+        milestone_dates = risk.tracked_percentiles()
+        self.risk_analysis = {
+            "samples": risk.n_samples,
+            "distribution": distribution,
+            "planned_completion": planned_end,
+            "probability_on_time": risk.probability_by((planned_end - self.start_date).days),
+            "completion": to_dates(risk.completion_percentiles(PERCENTILES)),
+            "milestones": {name: to_dates(milestone_dates[i]) for name, i in milestones},
+            "criticality": {task["id"]: index for task, index in zip(self.tasks, risk.criticality.tolist())}
         }
+        return self.risk_analysis
+    
+    def resource_utilization(self):
+        """Daily fraction of each resource's capacity in use on the leveled schedule, one column per resource"""
+        if self.resource_schedule is None:
+            raise ValueError("No leveled schedule; call level_resources() first")
+        schedule = self.resource_schedule
+        dates = pd.date_range(self.start_date, periods=schedule.project_duration, freq="D")
+        return pd.DataFrame(schedule.utilization().T, index=dates, columns=schedule.resources)
+    
+    def resolve_duration_overrides(self, duration_overrides):
+        """Map duration overrides keyed by task id or task name to {task id: days}"""
+        task_ids = {}
+        for phase in DATA_CENTER_PHASES:
+            for task in phase["tasks"]:
+                task_ids[task["name"]] = len(task_ids)
         
-        # Plot tasks
-        for i, task in enumerate(self.tasks):
-            start_date = task["start_date"]
-            duration = task["duration"]
-            phase = task["phase"]
-            
-            # Create horizontal bar
-            ax.barh(i, duration, left=start_date, 
-                   color=phase_colors.get(phase, "#95A5A6"),
-                   alpha=0.8, edgecolor='black', linewidth=0.5)
-            
-            # Add task name
-            ax.text(start_date + timedelta(days=duration/2), i, 
-                   task["name"], ha="center", va="center", 
-                   fontsize=8, fontweight='bold')
-        
-        # Plot milestones
-        for milestone in self.milestones:
-            milestone_date = milestone["date"]
-            ax.axvline(x=milestone_date, color='red', linestyle='--', alpha=0.7)
-            ax.text(milestone_date, len(self.tasks), milestone["name"], 
-                   rotation=45, ha='right', va='bottom', fontsize=9, 
-                   color='red', fontweight='bold')
-        
-        # Customize chart
-        ax.set_yticks(range(len(self.tasks)))
-        ax.set_yticklabels([f"{task['phase'][:15]}..." if len(task['phase']) > 15 
-                           else task['phase'] for task in self.tasks])
-        ax.invert_yaxis()
-        
-        # Format x-axis
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-        
-        # Add grid and labels
-        ax.grid(True, alpha=0.3)
-        ax.set_xlabel('Timeline', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Project Tasks', fontsize=12, fontweight='bold')
-        ax.set_title(f'{self.project_name} - Gantt Chart', 
-                    fontsize=16, fontweight='bold', pad=20)
-        
-        # Create legend
-        legend_elements = [plt.Rectangle((0,0),1,1, facecolor=color, alpha=0.8) 
-                          for phase, color in phase_colors.items()]
-        ax.legend(legend_elements, phase_colors.keys(), 
-                 loc='upper left', bbox_to_anchor=(1.05, 1))
-        
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        print(f"Gantt chart saved as: {save_path}")
-        return fig
+        overrides = {}
+        for key, days in duration_overrides.items():
+            task_id = task_ids.get(key, key)
+            if isinstance(task_id, str) and task_id.isdigit():
+                task_id = int(task_id)
+            if not isinstance(task_id, int) or not 0 <= task_id < len(task_ids):
+                raise ValueError(f"Unknown task: {key}")
+            if int(days) < 1:
+                raise ValueError(f"Duration of task {key} must be at least 1 day")
+            overrides[task_id] = int(days)
+        return overrides
+    
+    def create_gantt_chart(self, save_path="project_gantt_chart.png", fold="auto", expand=(),
+                           time_budget=DEFAULT_TIME_BUDGET, use_cache=True):
+        """Create a comprehensive Gantt chart
+        
+        save_path ends in .png, .svg or .html. Past a few hundred tasks the
+        chart shows one row per phase; expand lists phases to drill into.
+        Rendering stays within time_budget seconds by culling labels, and an
+        unchanged schedule is served from the render cache (see
+        gantt_renderer.render_gantt, whose summary this returns).
+        """
+        if not self.tasks:
+            self.create_data_center_schedule()
+        
+        result = render_gantt(self.tasks, self.milestones, save_path, f"{self.project_name} - Gantt Chart",
+                              fold=fold, expand=expand, time_budget=time_budget, use_cache=use_cache)
+        
+        print(f"Gantt chart saved as: {save_path}" + (" (unchanged, from cache)" if result["cached"] else ""))
+        return result
     
     def export_to_csv(self, filename="project_schedule.csv"):
         """Export schedule to CSV format"""
@@ -222,7 +496,11 @@ class ProjectScheduler:
                 "Start_Date": task["start_date"].strftime("%Y-%m-%d"),
                 "End_Date": task["end_date"].strftime("%Y-%m-%d"),
                 "Duration_Days": task["duration"],
-                "Dependencies": ",".join(map(str, task["dependencies"]))
+                "Dependencies": ",".join(map(str, task["dependencies"])),
+                "Total_Float_Days": task.get("total_float"),
+                "Free_Float_Days": task.get("free_float"),
+                "Critical": task.get("critical"),
+                "Leveling_Delay_Days": task.get("leveling_delay_days")
             })
         
         df = pd.DataFrame(schedule_data)
@@ -253,6 +531,7 @@ class ProjectScheduler:
             "project_name": self.project_name,
             "tasks": tasks_json,
             "milestones": milestones_json,
+            "critical_path": self.critical_path,
             "total_duration_days": (self.tasks[-1]["end_date"] - self.tasks[0]["start_date"]).days
         }
         
@@ -303,6 +582,34 @@ class ProjectScheduler:
         for phase, info in phases.items():
             actual_duration = (info["end"] - info["start"]).days
             print(f"{phase}: {info['tasks']} tasks, {actual_duration} days")
+        
+        if self.critical_path:
+            tasks_by_id = {task["id"]: task for task in self.tasks}
+            print(f"\nCRITICAL PATH ({len(self.critical_path)} tasks, zero float):")
+            print(f"{'-'*40}")
+            for task_id in self.critical_path:
+                task = tasks_by_id[task_id]
+                print(f"{task['start_date'].strftime('%Y-%m-%d')}: {task['name']} ({task['duration']} days)")
+        
+        if self.risk_analysis is not None:
+            risk = self.risk_analysis
+            print(f"\nSCHEDULE RISK ({risk['samples']:,} {risk['distribution']} samples):")
+            print(f"{'-'*40}")
+            for name, date in risk["completion"].items():
+                print(f"{name} completion: {date.strftime('%Y-%m-%d')}")
+            print(f"Chance of finishing by {risk['planned_completion'].strftime('%Y-%m-%d')}: "
+                  f"{risk['probability_on_time']:.0%}")
+            tasks_by_id = {task["id"]: task for task in self.tasks}
+            most_critical = sorted(risk["criticality"].items(), key=lambda item: -item[1])[:5]
+            for task_id, index in most_critical:
+                print(f"Critical in {index:.0%} of samples: {tasks_by_id[task_id]['name']}")
+        
+        if self.resource_schedule is not None:
+            utilization = self.resource_utilization()
+            print(f"\nRESOURCE UTILIZATION ({self.leveling[1]} priority):")
+            print(f"{'-'*40}")
+            for name in utilization.columns:
+                print(f"{name}: peak {utilization[name].max():.0%}, mean {utilization[name].mean():.0%}")
 
 def main():
     # Create project scheduler
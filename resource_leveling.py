@@ -0,0 +1,132 @@
+import heapq
+
+import numpy as np
+
+from critical_path import DEFAULT_LAG
+
+# Ordering of the tasks that are ready to start, as (primary, tie-break) sort keys: lower goes first
+PRIORITY_RULES = {
+    # Tasks with the least slack first
+    'least_float': lambda solution: (solution.total_float, solution.late_start),
+    # Tasks heading the longest remaining chain first (late start = project end - that chain)
+    'longest_path': lambda solution: (solution.late_start, solution.total_float),
+    'earliest_start': lambda solution: (solution.early_start, solution.total_float)
+}
+
+
+def priority_rank(solution, priority='least_float'):
+    """Rank of every task under a priority rule name or a callable returning sort keys from a CriticalPath"""
+    rule = PRIORITY_RULES.get(priority) if isinstance(priority, str) else priority
+    if rule is None:
+        raise ValueError(f"Unknown priority rule: {priority}; expected one of {', '.join(PRIORITY_RULES)}")
+    keys = rule(solution)
+    keys = (keys,) if isinstance(keys, np.ndarray) else tuple(keys)
+    # Task index as the last tie-break keeps the schedule deterministic
+    order = np.lexsort((np.arange(len(solution.graph)),) + keys[::-1])
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def level_resources(graph, demand, capacity, priority='least_float', lag=DEFAULT_LAG, release=None,
+                    solution=None, resources=None):
+    """Resource-feasible schedule of a TaskGraph by a serial list scheduler
+
+    demand[v, r] is how many units of resource r task v holds on every day it
+    runs and capacity[r] how many units exist. Tasks become ready once all
+    their predecessors are placed; the ready task ranked first by `priority`
+    is placed at the earliest day that respects its dependencies, its release
+    day and the capacity left on every day it runs. Returns a ResourceSchedule.
+    """
+    demand = np.asarray(demand, dtype=np.int64).reshape(len(graph), -1)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    if demand.shape[1] != len(capacity):
+        raise ValueError(f"Demand covers {demand.shape[1]} resources but {len(capacity)} capacities were given")
+    resources = list(resources) if resources is not None else [str(r) for r in range(len(capacity))]
+    over = np.argwhere(demand > capacity)
+    if len(over):
+        v, r = over[0]
+        raise ValueError(f"Task {v} needs {demand[v, r]} units of {resources[r]} but only {capacity[r]} exist")
+    if solution is None:
+        solution = graph.solve(lag, release=release)
+
+    n = len(graph)
+    rank = priority_rank(solution, priority).tolist()
+    durations = graph.durations.tolist()
+    succ_ptr, succ_idx = graph.succ_ptr.tolist(), graph.succ_idx.tolist()
+    indegree = np.diff(graph.pred_ptr).tolist()
+    tasks, cols = np.nonzero(demand)
+    uses = [[] for _ in range(n)]
+    for v, r, units in zip(tasks.tolist(), cols.tolist(), demand[tasks, cols].tolist()):
+        uses[v].append((r, units))
+    room = capacity - demand.sum(axis=0)
+
+    # usage[r, day] grows as tasks are placed; the CPM length is a lower bound on the horizon
+    usage = np.zeros((len(capacity), max(2 * solution.project_duration, 1)), dtype=np.int64)
+    earliest = solution.release.tolist()
+    start, finish = [0] * n, [0] * n
+    ready = [(rank[v], v) for v in range(n) if indegree[v] == 0]
+    heapq.heapify(ready)
+    while ready:
+        _, v = heapq.heappop(ready)
+        t, duration = earliest[v], durations[v]
+        # A resource with capacity for all of its tasks at once can never push a start back
+        contended = [(r, units) for r, units in uses[v] if room[r] < 0] if duration else []
+        if contended:
+            while True:
+                if t + duration > usage.shape[1]:
+                    usage = np.pad(usage, ((0, 0), (0, max(usage.shape[1], t + duration))))
+                # Jump past the last day in the window without room: no earlier start avoids it
+                conflict = -1
+                for r, units in contended:
+                    full = np.flatnonzero(usage[r, t:t + duration] > capacity[r] - units)
+                    if len(full) and full[-1] > conflict:
+                        conflict = full[-1]
+                if conflict < 0:
+                    break
+                t += int(conflict) + 1
+            for r, units in contended:
+                usage[r, t:t + duration] += units
+        start[v], finish[v] = t, t + duration
+        for s in succ_idx[succ_ptr[v]:succ_ptr[v + 1]]:
+            if t + duration + lag > earliest[s]:
+                earliest[s] = t + duration + lag
+            indegree[s] -= 1
+            if indegree[s] == 0:
+                heapq.heappush(ready, (rank[s], s))
+
+    return ResourceSchedule(solution, np.array(start, dtype=np.int64), np.array(finish, dtype=np.int64),
+                            demand, capacity, resources, priority)
+
+
+class ResourceSchedule:
+    """Start and finish days of a resource-leveled schedule and the resource usage it implies
+
+    delay is how many days each task starts after its unconstrained CPM
+    early start. usage[r, day] counts the units of resource r in use on each
+    day from 0 to the project end.
+    """
+
+    def __init__(self, solution, start, finish, demand, capacity, resources, priority):
+        self.solution = solution
+        self.start = start
+        self.finish = finish
+        self.capacity = capacity
+        self.resources = resources
+        self.priority = priority
+        self.project_duration = int(finish.max()) if len(finish) else 0
+        self.delay = start - solution.early_start
+
+        # Difference array: +units on the first day of a task, -units the day after it ends
+        change = np.zeros((len(capacity), self.project_duration + 1), dtype=np.int64)
+        tasks, cols = np.nonzero(demand)
+        np.add.at(change, (cols, start[tasks]), demand[tasks, cols])
+        np.add.at(change, (cols, finish[tasks]), -demand[tasks, cols])
+        self.usage = np.cumsum(change, axis=1)[:, :self.project_duration]
+
+    def utilization(self):
+        """Fraction of each resource's capacity in use per day, shape (resources, days)"""
+        return self.usage / np.maximum(self.capacity, 1)[:, None]
+
+    def is_feasible(self):
+        return bool((self.usage <= self.capacity[:, None]).all())
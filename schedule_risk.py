@@ -0,0 +1,139 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from critical_path import DEFAULT_LAG
+
+DISTRIBUTIONS = ('pert', 'triangular')
+PERCENTILES = (50, 80, 95)
+# Working memory per simulated chunk: three float64 (tasks x samples) matrices
+CHUNK_BYTES = 256 * 2 ** 20
+# Float below which a task counts as critical in a sample, in days
+CRITICAL_TOLERANCE = 1e-6
+
+
+def sample_durations(rng, optimistic, likely, pessimistic, n_samples, distribution='pert'):
+    """(tasks, n_samples) matrix of durations drawn from each task's three-point estimate
+
+    'pert' is the beta-PERT distribution (mean (o + 4m + p) / 6); 'triangular'
+    is sampled by inverting its CDF. A task with o == p always takes o.
+    """
+    low = np.asarray(optimistic, dtype=np.float64)[:, None]
+    mode = np.asarray(likely, dtype=np.float64)[:, None]
+    width = np.asarray(pessimistic, dtype=np.float64)[:, None] - low
+    safe_width = np.where(width > 0, width, 1.0)
+    if distribution == 'pert':
+        alpha = 1 + 4 * (mode - low) / safe_width
+        beta = 1 + 4 * (low + width - mode) / safe_width
+        return low + width * rng.beta(alpha, beta, size=(len(low), n_samples))
+    if distribution == 'triangular':
+        u = rng.random((len(low), n_samples))
+        split = (mode - low) / safe_width
+        rising = low + np.sqrt(u * width * (mode - low))
+        falling = low + width - np.sqrt((1 - u) * width * (low + width - mode))
+        return np.where(u < split, rising, falling)
+    raise ValueError(f"Unknown distribution: {distribution}; expected one of {', '.join(DISTRIBUTIONS)}")
+
+
+def simulate_chunk(graph, order, optimistic, likely, pessimistic, n_samples, distribution, lag, release,
+                   tracked, seed):
+    """Forward and backward passes over one chunk of samples
+
+    Returns (project finish per sample, finish of each tracked task per
+    sample, how many samples each task was critical in).
+    """
+    rng = np.random.default_rng(seed)
+    durations = sample_durations(rng, optimistic, likely, pessimistic, n_samples, distribution)
+    succ_ptr, succ_idx = graph.succ_ptr.tolist(), graph.succ_idx.tolist()
+
+    # Forward: finish holds each task's start until the task is reached in topological order
+    finish = np.repeat(release.astype(np.float64)[:, None], n_samples, axis=1)
+    for v in order:
+        finish[v] += durations[v]
+        ready = finish[v] + lag
+        for s in succ_idx[succ_ptr[v]:succ_ptr[v + 1]]:
+            np.maximum(finish[s], ready, out=finish[s])
+    completion = finish.max(axis=0) if len(order) else np.zeros(n_samples)
+
+    # Backward: late finish pulled back from successors' late starts
+    late = np.repeat(completion[None, :], len(order), axis=0)
+    for v in reversed(order):
+        for s in succ_idx[succ_ptr[v]:succ_ptr[v + 1]]:
+            np.minimum(late[v], late[s] - durations[s] - lag, out=late[v])
+    late -= finish
+    critical_counts = (late <= CRITICAL_TOLERANCE).sum(axis=1)
+    return completion, finish[list(tracked)], critical_counts
+
+
+def simulate_schedule(graph, optimistic, likely, pessimistic, n_samples=10000, distribution='pert',
+                      lag=DEFAULT_LAG, release=None, tracked=(), chunk_size=None, workers=0, seed=0):
+    """Monte Carlo CPM of a TaskGraph with three-point task durations
+
+    Samples are simulated in chunks of chunk_size (by default as many as fit
+    in CHUNK_BYTES) and, with workers > 0 (None: one per CPU), chunks run in
+    a process pool. Every chunk draws from its own seed spawned from `seed`,
+    so results do not depend on the number of workers. tracked lists task
+    indices whose finish samples are kept, e.g. milestone tasks. Returns a
+    ScheduleRisk.
+    """
+    optimistic, likely, pessimistic = (np.asarray(x, dtype=np.float64) for x in (optimistic, likely, pessimistic))
+    if not (len(optimistic) == len(likely) == len(pessimistic) == len(graph)):
+        raise ValueError("Need one optimistic, likely and pessimistic duration per task")
+    if (optimistic > likely).any() or (likely > pessimistic).any() or (optimistic < 0).any():
+        raise ValueError("Durations must satisfy 0 <= optimistic <= likely <= pessimistic")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}; expected one of {', '.join(DISTRIBUTIONS)}")
+    if n_samples < 1:
+        raise ValueError("n_samples must be at least 1")
+    release = np.zeros(len(graph), dtype=np.int64) if release is None else np.maximum(release, 0)
+    order = graph.topological_order().tolist()
+
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_BYTES // (3 * 8 * max(len(graph), 1)))
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(graph, order, optimistic, likely, pessimistic, size, distribution, lag, release, tracked, chunk_seed)
+            for size, chunk_seed in zip(sizes, seeds)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 0 and len(args) > 1:
+        with ProcessPoolExecutor(min(workers, len(args))) as executor:
+            futures = [executor.submit(simulate_chunk, *chunk) for chunk in args]
+            results = [future.result() for future in futures]
+    else:
+        results = [simulate_chunk(*chunk) for chunk in args]
+
+    completion = np.concatenate([result[0] for result in results])
+    tracked_finish = np.concatenate([result[1] for result in results], axis=1)
+    criticality = sum(result[2] for result in results) / n_samples
+    return ScheduleRisk(completion, tracked_finish, criticality, list(tracked), distribution)
+
+
+class ScheduleRisk:
+    """Sampled project finish, tracked task finishes and criticality indices
+
+    Times are days from the project start, as in CriticalPath. criticality[v]
+    is the fraction of samples in which task v had no float.
+    """
+
+    def __init__(self, completion, tracked_finish, criticality, tracked, distribution):
+        self.completion = completion
+        self.tracked_finish = tracked_finish
+        self.criticality = criticality
+        self.tracked = tracked
+        self.distribution = distribution
+        self.n_samples = len(completion)
+
+    def completion_percentiles(self, percentiles=PERCENTILES):
+        """{percentile: project finish day}"""
+        return dict(zip(percentiles, np.percentile(self.completion, percentiles).tolist()))
+
+    def tracked_percentiles(self, percentiles=PERCENTILES):
+        """{tracked task index: {percentile: finish day}}"""
+        values = np.percentile(self.tracked_finish, percentiles, axis=1).T.tolist() if self.tracked else []
+        return {v: dict(zip(percentiles, row)) for v, row in zip(self.tracked, values)}
+
+    def probability_by(self, day):
+        """Fraction of samples in which the project finishes by `day`"""
+        return float((self.completion <= day + CRITICAL_TOLERANCE).mean())
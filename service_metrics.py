@@ -0,0 +1,168 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds; wide enough for a cached lookup and for a 1000-row batch
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+METRIC_HELP = {
+    'api_requests_total': ('counter', "Requests served, by endpoint and status code"),
+    'api_request_errors_total': ('counter', "Requests answered with a 4xx or 5xx status, by endpoint"),
+    'api_requests_in_flight': ('gauge', "Requests currently being served, by endpoint"),
+    'api_request_duration_seconds': ('histogram', "Time from a parsed request to its response being written"),
+    'api_inference_seconds': ('histogram', "Time spent in model inference"),
+    'api_serialization_seconds': ('histogram', "Time spent encoding response bodies"),
+    'api_microbatch_size': ('histogram', "Requests grouped into one micro-batch dispatch"),
+    'api_microbatch_queue_seconds': ('histogram', "Time a request waited for its micro-batch to be dispatched")
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket, cumulated when rendered"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by (metric name, sorted label pairs)
+
+    Updates are a dict lookup and an add under one lock. Worker processes
+    record into their own registry and hand the accumulated samples to the
+    server with drain(), which the server folds in with merge().
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_gauge(self, name, amount, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_request(self, endpoint, status, seconds):
+        """Count one finished request and its latency"""
+        self.inc('api_requests_total', endpoint=endpoint, status=str(status))
+        if status >= 400:
+            self.inc('api_request_errors_total', endpoint=endpoint)
+        self.observe('api_request_duration_seconds', seconds, endpoint=endpoint)
+
+    def drain(self):
+        """Counters and histograms recorded since the last drain, resetting them (gauges stay)"""
+        with self._lock:
+            counters, histograms = self.counters, self.histograms
+            self.counters, self.histograms = {}, {}
+        return {'counters': counters, 'histograms': histograms}
+
+    def merge(self, samples):
+        """Add samples from another registry's drain()"""
+        with self._lock:
+            for key, value in samples['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, other in samples['histograms'].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(other.buckets)
+                histogram.merge(other)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            series = {}
+            for key, value in self.counters.items():
+                series.setdefault(key[0], []).append((key[1], value))
+            for key, value in self.gauges.items():
+                series.setdefault(key[0], []).append((key[1], value))
+            for key, histogram in self.histograms.items():
+                series.setdefault(key[0], []).append((key[1], (list(histogram.counts), histogram.sum,
+                                                               histogram.count, histogram.buckets)))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series[name], key=lambda item: item[0]):
+                if kind != 'histogram':
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+                    continue
+                counts, total, count, buckets = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """The metrics registry of this process"""
+    return _metrics
+
+
+def reset_metrics():
+    """Give this process an empty registry, e.g. in a forked worker that inherited the parent's samples"""
+    global _metrics
+    _metrics = MetricsRegistry()
+    return _metrics
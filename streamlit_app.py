@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import requests
 from datetime import datetime, timedelta
 import json
+from forest_inference import UnsupportedModelError
+from materials import material_name
+from model_registry import ModelRegistry, reload_interval
+from prediction_cache import PredictionCache
 
 # Page configuration
 st.set_page_config(
@@ -42,60 +45,60 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_model_registry():
+    """Model registry of this server process; a retrained model is picked up without a restart"""
+    registry = ModelRegistry(handle_unknown='fallback')
+    registry.start_watcher(reload_interval())
+    return registry
+
+@st.cache_resource
+def get_prediction_cache():
+    """Prediction cache shared by all sessions of this server process"""
+    return PredictionCache(max_entries=1024, ttl_seconds=3600)
+
 class MaterialForecastingApp:
     def __init__(self):
         self.model = None
         self.load_model()
     
     def load_model(self):
-        """Load the trained model"""
+        """Load the trained model (this run keeps the version that is active now)"""
         try:
-            with open('material_forecasting_model.pkl', 'rb') as f:
-                model_data = pickle.load(f)
-            self.model = model_data
+            self.model = get_model_registry().get()
             return True
         except FileNotFoundError:
             st.error("Model file not found. Please train the model first.")
             return False
+        except UnsupportedModelError as e:
+            st.error(f"The trained model cannot be served: {e}")
+            return False
     
     def predict_materials(self, project_data):
         """Make material predictions"""
         if not self.model:
             return None, None
         
-        # Prepare input data
-        df = pd.DataFrame([project_data])
-        
-        # Encode categorical variables
-        for col in ['project_type', 'region']:
-            if col in self.model['label_encoders']:
-                df[col + '_encoded'] = self.model['label_encoders'][col].transform(df[col])
-        
-        # Select features
-        X = df[self.model['feature_columns']]
-        X_scaled = self.model['scaler'].transform(X)
+        cache = get_prediction_cache()
+        key = cache.make_key(project_data['project_type'], project_data['region'],
+                             project_data['power_capacity_mw'], project_data['area_sqft'])
+        return cache.get_or_compute(key, self.model.version, lambda: self._predict_uncached(project_data))
+    
+    def _predict_uncached(self, project_data):
+        """Run the model for one project"""
+        # Encode and scale features straight from the form values (unknown categories fall back)
+        X_scaled = self.model.transform(project_data)
         
-        # Make predictions
-        master_item_pred = self.model['classifier'].predict(X_scaled)[0]
-        qty_pred = max(1, int(self.model['regressor'].predict(X_scaled)[0]))
+        # Make predictions with the flattened forests (same outputs as the sklearn models)
+        master_items, quantities = self.model.engine.predict(X_scaled)
+        master_item_pred = master_items[0]
+        qty_pred = max(1, int(quantities[0]))
         
         return master_item_pred, qty_pred
     
     def get_material_name(self, master_item_no):
         """Get material name from item number"""
-        materials = {
-            101: 'Steel Reinforcement Bars',
-            102: 'Concrete Mix',
-            103: 'Electrical Cables',
-            104: 'HVAC Equipment',
-            105: 'Flooring Materials',
-            106: 'Insulation Materials',
-            107: 'Piping Systems',
-            108: 'Fire Safety Equipment',
-            109: 'Glass Panels',
-            110: 'Roofing Materials'
-        }
-        return materials.get(master_item_no, f'Material {master_item_no}')
+        return material_name(master_item_no)
 
 def main():
     app = MaterialForecastingApp()
@@ -147,7 +150,8 @@ def show_forecasting_page(app):
                     'master_item': master_item,
                     'quantity': quantity,
                     'material_name': app.get_material_name(master_item),
-                    'project_data': project_data
+                    'project_data': project_data,
+                    'model_version': app.model.version
                 }
     
     with col2:
@@ -161,6 +165,7 @@ def show_forecasting_page(app):
                 <p><strong>Material:</strong> {result['material_name']}</p>
                 <p><strong>Item Number:</strong> {result['master_item']}</p>
                 <p><strong>Quantity:</strong> {result['quantity']} units</p>
+                <p><strong>Model Version:</strong> {result.get('model_version', 'unknown')}</p>
             </div>
             """, unsafe_allow_html=True)
             
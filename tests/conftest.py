@@ -0,0 +1,69 @@
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope='session')
+def trained_model():
+    """A MaterialForecastingModel with small forests trained on synthetic data"""
+    from material_forecasting import MaterialForecastingModel
+
+    model = MaterialForecastingModel()
+    for forest in (model.classifier, model.regressor, model.item_regressor):
+        forest.set_params(n_estimators=10)
+    model.train(model.create_synthetic_dataset(600), basket=True)
+    return model
+
+
+@pytest.fixture(scope='session')
+def artifact_dir(trained_model, tmp_path_factory):
+    dirpath = str(tmp_path_factory.mktemp('artifact'))
+    trained_model.save_artifact(dirpath)
+    return dirpath
+
+
+@pytest.fixture(scope='session')
+def other_model():
+    """A second small model whose artifact has a different version than trained_model's"""
+    from material_forecasting import MaterialForecastingModel
+
+    model = MaterialForecastingModel()
+    for forest in (model.classifier, model.regressor, model.item_regressor):
+        forest.set_params(n_estimators=5)
+    model.train(model.create_synthetic_dataset(300))
+    return model
+
+
+@pytest.fixture
+def api_server(artifact_dir):
+    """Start api_server.py on a free port; returns a function taking extra CLI args (and environment
+    overrides as keywords) and giving (host, port)"""
+    processes = []
+
+    def start(*args, **env):
+        env = {**os.environ, 'MODEL_ARTIFACT_DIR': artifact_dir, 'MODEL_RELOAD_INTERVAL': '0', **env}
+        process = subprocess.Popen([sys.executable, '-u', os.path.join(REPO_ROOT, 'api_server.py'), '--port', '0',
+                                    *args], cwd=REPO_ROOT, env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True)
+        processes.append(process)
+        for line in process.stdout:
+            if line.startswith('Serving '):
+                address = line.split('http://', 1)[1].split()[0]
+                host, port = address.rsplit(':', 1)
+                return host, int(port)
+        raise RuntimeError(f"api_server.py exited with {process.wait()}")
+
+    yield start
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.communicate(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
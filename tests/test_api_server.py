@@ -0,0 +1,65 @@
+import http.client
+import json
+import socket
+
+import pytest
+
+RECORDS = [{'project_type': 'Data Center', 'power_capacity': 10 + i % 40, 'area': 50000 + 100 * i}
+           for i in range(1000)]
+
+
+def read_raw_response(host, port, request):
+    """Raw bytes of the response to a request that closes the connection, read until the server closes"""
+    with socket.create_connection((host, port), timeout=30) as sock:
+        sock.sendall(request)
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return data
+            data += chunk
+
+
+@pytest.mark.parametrize('workers', ['0', '2'])
+def test_batch_prediction_streams_chunked_on_http11(api_server, workers):
+    host, port = api_server('--workers', workers)
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    for _ in range(2):
+        connection.request('POST', '/api/predict', json.dumps(RECORDS), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+        assert response.getheader('Content-Length') is None
+        assert response.getheader('X-Model-Version')
+        lines = response.read().decode().splitlines()
+        assert len(lines) == len(RECORDS)
+        assert all('error' not in json.loads(line) for line in lines)
+
+    # The connection stays usable after a streamed response
+    connection.request('GET', '/api/vendors')
+    response = connection.getresponse()
+    assert response.status == 200 and response.getheader('Content-Length')
+    response.read()
+
+
+@pytest.mark.parametrize('workers', ['0', '2'])
+def test_batch_prediction_is_buffered_on_http10(api_server, workers):
+    host, port = api_server('--workers', workers)
+    body = json.dumps(RECORDS[:50]).encode()
+    raw = read_raw_response(host, port, b'POST /api/predict HTTP/1.0\r\nContent-Type: application/json\r\n'
+                            b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200')
+    assert b'chunked' not in head.lower()
+    assert f'Content-Length: {len(payload)}'.encode() in head
+    assert len(payload.decode().splitlines()) == 50
+
+
+def test_connection_close_after_streamed_response(api_server):
+    host, port = api_server('--workers', '2')
+    body = json.dumps(RECORDS[:300]).encode()
+    raw = read_raw_response(host, port, b'POST /api/predict HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                            b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    assert b'Transfer-Encoding: chunked' in head and b'Connection: close' in head
+    assert payload.endswith(b'\r\n0\r\n\r\n')
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import batch_predict
+from batch_predict import checkpoint_path, run_batch_prediction
+
+CHUNK_SIZE = 50
+
+
+@pytest.fixture
+def input_csv(trained_model, tmp_path):
+    path = str(tmp_path / 'projects.csv')
+    trained_model.create_synthetic_dataset(420).drop(columns=['MasterItemNo', 'QtyShipped']).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def fresh_model(monkeypatch):
+    monkeypatch.setattr(batch_predict, '_model', None)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def interrupted_run(monkeypatch, input_csv, output_path, artifact_dir, after_chunks):
+    """Run until predict_chunk fails on chunk after_chunks + 1, leaving a checkpoint behind"""
+    predict_chunk = batch_predict.predict_chunk
+    calls = []
+
+    def failing_predict_chunk(chunk):
+        calls.append(chunk)
+        if len(calls) > after_chunks:
+            raise KeyboardInterrupt
+        return predict_chunk(chunk)
+
+    monkeypatch.setattr(batch_predict, 'predict_chunk', failing_predict_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        run_batch_prediction(input_csv, output_path, artifact_dir, CHUNK_SIZE, workers=0)
+    monkeypatch.setattr(batch_predict, 'predict_chunk', predict_chunk)
+
+
+def test_resume_matches_an_uninterrupted_run(monkeypatch, input_csv, artifact_dir, tmp_path):
+    expected_path = str(tmp_path / 'expected.csv')
+    run_batch_prediction(input_csv, expected_path, artifact_dir, CHUNK_SIZE, workers=0)
+
+    output_path = str(tmp_path / 'predictions.csv')
+    interrupted_run(monkeypatch, input_csv, output_path, artifact_dir, after_chunks=3)
+    assert os.path.exists(checkpoint_path(output_path))
+    # A partial write after the last checkpoint is dropped on resume
+    with open(output_path, 'ab') as f:
+        f.write(b'999,10')
+
+    stats = run_batch_prediction(input_csv, output_path, artifact_dir, CHUNK_SIZE, workers=0, resume=True)
+    assert stats['rows_written'] == 420 and stats['rows_this_run'] == 420 - 3 * CHUNK_SIZE
+    assert read(output_path) == read(expected_path)
+    assert not os.path.exists(checkpoint_path(output_path))
+
+
+def test_resume_without_output_starts_over(monkeypatch, input_csv, artifact_dir, tmp_path):
+    output_path = str(tmp_path / 'predictions.csv')
+    interrupted_run(monkeypatch, input_csv, output_path, artifact_dir, after_chunks=2)
+    os.remove(output_path)
+
+    stats = run_batch_prediction(input_csv, output_path, artifact_dir, CHUNK_SIZE, workers=0, resume=True)
+    assert stats['rows_written'] == stats['rows_this_run'] == 420
+    assert read(output_path).count(b'\n') == 421
@@ -0,0 +1,162 @@
+import copy
+import random
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from critical_path import CycleError, IncrementalSchedule, TaskGraph
+from project_scheduler import ProjectScheduler
+
+FIELDS = ('start_date', 'end_date', 'total_float', 'free_float', 'critical')
+
+
+def random_dag(rng, n):
+    """Durations and predecessor lists of a random DAG over a shuffled task numbering"""
+    durations = [rng.randint(0, 9) for _ in range(n)]
+    perm = list(range(n))
+    rng.shuffle(perm)
+    dependencies = [[] for _ in range(n)]
+    for _ in range(rng.randint(0, 2 * n)):
+        a, b = sorted(rng.sample(range(n), 2))
+        if perm[a] not in dependencies[perm[b]]:
+            dependencies[perm[b]].append(perm[a])
+    return durations, dependencies
+
+
+def reference_cpm(durations, dependencies, lag=1, release=None):
+    """Textbook CPM by relaxing until nothing changes"""
+    n = len(durations)
+    release = release if release is not None else [0] * n
+    early_start = list(release)
+    changed = True
+    while changed:
+        changed = False
+        for v in range(n):
+            start = max([early_start[p] + durations[p] + lag for p in dependencies[v]] + [release[v]])
+            if start != early_start[v]:
+                early_start[v], changed = start, True
+    early_finish = [s + d for s, d in zip(early_start, durations)]
+    end = max(early_finish)
+    successors = [[s for s in range(n) if v in dependencies[s]] for v in range(n)]
+    late_finish = [end] * n
+    changed = True
+    while changed:
+        changed = False
+        for v in range(n):
+            finish = min([late_finish[s] - durations[s] - lag for s in successors[v]] + [end])
+            if finish != late_finish[v]:
+                late_finish[v], changed = finish, True
+    free_float = [min([early_start[s] for s in successors[v]] + [end + lag]) - lag - early_finish[v]
+                  for v in range(n)]
+    return early_start, early_finish, late_finish, free_float, end
+
+
+def test_solve_matches_reference():
+    rng = random.Random(0)
+    for _ in range(100):
+        n = rng.randint(2, 30)
+        durations, dependencies = random_dag(rng, n)
+        release = [rng.choice([0, 0, rng.randint(1, 20)]) for _ in range(n)]
+        solution = TaskGraph.from_dependencies(durations, dependencies).solve(release=np.array(release))
+        early_start, early_finish, late_finish, free_float, end = reference_cpm(durations, dependencies,
+                                                                                release=release)
+        assert solution.early_start.tolist() == early_start
+        assert solution.early_finish.tolist() == early_finish
+        assert solution.late_finish.tolist() == late_finish
+        assert solution.free_float.tolist() == free_float
+        assert solution.project_duration == end
+        path = solution.critical_path()
+        assert all(solution.critical[path])
+        assert solution.early_finish[path[-1]] == end
+
+
+def test_cycle_is_reported():
+    graph = TaskGraph.from_dependencies([1, 1, 1, 1], [[], [0, 3], [1], [2]])
+    with pytest.raises(CycleError) as info:
+        graph.topological_order()
+    cycle = info.value.cycle
+    assert cycle[0] == cycle[-1] and set(cycle) == {1, 2, 3}
+
+
+def test_incremental_schedule_matches_full_solve():
+    rng = random.Random(1)
+    for _ in range(60):
+        n = rng.randint(2, 30)
+        durations, dependencies = random_dag(rng, n)
+        pins = {}
+        schedule = IncrementalSchedule(TaskGraph.from_dependencies(durations, dependencies).solve())
+        for _ in range(20):
+            op, v = rng.random(), rng.randrange(n)
+            if op < 0.3:
+                durations[v] = rng.randint(0, 12)
+                schedule.set_duration(v, durations[v])
+            elif op < 0.55:
+                u = rng.randrange(n)
+                try:
+                    schedule.add_dependency(v, u)
+                except CycleError:
+                    continue
+                if u not in dependencies[v]:
+                    dependencies[v].append(u)
+            elif op < 0.75:
+                if not dependencies[v]:
+                    continue
+                u = rng.choice(dependencies[v])
+                dependencies[v].remove(u)
+                schedule.remove_dependency(v, u)
+            else:
+                day = rng.choice([None, rng.randint(1, 40)])
+                if day is None:
+                    pins.pop(v, None)
+                else:
+                    pins[v] = day
+                schedule.pin_start(v, day)
+
+            release = np.zeros(n, dtype=np.int64)
+            release[list(pins)] = list(pins.values())
+            full = TaskGraph.from_dependencies(durations, dependencies).solve(release=release)
+            assert schedule.early_start == full.early_start.tolist()
+            assert schedule.late_start == full.late_start.tolist()
+            assert schedule.project_duration == full.project_duration
+            assert [schedule.free_float(v) for v in range(n)] == full.free_float.tolist()
+            assert [schedule.is_critical(v) for v in range(n)] == full.critical.tolist()
+
+
+def assert_matches_full_solve(scheduler):
+    full = ProjectScheduler()
+    full.tasks = copy.deepcopy(scheduler.tasks)
+    full.pinned_starts = dict(scheduler.pinned_starts)
+    full.compute_critical_path(scheduler.start_date)
+    for task, expected in zip(scheduler.tasks, full.tasks):
+        for field in FIELDS:
+            assert task[field] == expected[field], (task['id'], field)
+    assert scheduler.critical_path == full.critical_path
+    for milestone, (name, task_id) in zip(scheduler.milestones, scheduler.milestone_tasks):
+        if task_id is not None:
+            assert milestone['date'] == full.tasks[task_id]['end_date'], name
+
+
+def test_scheduler_updates_match_full_solve():
+    rng = random.Random(2)
+    scheduler = ProjectScheduler()
+    scheduler.create_data_center_schedule()
+    ids = [task['id'] for task in scheduler.tasks]
+    for _ in range(200):
+        op, task_id = rng.random(), rng.choice(ids)
+        if op < 0.35:
+            scheduler.update_task_duration(task_id, rng.randint(1, 60))
+        elif op < 0.6:
+            try:
+                scheduler.add_dependency(task_id, rng.choice(ids))
+            except ValueError:
+                continue
+        elif op < 0.85:
+            dependencies = scheduler.tasks[scheduler.task_position(task_id)]['dependencies']
+            if not dependencies:
+                continue
+            scheduler.remove_dependency(task_id, rng.choice(dependencies))
+        else:
+            date = rng.choice([None, scheduler.start_date + timedelta(days=rng.randint(1, 400))])
+            scheduler.pin_task_start(task_id, date)
+        assert_matches_full_solve(scheduler)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from forest_inference import ForestInferenceEngine, float32_thresholds
+from model_artifact import load_artifact
+
+
+@pytest.fixture(scope='module')
+def features(trained_model):
+    """Encoded training-like rows, random rows and rows sitting exactly on split thresholds"""
+    X = trained_model.transform_features(trained_model.create_synthetic_dataset(300))
+    rng = np.random.default_rng(0)
+    random_rows = rng.normal(size=(200, X.shape[1])).astype(np.float32) * 2
+    tree = trained_model.regressor.estimators_[0].tree_
+    split = tree.feature >= 0
+    on_threshold = X[np.arange(np.count_nonzero(split)) % len(X)]
+    on_threshold[np.arange(len(on_threshold)), tree.feature[split]] = tree.threshold[split].astype(np.float32)
+    return np.vstack([X, random_rows, on_threshold])
+
+
+def test_engine_matches_sklearn_bit_for_bit(trained_model, features):
+    # A small block size also covers the blocked evaluation path
+    engine = ForestInferenceEngine.from_model(trained_model, block_size=64)
+    assert np.array_equal(engine.predict_proba(features), trained_model.classifier.predict_proba(features))
+    assert np.array_equal(engine.predict_class(features), trained_model.classifier.predict(features))
+    assert np.array_equal(engine.predict_quantity(features), trained_model.regressor.predict(features))
+
+    proba, qty = engine.predict_basket(features[:50])
+    classes = trained_model.classifier.classes_
+    X_items = np.column_stack([np.repeat(features[:50], len(classes), axis=0), np.tile(classes, 50)])
+    expected = trained_model.item_regressor.predict(X_items.astype(np.float32)).reshape(50, len(classes))
+    assert np.array_equal(proba, trained_model.classifier.predict_proba(features[:50]))
+    assert np.array_equal(qty, expected)
+
+
+def test_memory_mapped_artifact_predicts_like_the_model(trained_model, artifact_dir):
+    data = trained_model.create_synthetic_dataset(100)
+    artifact = load_artifact(artifact_dir)
+    master_items, quantities = artifact.predict(data)
+    expected_items, expected_quantities = trained_model.predict(data)
+    assert np.array_equal(master_items, expected_items)
+    assert np.array_equal(quantities, expected_quantities)
+
+
+def test_float32_thresholds_keep_every_decision():
+    rng = np.random.default_rng(1)
+    thresholds = rng.normal(size=1000) * 1e3
+    x = np.concatenate([thresholds.astype(np.float32), np.nextafter(thresholds.astype(np.float32), np.float32(np.inf)),
+                        np.nextafter(thresholds.astype(np.float32), np.float32(-np.inf))])
+    t = np.tile(thresholds, 3)
+    assert np.array_equal(x <= float32_thresholds(t), x.astype(np.float64) <= t)
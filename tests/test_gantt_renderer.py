@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from gantt_renderer import FOLD_ABOVE, gantt_rows, render_gantt
+
+
+def make_tasks(n, phases=4):
+    start = datetime(2024, 1, 1)
+    return [{'name': f"Task {i}", 'phase': f"Phase {i % phases}",
+             'start_date': start + timedelta(days=i), 'end_date': start + timedelta(days=i + 3)} for i in range(n)]
+
+
+def test_auto_fold_above_threshold(tmp_path):
+    small = render_gantt(make_tasks(FOLD_ABOVE), [], str(tmp_path / 'small.svg'), 'Small', use_cache=False)
+    assert small['rows'] == FOLD_ABOVE
+
+    big = render_gantt(make_tasks(FOLD_ABOVE + 1), [], str(tmp_path / 'big.svg'), 'Big', use_cache=False)
+    assert big['rows'] == 4
+
+    expanded = render_gantt(make_tasks(FOLD_ABOVE + 1), [], str(tmp_path / 'expanded.svg'), 'Big',
+                            expand=['Phase 1'], use_cache=False)
+    assert expanded['rows'] == 4 + len([t for t in make_tasks(FOLD_ABOVE + 1) if t['phase'] == 'Phase 1'])
+
+
+def test_folded_rows_span_their_phase():
+    tasks = make_tasks(10, phases=2)
+    rows = gantt_rows(tasks, fold=True)
+    assert rows['kind'].tolist() == ['phase', 'phase']
+    assert rows['tasks'].tolist() == [5, 5]
+    assert rows['start'].tolist() == [tasks[0]['start_date'], tasks[1]['start_date']]
+    assert rows['end'].tolist() == [tasks[8]['end_date'], tasks[9]['end_date']]
+
+
+def test_unknown_extension_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='Unsupported Gantt chart format'):
+        render_gantt(make_tasks(3), [], str(tmp_path / 'chart.pdf'), 'Chart')
+    assert not (tmp_path / 'chart.pdf').exists()
+
+
+def test_second_identical_render_is_cached(tmp_path):
+    tasks = make_tasks(12)
+    milestones = [{'name': 'Kickoff', 'date': datetime(2024, 1, 1)}]
+    first = render_gantt(tasks, milestones, str(tmp_path / 'first.html'), 'Cached chart')
+    second = render_gantt(tasks, milestones, str(tmp_path / 'second.html'), 'Cached chart')
+    assert not first['cached'] and second['cached']
+    assert first['digest'] == second['digest']
+    assert (tmp_path / 'first.html').read_bytes() == (tmp_path / 'second.html').read_bytes()
+
+    tasks[5]['end_date'] += timedelta(days=1)
+    changed = render_gantt(tasks, milestones, str(tmp_path / 'changed.html'), 'Cached chart')
+    assert not changed['cached'] and changed['digest'] != first['digest']
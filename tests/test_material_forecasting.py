@@ -0,0 +1,64 @@
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_inference import UnsupportedModelError
+from material_forecasting import MaterialForecastingModel
+from model_artifact import ModelArtifact
+from model_registry import ModelRegistry
+
+
+@pytest.mark.parametrize('with_id', [True, False])
+def test_train_incremental_from_csv(tmp_path, with_id):
+    model = MaterialForecastingModel()
+    data = model.create_synthetic_dataset(400)
+    if not with_id:
+        data = data.drop(columns='id')
+    path = str(tmp_path / 'train.csv')
+    data.to_csv(path, index=False)
+
+    performance = model.train_incremental(path, chunk_size=150)
+    assert 0 <= performance['accuracy'] <= 1
+    assert len(model.predict(data.head(5))[0]) == 5
+
+
+def test_train_incremental_keeps_the_forests(tmp_path):
+    model = MaterialForecastingModel()
+    for forest in (model.classifier, model.regressor, model.item_regressor):
+        forest.set_params(n_estimators=5)
+    data = model.create_synthetic_dataset(400)
+    path = str(tmp_path / 'train.csv')
+    data.to_csv(path, index=False)
+
+    model.train_incremental(path, chunk_size=150)
+    assert isinstance(model.classifier, RandomForestClassifier)
+    assert len(model.predict(data.head(5))[0]) == 5
+    with pytest.raises(UnsupportedModelError, match='train_incremental'):
+        model.save_artifact(str(tmp_path / 'artifact'))
+
+    # Not servable from the pickle either: the registry refuses it instead of failing per request
+    model.save_model(str(tmp_path / 'model.pkl'))
+    registry = ModelRegistry(str(tmp_path / 'missing'), str(tmp_path / 'model.pkl'))
+    with pytest.raises(UnsupportedModelError):
+        registry.get()
+
+    # A full train() afterwards goes back to the forests
+    model.train(data, basket=True)
+    assert model.sgd_classifier is None
+    assert len(model.predict_basket(data.head(2))) == 2 * len(model.classifier.classes_)
+    model.save_artifact(str(tmp_path / 'artifact'))
+
+
+def test_item_regressor_is_trained_only_for_baskets():
+    model = MaterialForecastingModel()
+    for forest in (model.classifier, model.regressor, model.item_regressor):
+        forest.set_params(n_estimators=5)
+    data = model.create_synthetic_dataset(300)
+
+    model.train(data, basket=True)
+    assert len(model.predict_basket(data.head(3))) == 3 * len(model.classifier.classes_)
+    model.train(data)
+    assert not hasattr(model.item_regressor, 'estimators_')
+    assert model.item_regressor.n_estimators == 5
+    with pytest.raises(ValueError, match='basket=True'):
+        model.predict_basket(data.head(3))
+    assert not ModelArtifact.from_model(model).engine.supports_basket
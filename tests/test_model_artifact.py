@@ -0,0 +1,40 @@
+import os
+import threading
+
+from model_artifact import MANIFEST_NAME, load_artifact, save_artifact
+from model_registry import ModelRegistry
+
+
+def test_save_over_artifact_while_loading(trained_model, other_model, tmp_path):
+    dirpath = str(tmp_path / 'artifact')
+    versions = {save_artifact(other_model, dirpath), save_artifact(trained_model, dirpath)}
+    assert len(versions) == 2
+    # No pickle to fall back on: a load can only succeed from the artifact directory
+    registry = ModelRegistry(dirpath, str(tmp_path / 'missing.pkl'))
+
+    stop = threading.Event()
+    loaded, errors = [], []
+
+    def load_loop():
+        while not stop.is_set():
+            try:
+                loaded.append(load_artifact(dirpath).version)
+                loaded.append(registry._read()[0].version)
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=load_loop) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(20):
+            save_artifact(other_model if i % 2 else trained_model, dirpath)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert loaded and set(loaded) <= versions
+    # Only the current version and the one it replaced are kept
+    assert sorted(name for name in os.listdir(dirpath) if name != MANIFEST_NAME) == sorted(versions)
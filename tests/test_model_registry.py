@@ -0,0 +1,112 @@
+import http.client
+import json
+import os
+import time
+
+import pytest
+
+import model_registry
+from model_artifact import MANIFEST_NAME, save_artifact
+from model_registry import ModelRegistry, ModelWatcher
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the model watcher")
+        time.sleep(0.02)
+
+
+def break_feature_columns(dirpath):
+    """Republish the artifact's manifest with a feature column renamed, as a retrain with new features would"""
+    manifest_path = os.path.join(dirpath, MANIFEST_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['feature_columns'] = manifest['feature_columns'][:-1] + ['renamed']
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+@pytest.fixture
+def registry(trained_model, tmp_path):
+    dirpath = str(tmp_path / 'artifact')
+    save_artifact(trained_model, dirpath)
+    registry = ModelRegistry(dirpath, str(tmp_path / 'missing.pkl'))
+    registry.get()
+    return registry
+
+
+def test_get_registry_does_not_watch(monkeypatch, artifact_dir):
+    monkeypatch.setattr(model_registry, '_registry', None)
+    monkeypatch.setenv('MODEL_ARTIFACT_DIR', artifact_dir)
+    monkeypatch.delenv('MODEL_RELOAD_INTERVAL', raising=False)
+    registry = model_registry.get_registry()
+    registry.get()
+    assert registry.watcher is None
+    assert registry.start_watcher(0) is None
+
+
+def test_reload_waits_for_the_files_to_settle(registry, other_model):
+    watcher = ModelWatcher(registry)
+    old_version = registry.version
+    seen = registry.source_signature()
+    new_version = save_artifact(other_model, registry.artifact_dir)
+
+    seen = watcher.check(seen)
+    assert registry.version == old_version
+    watcher.check(seen)
+    assert registry.version == new_version
+    assert registry.reloads == 1
+
+
+def test_rejected_model_is_not_retried(registry, other_model):
+    watcher = ModelWatcher(registry)
+    old_version = registry.version
+    save_artifact(other_model, registry.artifact_dir)
+    break_feature_columns(registry.artifact_dir)
+    seen = registry.source_signature()
+
+    watcher.check(watcher.check(seen))
+    assert registry.version == old_version
+    assert 'Feature columns changed' in registry.last_reload_error
+    assert watcher.rejected == seen
+
+    registry.last_reload_error = None
+    watcher.check(seen)
+    assert registry.last_reload_error is None
+
+
+def test_running_watcher_swaps_valid_and_rejects_invalid(registry, trained_model, other_model):
+    old_version = registry.version
+    watcher = registry.start_watcher(0.05)
+    try:
+        new_version = save_artifact(other_model, registry.artifact_dir)
+        wait_for(lambda: registry.version == new_version)
+        assert registry.last_reload_error is None
+
+        save_artifact(trained_model, registry.artifact_dir)
+        break_feature_columns(registry.artifact_dir)
+        wait_for(lambda: registry.last_reload_error is not None)
+        assert registry.version == new_version != old_version
+    finally:
+        watcher.stop()
+        watcher.join()
+
+
+def test_api_server_reloads_with_reload_interval(api_server, trained_model, other_model, tmp_path):
+    dirpath = str(tmp_path / 'artifact')
+    old_version = save_artifact(trained_model, dirpath)
+    host, port = api_server('--workers', '1', '--reload-interval', '0.1', MODEL_ARTIFACT_DIR=dirpath)
+
+    def served_version():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        connection.request('GET', '/api/predict')
+        version = json.loads(connection.getresponse().read())['model_version']
+        connection.close()
+        return version
+
+    assert served_version() == old_version
+    new_version = save_artifact(other_model, dirpath)
+    wait_for(lambda: served_version() == new_version)
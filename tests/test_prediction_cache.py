@@ -0,0 +1,31 @@
+from prediction_cache import PredictionCache
+
+
+def test_versions_do_not_evict_each_other():
+    cache = PredictionCache()
+    key = cache.make_key('Data Center', 'Delhi', 30, 100000)
+    cache.put(key, 'new', 'v2')
+    # A request still served by the old model during a reload
+    assert cache.get(key, 'v1') is None
+    cache.put(key, 'old', 'v1')
+    assert cache.get(key, 'v2') == 'new'
+    assert cache.get(key, 'v1') == 'old'
+    assert cache.stats()['invalidations'] == 0
+
+
+def test_lru_and_key_canonicalization():
+    cache = PredictionCache(max_entries=2, power_step=5)
+    assert cache.make_key(' Data  Center', 'Delhi', 31, 1e5) == cache.make_key('Data Center', 'Delhi', 29, 100000)
+    for i in range(3):
+        cache.put(i, i, 'v1')
+    assert cache.get(0, 'v1') is None
+    assert cache.get(2, 'v1') == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_miss():
+    cache = PredictionCache(ttl_seconds=0)
+    cache.put('key', 'value', 'v1')
+    assert not cache.contains('key', 'v1')
+    assert cache.get('key', 'v1') is None
+    assert cache.stats()['expirations'] == 1
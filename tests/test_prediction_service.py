@@ -0,0 +1,86 @@
+import http.client
+import json
+
+import pytest
+
+from model_artifact import load_artifact
+from prediction_service import iter_predictions, parse_batch, predict_records
+
+GOOD = {'project_type': 'Data Center', 'region': 'Delhi', 'power_capacity': 30, 'area': 150000}
+
+
+@pytest.fixture(scope='module')
+def artifact(artifact_dir):
+    return load_artifact(artifact_dir)
+
+
+def test_bad_rows_get_their_own_errors(artifact):
+    records = parse_batch('\n'.join([json.dumps(GOOD), '{not json', json.dumps(dict(GOOD, region='Atlantis')),
+                                     '', json.dumps(dict(GOOD, area='large')), '[1, 2]', json.dumps({})]),
+                          ndjson=True)
+    results = predict_records(records, artifact)
+    assert [result['index'] for result in results] == list(range(6))
+    errors = {result['index']: result.get('error') for result in results}
+    assert errors[0] is None and errors[5] is None
+    assert 'Invalid JSON' in errors[1]
+    assert 'Unknown region' in errors[2]
+    assert errors[3] and errors[4]
+
+    # A valid row predicts the same inside a batch as on its own
+    alone = predict_records([GOOD], artifact)[0]
+    assert {k: v for k, v in results[0].items() if k != 'index'} == {k: v for k, v in alone.items() if k != 'index'}
+
+
+def test_non_finite_numbers_are_row_errors(artifact):
+    records = parse_batch('\n'.join([json.dumps(GOOD), '{"power_capacity": NaN}', '{"area": Infinity}',
+                                     json.dumps(dict(GOOD, area='-inf'))]), ndjson=True)
+    results = predict_records(records, artifact)
+    assert 'error' not in results[0]
+    assert 'power_capacity must be a finite number' in results[1]['error']
+    assert 'area must be a finite number' in results[2]['error']
+    assert 'area must be a finite number' in results[3]['error']
+
+
+def test_chunked_predictions_keep_batch_indices(artifact):
+    records = [dict(GOOD, power_capacity=i) for i in range(10)] + ['oops']
+    chunks = list(iter_predictions(records, artifact, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 3]
+    results = [result for chunk in chunks for result in chunk]
+    assert [result['index'] for result in results] == list(range(11))
+    assert results[-1]['error'] and all('error' not in result for result in results[:-1])
+
+
+def test_batch_endpoint_reports_row_errors(api_server):
+    host, port = api_server('--workers', '0')
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    body = '\n'.join([json.dumps(GOOD), 'nonsense', json.dumps(dict(GOOD, project_type='Castle'))])
+    connection.request('POST', '/api/predict', body, {'Content-Type': 'application/x-ndjson'})
+    response = connection.getresponse()
+    assert response.status == 200
+    lines = [json.loads(line) for line in response.read().decode().splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert 'error' not in lines[0] and lines[0]['material_name']
+    assert 'error' in lines[1] and 'error' in lines[2]
+
+
+def test_batch_over_max_size_is_rejected(api_server):
+    host, port = api_server('--workers', '0', PREDICT_MAX_BATCH_SIZE='3')
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    connection.request('POST', '/api/predict', json.dumps([GOOD] * 4), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    assert response.status == 413
+    assert 'exceeds the maximum of 3' in json.loads(response.read())['error']
+
+    connection.request('POST', '/api/predict', json.dumps([GOOD] * 3), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    assert response.status == 200
+    assert len(response.read().decode().splitlines()) == 3
+
+
+def test_non_finite_single_project_is_rejected(api_server):
+    host, port = api_server('--workers', '0')
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    connection.request('POST', '/api/predict', '{"power_capacity": NaN}', {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    assert response.status == 400
+    assert 'finite' in json.loads(response.read())['error']
@@ -0,0 +1,31 @@
+from procurement_plan import FORECAST_UNIT, ProcurementPlan
+
+
+def test_basket_requirements_use_expected_quantities_in_forecast_units():
+    basket = [
+        {'MasterItemNo': 101, 'probability': 0.5, 'QtyShipped': 200},
+        {'MasterItemNo': 101, 'probability': 0.25, 'QtyShipped': 101},
+        {'MasterItemNo': 104, 'probability': 0.3, 'QtyShipped': 10},
+        {'MasterItemNo': 106, 'probability': 0.1, 'QtyShipped': 10},
+        {'MasterItemNo': 109, 'probability': 0.04, 'QtyShipped': 500}
+    ]
+    requirements = ProcurementPlan().material_requirements_from_basket(basket)
+
+    assert set(requirements) == {'Steel Reinforcement Bars', 'HVAC Equipment', 'Insulation Materials'}
+    assert all(req['unit'] == FORECAST_UNIT for req in requirements.values())
+    steel = requirements['Steel Reinforcement Bars']
+    assert steel['quantity'] == 126  # ceil(0.5 * 200 + 0.25 * 101)
+    assert steel['forecast_probability'] == 0.5
+    # Priced per ton in the reference plan, so not priced per shipped unit
+    assert (steel['reference_unit'], steel['reference_cost_per_unit'], steel['estimated_cost_per_unit']) == \
+        ('tons', 15000, 0)
+    assert requirements['HVAC Equipment']['quantity'] == 3
+    assert requirements['HVAC Equipment']['estimated_cost_per_unit'] == 150000
+    assert requirements['Insulation Materials']['quantity'] == 1
+
+
+def test_procurement_plan_from_basket(trained_model):
+    basket = trained_model.predict_basket(trained_model.create_synthetic_dataset(3))
+    plan = ProcurementPlan().create_comprehensive_procurement_plan(basket)
+    assert plan['material_requirements']
+    assert plan['project_overview']['total_estimated_cost'] >= 0
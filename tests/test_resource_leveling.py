@@ -0,0 +1,85 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from critical_path import DEFAULT_LAG, TaskGraph
+from project_scheduler import ProjectScheduler
+from resource_leveling import PRIORITY_RULES, level_resources
+
+
+def random_dag(rng, n):
+    """Durations and predecessor lists of a random DAG (predecessors always have lower indices)"""
+    durations = [rng.randint(0, 9) for _ in range(n)]
+    dependencies = [sorted(rng.sample(range(v), rng.randint(0, min(v, 3)))) for v in range(n)]
+    return durations, dependencies
+
+
+def check_schedule(schedule, durations, dependencies, demand, capacity, release):
+    start, finish = schedule.start.tolist(), schedule.finish.tolist()
+    usage = np.zeros((len(capacity), max(finish + [0]) + 1), dtype=np.int64)
+    for v, deps in enumerate(dependencies):
+        assert finish[v] - start[v] == durations[v]
+        assert start[v] >= release[v]
+        for p in deps:
+            assert start[v] >= finish[p] + DEFAULT_LAG
+        usage[:, start[v]:finish[v]] += demand[v][:, None]
+    # Recounted independently of ResourceSchedule.usage
+    assert (usage <= np.asarray(capacity)[:, None]).all()
+    assert schedule.is_feasible()
+
+
+@pytest.mark.parametrize('priority', list(PRIORITY_RULES))
+def test_leveled_schedule_respects_capacity_and_precedence(priority):
+    rng = random.Random(7)
+    for _ in range(30):
+        n = rng.randint(1, 40)
+        durations, dependencies = random_dag(rng, n)
+        capacity = [rng.randint(1, 3) for _ in range(3)]
+        demand = np.array([[rng.randint(0, c) for c in capacity] for _ in range(n)])
+        release = [rng.choice([0, 0, rng.randint(0, 20)]) for _ in range(n)]
+        graph = TaskGraph.from_dependencies(durations, dependencies)
+
+        schedule = level_resources(graph, demand, capacity, priority, release=release)
+        check_schedule(schedule, durations, dependencies, demand, capacity, release)
+        assert (schedule.delay >= 0).all()
+        assert schedule.project_duration >= schedule.solution.project_duration
+
+
+def test_ample_capacity_keeps_the_cpm_schedule():
+    durations, dependencies = random_dag(random.Random(3), 25)
+    graph = TaskGraph.from_dependencies(durations, dependencies)
+    demand = np.ones((25, 2), dtype=np.int64)
+    schedule = level_resources(graph, demand, [25, 25])
+    assert (schedule.start == schedule.solution.early_start).all()
+    assert (schedule.delay == 0).all()
+
+
+def test_demand_over_capacity_is_rejected():
+    graph = TaskGraph.from_dependencies([3, 2], [[], [0]])
+    with pytest.raises(ValueError, match='needs 2 units of crane'):
+        level_resources(graph, [[2], [1]], [1], resources=['crane'])
+    with pytest.raises(ValueError, match='Unknown priority rule'):
+        level_resources(graph, [[1], [1]], [1], priority='shortest')
+
+
+def test_scheduler_leveling_is_feasible():
+    scheduler = ProjectScheduler()
+    scheduler.create_data_center_schedule()
+    # The tightest capacities every task still fits in
+    capacities = {name: max(task['resources'].get(name, 0) for task in scheduler.tasks) or 1
+                  for name in scheduler.level_resources().resources}
+    schedule = scheduler.level_resources(capacities)
+    assert schedule.delay.any()
+
+    by_id = {task['id']: task for task in scheduler.tasks}
+    for task in scheduler.tasks:
+        for dep in task['dependencies']:
+            assert task['start_date'] >= by_id[dep]['end_date'] + timedelta(days=DEFAULT_LAG)
+    for day in range(max(task['end_date'] for task in scheduler.tasks).toordinal()
+                     - scheduler.start_date.toordinal()):
+        date = scheduler.start_date + timedelta(days=day)
+        running = [task for task in scheduler.tasks if task['start_date'] <= date < task['end_date']]
+        for name, units in capacities.items():
+            assert sum(task['resources'].get(name, 0) for task in running) <= units
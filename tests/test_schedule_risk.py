@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from critical_path import TaskGraph
+from project_scheduler import ProjectScheduler
+from schedule_risk import simulate_schedule
+
+# 0 -> 1 -> 3 and 0 -> 2 -> 3
+DURATIONS = [4, 6, 3, 5]
+DEPENDENCIES = [[], [0], [0], [1, 2]]
+
+
+@pytest.fixture
+def graph():
+    return TaskGraph.from_dependencies(DURATIONS, DEPENDENCIES)
+
+
+@pytest.mark.parametrize('distribution', ['pert', 'triangular'])
+def test_percentiles_are_ordered(graph, distribution):
+    optimistic = [d - 2 for d in DURATIONS]
+    pessimistic = [d * 3 for d in DURATIONS]
+    risk = simulate_schedule(graph, optimistic, DURATIONS, pessimistic, 5000, distribution, tracked=[1, 3],
+                             chunk_size=700)
+    completion = risk.completion_percentiles((5, 50, 80, 95))
+    assert completion[5] <= completion[50] <= completion[80] <= completion[95]
+    assert graph.solve().project_duration - 6 <= completion[5]
+    assert completion[95] <= graph.solve().project_duration * 3 + 3
+    for percentiles in risk.tracked_percentiles().values():
+        assert percentiles[50] <= percentiles[80] <= percentiles[95]
+    assert np.all((risk.criticality >= 0) & (risk.criticality <= 1))
+    assert 0.0 < risk.probability_by(graph.solve().project_duration) < 1.0
+
+
+def test_degenerate_ranges_give_the_deterministic_schedule(graph):
+    risk = simulate_schedule(graph, DURATIONS, DURATIONS, DURATIONS, 200, tracked=[1])
+    solution = graph.solve()
+    assert set(risk.completion_percentiles().values()) == {solution.project_duration}
+    assert risk.tracked_percentiles()[1] == {q: float(solution.early_finish[1]) for q in (50, 80, 95)}
+    assert risk.criticality.tolist() == solution.critical.astype(float).tolist()
+    assert risk.probability_by(solution.project_duration) == 1.0
+
+
+def test_scheduler_risk_without_ranges_matches_the_plan():
+    scheduler = ProjectScheduler()
+    scheduler.create_data_center_schedule()
+    for task in scheduler.tasks:
+        task['optimistic_duration'] = task['pessimistic_duration'] = task['duration']
+    analysis = scheduler.run_risk_analysis(n_samples=500)
+    planned = analysis['planned_completion']
+    assert analysis['completion'] == {'P50': planned, 'P80': planned, 'P95': planned}
+    assert analysis['probability_on_time'] == 1.0
+    milestone_dates = {m['name']: m['date'] for m in scheduler.milestones}
+    for name, dates in analysis['milestones'].items():
+        assert set(dates.values()) == {milestone_dates[name]}
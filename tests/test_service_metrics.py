@@ -0,0 +1,64 @@
+import http.client
+import json
+import re
+
+from service_metrics import MetricsRegistry
+
+
+def counter(text, name, **labels):
+    """Value of one counter in a Prometheus text exposition (0 if absent)"""
+    label_text = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    pattern = re.escape(name + ('{' + label_text + '}' if label_text else '')) + r' (\S+)'
+    match = re.search(r'^' + pattern + r'$', text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_merge_adds_drained_samples():
+    worker, server = MetricsRegistry(), MetricsRegistry()
+    for _ in range(3):
+        worker.record_request('predict', 200, 0.01)
+    worker.observe('api_inference_seconds', 0.5, endpoint='predict')
+    server.record_request('predict', 200, 0.02)
+
+    server.merge(worker.drain())
+    assert worker.drain() == {'counters': {}, 'histograms': {}}
+    server.merge(worker.drain())
+
+    text = server.render()
+    assert counter(text, 'api_requests_total', endpoint='predict', status='200') == 4
+    assert counter(text, 'api_request_duration_seconds_count', endpoint='predict') == 4
+    assert counter(text, 'api_inference_seconds_count', endpoint='predict') == 1
+
+
+def test_drain_keeps_gauges():
+    registry = MetricsRegistry()
+    registry.add_gauge('api_requests_in_flight', 2)
+    registry.inc('api_requests_total', endpoint='vendors', status='200')
+    registry.drain()
+    text = registry.render()
+    assert counter(text, 'api_requests_in_flight') == 2
+    assert counter(text, 'api_requests_total', endpoint='vendors', status='200') == 0
+
+
+def test_worker_pool_counts_each_request_once(api_server):
+    host, port = api_server('--workers', '2')
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+
+    def request(method, path, body=None):
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    # Vendor requests are counted in the server process, predictions in the workers
+    for _ in range(5):
+        assert request('GET', '/api/vendors')[0] == 200
+    for i in range(4):
+        assert request('POST', '/api/predict', json.dumps({'power_capacity': 30 + i, 'area': 100000}))[0] == 200
+    assert request('POST', '/api/predict', json.dumps([{'power_capacity': 30}] * 3))[0] == 200
+
+    status, body = request('GET', '/api/metrics')
+    assert status == 200
+    text = body.decode()
+    assert counter(text, 'api_requests_total', endpoint='vendors', status='200') == 5
+    assert counter(text, 'api_requests_total', endpoint='predict', status='200') == 5
+    assert counter(text, 'api_inference_seconds_count', endpoint='predict', mode='single') == 4
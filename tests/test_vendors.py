@@ -0,0 +1,60 @@
+import gzip
+import json
+from urllib.parse import quote
+
+import pytest
+
+from api_server import invoke_handler, load_module, parse_handler_response
+
+
+def get(path, headers=()):
+    raw = '\r\n'.join([f'GET {path} HTTP/1.1'] + [f'{n}: {v}' for n, v in headers]) + '\r\n\r\n'
+    return parse_handler_response(invoke_handler('vendors', raw.encode('latin-1'), ('127.0.0.1', 0)))
+
+
+def test_material_matching_ignores_case_on_both_paths():
+    material = next(iter(load_module('vendors').VENDOR_DATA))
+    expected = None
+    for spelling in (material, material.upper(), f' {material.lower()} '):
+        status, _, _, body = get(f'/api/vendors?material={quote(spelling)}')
+        assert status == 200
+        precomputed = json.loads(body)
+        assert list(precomputed) == [material]
+        status, _, _, body = get(f'/api/vendors?material={quote(spelling)}&limit=500')
+        indexed = [vendor['name'] for vendor in json.loads(body)['vendors']]
+        assert indexed == [vendor['name'] for vendor in precomputed[material]]
+        assert expected in (None, indexed)
+        expected = indexed
+
+
+def test_unknown_material():
+    status, _, _, body = get('/api/vendors?material=Unobtainium')
+    assert status == 200 and 'not found' in json.loads(body)['error']
+
+
+def header(headers, name):
+    return next((value for n, value in headers if n.lower() == name.lower()), None)
+
+
+@pytest.mark.parametrize('path', ['/api/vendors', '/api/vendors?min_rating=4&limit=2'])
+def test_etag_revalidation(path):
+    status, _, headers, body = get(path)
+    etag = header(headers, 'ETag')
+    assert status == 200 and etag.startswith('"') and body
+    assert header(headers, 'Vary') == 'Accept-Encoding'
+
+    status, _, headers, body = get(path, [('If-None-Match', etag)])
+    assert status == 304 and body == b'' and header(headers, 'ETag') == etag
+    status, _, _, _ = get(path, [('If-None-Match', f'"other", W/{etag}')])
+    assert status == 304
+    status, _, _, body = get(path, [('If-None-Match', '"stale"')])
+    assert status == 200 and body
+
+
+def test_each_encoding_has_its_own_etag():
+    status, _, headers, body = get('/api/vendors', [('Accept-Encoding', 'gzip')])
+    assert status == 200 and header(headers, 'Content-Encoding') == 'gzip'
+    assert json.loads(gzip.decompress(body)) == json.loads(get('/api/vendors')[3])
+    gzip_etag = header(headers, 'ETag')
+    assert gzip_etag != header(get('/api/vendors')[2], 'ETag')
+    assert get('/api/vendors', [('Accept-Encoding', 'gzip'), ('If-None-Match', gzip_etag)])[0] == 304
@@ -0,0 +1,136 @@
+import base64
+import json
+import re
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_delivery_days(delivery_time):
+    """Longest delivery time in days from strings like '7-14 days', '2 weeks' or 'Same day'; None if unknown"""
+    if not delivery_time:
+        return None
+    text = str(delivery_time).lower()
+    if 'same day' in text:
+        return 0
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', text)]
+    if not numbers:
+        return None
+    days = max(numbers)
+    if 'week' in text:
+        days *= 7
+    elif 'month' in text:
+        days *= 30
+    return days
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps({'after': position}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))['after'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class VendorIndex:
+    """In-memory secondary indexes over a {material: [vendor, ...]} catalog
+
+    Vendors are numbered once in catalog order. Material, location (city,
+    state or full location) and certification map to sorted id arrays;
+    rating and delivery days are kept as id arrays sorted by value, so a
+    threshold is one bisect. A query intersects the most selective index
+    first and checks range conditions on the surviving ids only. Pages
+    follow catalog order; the cursor is the last id returned.
+    """
+
+    def __init__(self, vendor_data):
+        self.vendors = []
+        by_material, by_location, by_certification = {}, {}, {}
+        ratings, delivery_days = [], []
+
+        for material, vendors in vendor_data.items():
+            for vendor in vendors:
+                vendor_id = len(self.vendors)
+                self.vendors.append(dict(vendor, material=material))
+                by_material.setdefault(material.lower(), []).append(vendor_id)
+
+                location = vendor.get('location', '')
+                keys = {location.lower()} | {part.strip().lower() for part in location.split(',')}
+                for key in keys - {''}:
+                    by_location.setdefault(key, []).append(vendor_id)
+                for certification in vendor.get('certifications', []):
+                    by_certification.setdefault(certification.lower(), []).append(vendor_id)
+
+                ratings.append(float(vendor.get('rating', 0.0)))
+                days = parse_delivery_days(vendor.get('delivery_time'))
+                delivery_days.append(np.inf if days is None else days)
+
+        as_index = lambda groups: {key: np.array(ids, dtype=np.int64) for key, ids in groups.items()}
+        self.by_material = as_index(by_material)
+        self.by_location = as_index(by_location)
+        self.by_certification = as_index(by_certification)
+
+        self.ratings = np.array(ratings, dtype=np.float64)
+        self.delivery_days = np.array(delivery_days, dtype=np.float64)
+        self.rating_order = np.argsort(self.ratings, kind='stable')
+        self.sorted_ratings = self.ratings[self.rating_order].tolist()
+        self.delivery_order = np.argsort(self.delivery_days, kind='stable')
+        self.sorted_delivery_days = self.delivery_days[self.delivery_order].tolist()
+
+    def __len__(self):
+        return len(self.vendors)
+
+    def matching_ids(self, material=None, location=None, certification=None, min_rating=None,
+                     max_delivery_days=None):
+        """Sorted ids of vendors matching every given filter"""
+        empty = np.empty(0, dtype=np.int64)
+        candidates = []
+        for index, value in ((self.by_material, material), (self.by_location, location),
+                             (self.by_certification, certification)):
+            if value is not None:
+                candidates.append(index.get(value.strip().lower(), empty))
+
+        if candidates:
+            candidates.sort(key=len)
+            ids = candidates[0]
+            for other in candidates[1:]:
+                ids = np.intersect1d(ids, other, assume_unique=True)
+            if min_rating is not None:
+                ids = ids[self.ratings[ids] >= min_rating]
+            if max_delivery_days is not None:
+                ids = ids[self.delivery_days[ids] <= max_delivery_days]
+            return ids
+
+        # Only range filters: take the narrower one from its sorted index
+        ranges = []
+        if min_rating is not None:
+            ranges.append(self.rating_order[bisect_left(self.sorted_ratings, min_rating):])
+        if max_delivery_days is not None:
+            ranges.append(self.delivery_order[:bisect_right(self.sorted_delivery_days, max_delivery_days)])
+        if not ranges:
+            return np.arange(len(self.vendors), dtype=np.int64)
+        ids = np.sort(min(ranges, key=len))
+        if len(ranges) > 1:
+            ids = ids[(self.ratings[ids] >= min_rating) & (self.delivery_days[ids] <= max_delivery_days)]
+        return ids
+
+    def query(self, material=None, location=None, certification=None, min_rating=None,
+              max_delivery_days=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """One page of matching vendors: {'vendors', 'count', 'next_cursor'}"""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        ids = self.matching_ids(material, location, certification, min_rating, max_delivery_days)
+        start = 0 if cursor is None else int(np.searchsorted(ids, decode_cursor(cursor), side='right'))
+        page = ids[start:start + limit]
+        has_more = start + limit < len(ids)
+        return {
+            'vendors': [self.vendors[i] for i in page],
+            'count': int(len(ids)),
+            'next_cursor': encode_cursor(int(page[-1])) if has_more else None
+        }